@@ -0,0 +1,103 @@
+# Measures the size of binary replays (src/BinaryReplay.py) and how fast they are written, opened, seeked into and
+# re-simulated, for long games on fields like the real levels. The player drive stands still while the AI drives random
+# walk, so games can run for any number of turns. The pickled GameRecording of the same game is shown for comparison.
+# Run from the top level directory of the project: python3 -m benchmarks.binary_replay_benchmark
+import argparse
+import os
+import random
+import tempfile
+import time
+from src.AIDrive import AIDrive
+from src.BinaryReplay import BinaryReplay, BinaryReplayWriter
+from src.Constants import DriveMove
+from src.Field import Field
+from src.FleetDrive import FleetDrive
+from src.GameLevel import GameLevel
+from src.GameRecording import GameRecording
+
+# name, field width, field height, AI drives, pods
+SCENARIOS = [
+    ('Level 3 field (30x20, 5 AI drives, 2 pods)', 30, 20, 5, 2),
+    ('Busy field (30x20, 40 AI drives, 5 pods)', 30, 20, 40, 5),
+]
+
+# Turns of the game also saved as a GameRecording, pickling every turn of a long game would take minutes
+RECORDING_TURNS = 2000
+
+
+def build_field(width, height, num_ai_drives, num_pods):
+    field = Field(width, height)
+    field.spawn_goal(num_pods)
+    player = FleetDrive(0)
+    field.spawn_player(player, 0)
+    ai_drives = []
+    for i in range(num_ai_drives):
+        ai_drive = AIDrive(i + 1)
+        field.spawn_new_ai_drive(ai_drive)
+        ai_drives.append(ai_drive)
+    for i in range(num_pods):
+        field.spawn_new_pod(field.pod_id_provider.get_new_id())
+    return field, player, ai_drives
+
+
+def run_scenario(name, width, height, num_ai_drives, num_pods, turns, seeks, directory):
+    field, player, ai_drives = build_field(width, height, num_ai_drives, num_pods)
+    replay_path = os.path.join(directory, 'benchmark.binreplay')
+    recording_path = os.path.join(directory, 'benchmark.replay')
+    level = GameLevel(name, num_ai_drives, num_pods, -1)
+    writer = BinaryReplayWriter(replay_path, level, 'benchmark', field, [player], ai_drives)
+    recording = GameRecording(name, field.goal_coords_list, recording_path)
+
+    record_time = 0
+    for turn in range(turns):
+        field.process_move_for_drive(DriveMove.NONE, player)
+        ai_moves = [ai_drive.get_next_move(None) for ai_drive in ai_drives]
+        for ai_drive, ai_move in zip(ai_drives, ai_moves):
+            field.process_move_for_drive(ai_move, ai_drive)
+        field.advance_turn()
+
+        time_start = time.perf_counter()
+        writer.record_turn([DriveMove.NONE], ai_moves, turn + 1)
+        record_time += time.perf_counter() - time_start
+        if turn < RECORDING_TURNS:
+            recording.publish(field, turn + 1)
+    writer.close(None, turns)
+    recording.close(None, min(turns, RECORDING_TURNS))
+    final_hash = field.zobrist_hash
+
+    time_start = time.perf_counter()
+    replay = BinaryReplay(replay_path)
+    open_time = time.perf_counter() - time_start
+
+    time_start = time.perf_counter()
+    for turn in random.sample(range(turns + 1), seeks):
+        replay.get_field(turn)
+    seek_time = (time.perf_counter() - time_start) / seeks
+
+    time_start = time.perf_counter()
+    for turn, replayed_field, score in replay.simulate():
+        pass
+    simulate_time = time.perf_counter() - time_start
+    if replayed_field.zobrist_hash != final_hash:
+        raise Exception(f'{name}: re-simulated game does not end in the recorded state')
+    replay.close()
+
+    replay_size = os.path.getsize(replay_path)
+    recording_size = os.path.getsize(recording_path)
+    print(f'{name}: {turns} turns, '
+          f'binary replay = {replay_size / 1024:.1f} KB ({replay_size / turns:.2f} bytes/turn, '
+          f'GameRecording = {recording_size / min(turns, RECORDING_TURNS):.1f} bytes/turn), '
+          f'record = {1e6 * record_time / turns:.2f} us/turn, open = {1000 * open_time:.3f} ms, '
+          f'seek = {1000 * seek_time:.3f} ms, re-simulate = {turns / simulate_time:.0f} turns/s')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=20000)
+    parser.add_argument('--seeks', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        for scenario in SCENARIOS:
+            random.seed(args.seed)
+            run_scenario(*scenario, turns=args.turns, seeks=args.seeks, directory=directory)
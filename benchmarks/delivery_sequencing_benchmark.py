@@ -0,0 +1,75 @@
+# Compares the number of moves needed to deliver every pod when pods are taken greedily (nearest pod first, like
+# YourAgent used to) against the order planned by DeliverySequencer, and reports how long planning takes.
+# Run from the top level directory of the project: python3 -m benchmarks.delivery_sequencing_benchmark
+import argparse
+import random
+import time
+from src.DeliverySequencer import DeliverySequencer
+
+# name, field width, field height, number of pods
+SCENARIOS = [
+    ('Level 4 field (30x20, 5 pods)', 30, 20, 5),
+    ('30x20, 10 pods', 30, 20, 10),
+    ('30x20, 13 pods (largest exact)', 30, 20, 13),
+    ('60x40, 20 pods (local search)', 60, 40, 20),
+    ('100x100, 50 pods (local search)', 100, 100, 50),
+]
+
+
+def random_free_cell(width, height, occupied):
+    cell = (random.randrange(width), random.randrange(height))
+    while cell in occupied:
+        cell = (random.randrange(width), random.randrange(height))
+    return cell
+
+
+def get_greedy_order(sequencer, start, pods):
+    # Nearest remaining pod first, measured from wherever the last pod was dropped
+    start_costs, costs, carry_costs = sequencer.build_cost_matrix(start, pods)
+    remaining = set(range(len(pods)))
+    current = min(remaining, key=lambda j: abs(start[0] - pods[j][1][0]) + abs(start[1] - pods[j][1][1]))
+    order = [current]
+    remaining.remove(current)
+    while remaining:
+        goal = pods[current][2]
+        current = min(remaining, key=lambda j: abs(goal[0] - pods[j][1][0]) + abs(goal[1] - pods[j][1][1]))
+        order.append(current)
+        remaining.remove(current)
+    return sequencer.get_order_cost(order, start_costs, costs)
+
+
+def run_scenario(name, width, height, num_pods, instances):
+    sequencer = DeliverySequencer(width, height)
+    greedy_moves = 0
+    planned_moves = 0
+    plan_time = 0
+    for i in range(instances):
+        occupied = set()
+        start = random_free_cell(width, height, occupied)
+        occupied.add(start)
+        pods = []
+        for pod_id in range(num_pods):
+            location = random_free_cell(width, height, occupied)
+            occupied.add(location)
+            goal = random_free_cell(width, height, occupied)
+            occupied.add(goal)
+            pods.append((pod_id, list(location), goal))
+
+        greedy_moves += get_greedy_order(sequencer, start, pods)
+        time_start = time.perf_counter()
+        order, moves = sequencer.plan(start, pods)
+        plan_time += time.perf_counter() - time_start
+        planned_moves += moves
+
+    print(f'{name}: greedy = {greedy_moves / instances:.1f} moves, planned = {planned_moves / instances:.1f} moves '
+          f'({100 * (1 - planned_moves / greedy_moves):.1f}% fewer), planning = {1000 * plan_time / instances:.2f} ms')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--instances', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    for scenario in SCENARIOS:
+        random.seed(args.seed)
+        run_scenario(*scenario, instances=args.instances)
@@ -0,0 +1,119 @@
+# Compares long range queries on HierarchicalPlanner against full A* with YourAgent.find_shortest_path on large fields.
+# Pods are built into the cluster graph, drives random walk and are passed to each query as dynamic_blocked. Each turn
+# one pod is also carried a step, and the time to apply that to the cluster graph with update_cells is measured.
+# Run from the top level directory of the project: python3 -m benchmarks.hierarchical_planner_benchmark
+import argparse
+import random
+import time
+from src.Constants import SensorData
+from src.DStarLitePlanner import get_changed_cells
+from src.HierarchicalPlanner import HierarchicalPlanner
+from src.YourAgent import YourAgent
+
+# name, field width, field height, moving drives, static pods, cluster size
+SCENARIOS = [
+    ('Level field 30x20 (5 drives, 5 pods)', 30, 20, 5, 5, 10),
+    ('Large 200x200 (200 drives, 2000 pods)', 200, 200, 200, 2000, 10),
+    ('Large 400x400 (800 drives, 8000 pods)', 400, 400, 800, 8000, 16),
+]
+
+NEIGHBOUR_OFFSETS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+
+def random_free_cell(width, height, occupied):
+    cell = (random.randrange(width), random.randrange(height))
+    while cell in occupied:
+        cell = (random.randrange(width), random.randrange(height))
+    return cell
+
+
+def run_scenario(name, width, height, num_drives, num_pods, cluster_size, queries):
+    pods = set()
+    for i in range(num_pods):
+        pods.add(random_free_cell(width, height, pods))
+    drives = []
+    for i in range(num_drives):
+        drives.append(random_free_cell(width, height, pods | set(drives)))
+    blocked = pods | set(drives)
+
+    time_start = time.perf_counter()
+    planner = HierarchicalPlanner(width, height, pods, cluster_size)
+    build_time = time.perf_counter() - time_start
+
+    # The planning drive carries a pod, so other pods are obstacles like in the hardest case for YourAgent
+    agent = YourAgent(0)
+    sensor_data = {
+        SensorData.FIELD_DIMENSIONS: [width, height],
+        SensorData.DRIVE_LIFTED_POD_PAIRS: [[0, 0]],
+        SensorData.REAL_TIME_POD_LOCATIONS: [list(pod) for pod in pods],
+    }
+
+    astar_time = 0
+    hpa_time = 0
+    update_time = 0
+    rebuilt_clusters = 0
+    total_astar_length = 0
+    total_hpa_length = 0
+    for i in range(queries):
+        start = random_free_cell(width, height, blocked)
+        goal = random_free_cell(width, height, blocked | set([start]))
+        sensor_data[SensorData.DRIVE_LOCATIONS] = [list(drive) for drive in drives]
+
+        time_start = time.perf_counter()
+        astar_path = agent.find_shortest_path(start, [goal], sensor_data)
+        astar_time += time.perf_counter() - time_start
+
+        time_start = time.perf_counter()
+        hpa_path = planner.find_path(start, goal, dynamic_blocked=drives)
+        hpa_time += time.perf_counter() - time_start
+        abstract_path = planner.find_abstract_path(start, goal, set(drives)) # length of the full route, not only the refined steps
+
+        if bool(astar_path) != bool(hpa_path):
+            raise Exception(f'{name}: reachability mismatch between A* and the hierarchical planner')
+        for cell, next_cell in zip(hpa_path, hpa_path[1:]):
+            if abs(cell[0] - next_cell[0]) + abs(cell[1] - next_cell[1]) != 1 or next_cell in blocked:
+                raise Exception(f'{name}: invalid step {cell} -> {next_cell}')
+        if astar_path:
+            total_astar_length += len(astar_path) - 1
+            total_hpa_length += sum(abs(a[0] - b[0]) + abs(a[1] - b[1]) for a, b in zip(abstract_path, abstract_path[1:]))
+
+        # Every drive takes one random step and one pod is carried a step, then the planner is told about the pod
+        occupied_now = set(blocked)
+        for j, (x, y) in enumerate(drives):
+            dx, dy = random.choice(NEIGHBOUR_OFFSETS)
+            new_cell = (x + dx, y + dy)
+            if 0 <= new_cell[0] < width and 0 <= new_cell[1] < height and new_cell not in occupied_now:
+                occupied_now.discard((x, y))
+                occupied_now.add(new_cell)
+                drives[j] = new_cell
+        new_pods = set(pods)
+        x, y = random.choice(sorted(pods))
+        dx, dy = random.choice(NEIGHBOUR_OFFSETS)
+        new_cell = (x + dx, y + dy)
+        if 0 <= new_cell[0] < width and 0 <= new_cell[1] < height and new_cell not in occupied_now:
+            new_pods.discard((x, y))
+            new_pods.add(new_cell)
+        time_start = time.perf_counter()
+        planner.update_cells(get_changed_cells(pods, new_pods))
+        update_time += time.perf_counter() - time_start
+        rebuilt_clusters += planner.rebuilt_clusters
+        pods = new_pods
+        sensor_data[SensorData.REAL_TIME_POD_LOCATIONS] = [list(pod) for pod in pods]
+        blocked = pods | set(drives)
+
+    num_clusters = planner.num_clusters_x * planner.num_clusters_y
+    print(f'{name}: build = {1000 * build_time:.0f} ms | '
+          f'A* = {1000 * astar_time / queries:.2f} ms/query, '
+          f'HPA* = {1000 * hpa_time / queries:.2f} ms/query ({astar_time / hpa_time:.1f}x faster), '
+          f'route {100 * (total_hpa_length / max(total_astar_length, 1) - 1):.1f}% longer than A* | '
+          f'pod update = {1000 * update_time / queries:.2f} ms/turn, {rebuilt_clusters / queries:.1f} of {num_clusters} clusters rebuilt')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--queries', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    for scenario in SCENARIOS:
+        random.seed(args.seed)
+        run_scenario(*scenario, queries=args.queries)
@@ -0,0 +1,100 @@
+# Compares per-turn planning cost of the incremental DStarLitePlanner against planning from scratch with
+# YourAgent.find_shortest_path (GridSearch A*), while AI-like drives random walk around the field.
+# Run from the top level directory of the project: python3 -m benchmarks.replanning_benchmark
+import argparse
+import random
+import time
+from src.Constants import SensorData
+from src.DStarLitePlanner import DStarLitePlanner, get_changed_cells
+from src.YourAgent import YourAgent
+
+# name, field width, field height, moving drives, static pods
+SCENARIOS = [
+    ('Level 3 field (30x20, 5 AI drives)', 30, 20, 5, 2),
+    ('Level 4 field (30x20, 5 pods)', 30, 20, 0, 5),
+    ('Stress 100x100 (100 drives, 500 pods)', 100, 100, 100, 500),
+    ('Stress 250x250 (400 drives, 3000 pods)', 250, 250, 400, 3000),
+]
+
+NEIGHBOUR_OFFSETS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+
+def random_free_cell(width, height, occupied):
+    cell = (random.randrange(width), random.randrange(height))
+    while cell in occupied:
+        cell = (random.randrange(width), random.randrange(height))
+    return cell
+
+
+def run_scenario(name, width, height, num_drives, num_pods, turns):
+    start = (0, 0)
+    goal = (width - 1, height - 1)
+    occupied = set([start, goal])
+    pods = set()
+    for i in range(num_pods):
+        pods.add(random_free_cell(width, height, occupied | pods))
+    drives = []
+    for i in range(num_drives):
+        drives.append(random_free_cell(width, height, occupied | pods | set(drives)))
+
+    # The planning drive carries a pod, so other pods are obstacles like in the hardest case for YourAgent
+    agent = YourAgent(0)
+    sensor_data = {
+        SensorData.FIELD_DIMENSIONS: [width, height],
+        SensorData.DRIVE_LIFTED_POD_PAIRS: [[0, 0]],
+        SensorData.REAL_TIME_POD_LOCATIONS: [list(pod) for pod in pods],
+    }
+    blocked = pods | set(drives)
+    planner = DStarLitePlanner(width, height, goal, blocked)
+
+    astar_time = 0
+    dstar_time = 0
+    planned_turns = 0
+    for turn in range(turns):
+        if start == goal:
+            break
+        sensor_data[SensorData.DRIVE_LOCATIONS] = [list(drive) for drive in drives]
+        new_blocked = pods | set(drives)
+        changed_cells = get_changed_cells(blocked, new_blocked)
+        blocked = new_blocked
+
+        time_start = time.perf_counter()
+        astar_path = agent.find_shortest_path(start, [goal], sensor_data)
+        astar_time += time.perf_counter() - time_start
+
+        time_start = time.perf_counter()
+        next_step = planner.get_next_step(start, changed_cells)
+        dstar_time += time.perf_counter() - time_start
+        planned_turns += 1
+
+        dstar_path = planner.get_path(start)
+        if len(astar_path) != len(dstar_path):
+            raise Exception(f'{name}: path length mismatch on turn {turn}, A* = {len(astar_path)}, D* Lite = {len(dstar_path)}')
+
+        # Player moves first, then every drive takes one random step unless it is blocked
+        if next_step is not None and next_step not in blocked:
+            start = next_step
+        occupied_now = set(drives) | pods | set([start])
+        for i, (x, y) in enumerate(drives):
+            dx, dy = random.choice(NEIGHBOUR_OFFSETS)
+            new_cell = (x + dx, y + dy)
+            if 0 <= new_cell[0] < width and 0 <= new_cell[1] < height and new_cell not in occupied_now and new_cell != goal:
+                occupied_now.discard((x, y))
+                occupied_now.add(new_cell)
+                drives[i] = new_cell
+
+    print(f'{name}: {planned_turns} turns, '
+          f'GridSearch A* from scratch = {1000 * astar_time / planned_turns:.3f} ms/turn, '
+          f'D* Lite = {1000 * dstar_time / planned_turns:.3f} ms/turn '
+          f'({planner.expansions} expansions in total), '
+          f'speedup = {astar_time / dstar_time:.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--turns', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    for scenario in SCENARIOS:
+        random.seed(args.seed)
+        run_scenario(*scenario, turns=args.turns)
@@ -0,0 +1,78 @@
+# Measures how long a fresh Python process takes to get going, and checks that the simulation core never loads pygame.
+# Every run starts a new interpreter, so import and initialisation costs are counted each time like they are for
+# main.py or a worker process. Headless scenarios report "pygame loaded: yes" if a change pulls pygame back in.
+# Run from the top level directory of the project: python3 -m benchmarks.startup_benchmark
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Each scenario is run as a script in a new process. It must leave its result in `result`
+CORE_IMPORTS = '''
+from src.Field import Field
+from src.GameLevel import GameLevel
+from src.YourAgent import YourAgent
+from src.DfsSolverAgent import DfsSolverAgent
+from src.MonteCarloAgent import MonteCarloAgent
+from src.ScoreUtils import get_best_agents_and_score_aggregations
+'''
+
+HEADLESS_GAME = '''
+import contextlib, io, random
+from src.GameConfig import GAME_LEVELS
+from src.GameSimulationOrchestrator import GameSimulationOrchestrator
+from src.YourAgent import YourAgent
+random.seed(1)
+with contextlib.redirect_stdout(io.StringIO()):
+    GameSimulationOrchestrator(YourAgent, GAME_LEVELS[0], render=False).run_game()
+'''
+
+FIRST_FRAME = '''
+import random
+from src.GameConfig import GAME_LEVELS
+from src.GameSimulationOrchestrator import GameSimulationOrchestrator
+from src.YourAgent import YourAgent
+random.seed(1)
+GameSimulationOrchestrator(YourAgent, GAME_LEVELS[0]).game_window.draw(0)
+'''
+
+# name, script, whether the scenario is allowed to load pygame
+SCENARIOS = [
+    ('Import simulation core (Field, GameLevel, agents, scoring)', CORE_IMPORTS, False),
+    ('Headless game (Level 3, YourAgent)', HEADLESS_GAME, False),
+    ('Rendered game up to the first frame', FIRST_FRAME, True),
+]
+
+RUNNER = '''
+import sys, time
+start = time.perf_counter()
+exec(compile(sys.argv[1], 'scenario', 'exec'))
+elapsed = time.perf_counter() - start
+print('RESULT', __import__('json').dumps({'elapsed': elapsed, 'pygame': 'pygame' in sys.modules}))
+'''
+
+
+def run_once(script):
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    output = subprocess.run([sys.executable, '-c', RUNNER, script], capture_output=True, text=True, env=env, check=True).stdout
+    result_line = next(line for line in output.splitlines() if line.startswith('RESULT '))
+    return json.loads(result_line[len('RESULT '):])
+
+
+def run_scenario(name, script, may_load_pygame, runs):
+    results = [run_once(script) for i in range(runs)]
+    elapsed_ms = [1000 * result['elapsed'] for result in results]
+    loads_pygame = any(result['pygame'] for result in results)
+    warning = ' <- should not load pygame' if loads_pygame and not may_load_pygame else ''
+    print(f'{name}: median = {statistics.median(elapsed_ms):.1f} ms, min = {min(elapsed_ms):.1f} ms, '
+          f'pygame loaded: {"yes" if loads_pygame else "no"}{warning}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    for scenario in SCENARIOS:
+        run_scenario(*scenario, runs=args.runs)
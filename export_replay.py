@@ -0,0 +1,21 @@
+# Renders recorded games (see RECORDINGS_DIR in main.py) to animated GIFs or PNG sequences, without a window and
+# much faster than real time. Example: python3 export_replay.py recordings/*.replay --output-dir replays
+import argparse
+import time
+from src.ReplayExporter import export_replays, GIF_FORMAT, PNG_FORMAT
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('recordings', nargs='+', help='recording files written by GameRecording')
+    parser.add_argument('--output-dir', default='replays')
+    parser.add_argument('--format', choices=[GIF_FORMAT, PNG_FORMAT], default=GIF_FORMAT)
+    parser.add_argument('--fps', type=float, default=10)
+    parser.add_argument('--scale', type=float, default=1.0, help='size of the frames relative to the game window')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes, defaults to the number of CPUs')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    outputs = export_replays(args.recordings, args.output_dir, args.format, args.fps, args.scale, args.workers)
+    for output in outputs:
+        print(f'Saved {output}')
+    print(f'Exported {len(outputs)} replays in {time.perf_counter() - start:.1f}s')
@@ -1,15 +1,17 @@
+import argparse
+import contextlib
 import json
+import os
 import random
+import re
 import traceback
 from importlib import import_module
 
-# Initialize pygame library
-import pygame
-pygame.init()
-
 from src.GameConfig import GAME_LEVELS
 from src.GameSimulationOrchestrator import GameSimulationOrchestrator
-from src.ScoreUtils import get_best_agents_and_score_aggregations, show_end_screen
+from src.PhaseProfiler import PhaseProfiler, SETUP
+from src.Telemetry import Telemetry, TELEMETRY_VERBOSITY_NAMES, get_telemetry_writer
+from src.ScoreUtils import get_best_agents_and_score_aggregations
 
 def get_agent_class_from_str(class_str):
     try:
@@ -22,13 +24,41 @@ def get_agent_class_from_str(class_str):
 
 RANDOM_SEED = 1
 
-agent_class_string_list = []
-with open('player_agents_list.txt', 'r') as f:
-    for line in f:
-        agent_class_string_list.append(line.rstrip())
+# Where --profile writes the collapsed stacks of every level, for flame graph tools
+PROFILE_OUTPUT_FILE = 'profile.folded'
+
+# Set to a directory to save a recording of every game played, export them with export_replay.py
+RECORDINGS_DIR = None
+
+# Set to a directory to save a compact binary replay of every game played, open them with src.BinaryReplay
+REPLAYS_DIR = None
+
+def get_game_file_path(directory, agent_class_str, level, extension):
+    if directory is None:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    file_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', f'{agent_class_str}-{level.name}'.strip())
+    return os.path.join(directory, f'{file_name}{extension}')
+
+def get_recording_path(agent_class_str, level):
+    return get_game_file_path(RECORDINGS_DIR, agent_class_str, level, '.replay')
 
-agent_results_dict = {}
-for agent_class_str in agent_class_string_list:
+def get_replay_path(agent_class_str, level):
+    return get_game_file_path(REPLAYS_DIR, agent_class_str, level, '.binreplay')
+
+def play_level(agent_class_str, level, profiler=None, telemetry=None):
+    setup = profiler.phase(SETUP) if profiler is not None else contextlib.nullcontext()
+    with setup:
+        simulator = GameSimulationOrchestrator(get_agent_class_from_str(agent_class_str), level,
+                                               recording_path=get_recording_path(agent_class_str, level),
+                                               replay_path=get_replay_path(agent_class_str, level),
+                                               random_seed=RANDOM_SEED, profiler=profiler, telemetry=telemetry)
+    return simulator.run_game()
+
+def run_agent_levels(agent_class_str, profiler=None, telemetry=None):
+    """Plays the levels in order until one fails, returns {level name: score or failure}.
+    With a PhaseProfiler the time of each level is broken down into phases, with a Telemetry the events of every level
+    are recorded in it"""
     print(f'Starting simulator for agent = {agent_class_str}, with random seed = {RANDOM_SEED}')
     print("------ Press Ctrl-C in this terminal to force close the game ------")
     score_dict = {}
@@ -40,8 +70,11 @@ for agent_class_str in agent_class_string_list:
 
             score = -1
             try:
-                simulator = GameSimulationOrchestrator(get_agent_class_from_str(agent_class_str), level)
-                score = simulator.run_game()
+                if profiler is None:
+                    score = play_level(agent_class_str, level, telemetry=telemetry)
+                else:
+                    with profiler.level(agent_class_str, level.name):
+                        score = play_level(agent_class_str, level, profiler, telemetry)
             except Exception as e:
                 print(f'Failed to run simulator for agent: {agent_class_str}. Exception: {e}')
                 print(traceback.format_exc())
@@ -53,26 +86,94 @@ for agent_class_str in agent_class_string_list:
                 score_dict[level.name] = score
         else:
             score_dict[level.name] = 'Level Not Attempted'
+    return score_dict
 
-    print(f'Results for agent = {agent_class_str}: {score_dict}')
-    agent_results_dict[agent_class_str] = score_dict
+def run_agents_on_dashboard(agent_class_string_list):
+    """Plays every level of every agent at once on a MosaicDashboard, returns {agent: {level name: score or failure}}"""
+    from src.MosaicDashboard import run_games_on_dashboard
 
-print(f'Simulation complete, results: {json.dumps(agent_results_dict, indent=2)}')
+    games = [(agent_class_str, level, RANDOM_SEED) for agent_class_str in agent_class_string_list for level in GAME_LEVELS]
+    scores = iter(run_games_on_dashboard(games))
+    agent_results_dict = {}
+    for agent_class_str in agent_class_string_list:
+        # Levels after a failed one count as not attempted, like in run_agent_levels
+        score_dict = {}
+        has_failed = False
+        for level in GAME_LEVELS:
+            score = next(scores)
+            if has_failed:
+                score_dict[level.name] = 'Level Not Attempted'
+            elif score == -1:
+                has_failed = True
+                score_dict[level.name] = 'Level Failed'
+            else:
+                score_dict[level.name] = score
+        agent_results_dict[agent_class_str] = score_dict
+    return agent_results_dict
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--dashboard', action='store_true', help='play all the games at once, tiled in one window')
+    parser.add_argument('--profile', action='store_true',
+                        help=f'break the time of each level down by turn phase, collapsed stacks go to {PROFILE_OUTPUT_FILE}')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='like --profile, and also trace the peak memory of each phase (much slower)')
+    parser.add_argument('--telemetry', metavar='PATH',
+                        help='record game events to PATH, as JSON lines if it ends in .jsonl, else as column files in a directory')
+    parser.add_argument('--telemetry-verbosity', choices=list(TELEMETRY_VERBOSITY_NAMES)[1:], default='turns',
+                        help='events: pods and crashes, turns: also decision latency and turn duration, moves: also every move')
+    args = parser.parse_args()
+    profiler = None
+    if args.profile or args.profile_memory:
+        if args.dashboard:
+            parser.error('--profile cannot be used with --dashboard, the games run in other processes')
+        profiler = PhaseProfiler(trace_memory=args.profile_memory)
+    telemetry = None
+    if args.telemetry is not None:
+        if args.dashboard:
+            parser.error('--telemetry cannot be used with --dashboard, the games run in other processes')
+        telemetry = Telemetry(TELEMETRY_VERBOSITY_NAMES[args.telemetry_verbosity], get_telemetry_writer(args.telemetry))
+
+    agent_class_string_list = []
+    with open('player_agents_list.txt', 'r') as f:
+        for line in f:
+            agent_class_string_list.append(line.rstrip())
 
-try:
-    winning_agents, winning_agents_scores = get_best_agents_and_score_aggregations(agent_results_dict)
-except ValueError:
-    print('FAILED level 1. See errors above ^ or try adding some debug logs to figure out what went wrong :)')
-    exit(1)
-print(f'\nBest agents = {winning_agents}')
-show_end_screen(winning_agents_scores)
+    if args.dashboard:
+        agent_results_dict = run_agents_on_dashboard(agent_class_string_list)
+    else:
+        agent_results_dict = {}
+        for agent_class_str in agent_class_string_list:
+            score_dict = run_agent_levels(agent_class_str, profiler, telemetry)
+            print(f'Results for agent = {agent_class_str}: {score_dict}')
+            agent_results_dict[agent_class_str] = score_dict
+
+    if telemetry is not None:
+        telemetry.close()
+        print(f'Telemetry saved to {args.telemetry}')
+    if profiler is not None:
+        profiler.print_report()
+        profiler.write_collapsed_stacks(PROFILE_OUTPUT_FILE)
+        print(f'Collapsed stacks saved to {PROFILE_OUTPUT_FILE}, open them with https://www.speedscope.app or flamegraph.pl')
+
+    print(f'Simulation complete, results: {json.dumps(agent_results_dict, indent=2)}')
+
+    try:
+        winning_agents, winning_agents_scores = get_best_agents_and_score_aggregations(agent_results_dict)
+    except ValueError:
+        print('FAILED level 1. See errors above ^ or try adding some debug logs to figure out what went wrong :)')
+        exit(1)
+    print(f'\nBest agents = {winning_agents}')
+    # Imported here, the results screen loads pygame and importing main should not
+    from src.ResultsScreen import show_end_screen
+    show_end_screen(winning_agents_scores)
 
-full_output_file_name = 'full_results.json'
-with open(full_output_file_name, 'w') as output_file:
-    json.dump(agent_results_dict, output_file)
-    print(f'full results saved to {full_output_file_name}')
+    full_output_file_name = 'full_results.json'
+    with open(full_output_file_name, 'w') as output_file:
+        json.dump(agent_results_dict, output_file)
+        print(f'full results saved to {full_output_file_name}')
 
-winner_output_file_name = 'winners_results.json'
-with open(winner_output_file_name, 'w') as output_file:
-    json.dump(winning_agents_scores, output_file)
-    print(f'full results saved to {winner_output_file_name}')
+    winner_output_file_name = 'winners_results.json'
+    with open(winner_output_file_name, 'w') as output_file:
+        json.dump(winning_agents_scores, output_file)
+        print(f'full results saved to {winner_output_file_name}')
@@ -0,0 +1,208 @@
+import asyncio
+import concurrent.futures
+import inspect
+import time
+import traceback
+from src.Constants import DriveMove
+from src.GameConfig import END_SCREEN_WAIT_TIME_SEC, FPS_LIMIT, MAX_MOVES_PER_ROUND, AGENT_DECISION_DEADLINE_SEC
+from src.GameSimulationOrchestrator import GameSimulationOrchestrator
+from src.FrameState import VICTORY_SCREEN, LOSS_SCREEN
+
+
+class AsyncGameSimulationOrchestrator(GameSimulationOrchestrator):
+    # asyncio variant of GameSimulationOrchestrator.
+    # Agents may implement get_next_move / get_next_moves as plain functions or as `async def`. The decisions of the
+    # player and every AI drive are gathered concurrently each turn under AGENT_DECISION_DEADLINE_SEC. Rendering and
+    # telemetry run as separate tasks, the simulation step only hands them the latest state and never waits on them.
+    # A plain player agent runs on a worker thread so the deadline applies to it as well. A thread cannot be stopped,
+    # so when the agent misses the deadline its call keeps running and the next turn waits for it under its own
+    # deadline, instead of asking again. A decision is played on the turn it arrives in, even though it was made from
+    # the state of the turn the agent missed (only AI drives have moved since). Missed turns are DriveMove.NONE.
+
+    def __init__(self, drive_agent, level, telemetry_sink=None, render=True, render_process=False, recording_path=None,
+                 frame_listeners=None, replay_path=None, random_seed=None, profiler=None, telemetry=None):
+        super().__init__(drive_agent, level, render, render_process, recording_path, frame_listeners, replay_path, random_seed,
+                         profiler, telemetry)
+        # Optional callable, called with one dict per turn from the telemetry task. Unlike telemetry (src/Telemetry.py)
+        # it gets the moves of every turn as soon as they are played, for live consumers
+        self.telemetry_sink = telemetry_sink
+        player_agent = self.player_drive if self.fleet_agent is None else self.fleet_agent
+        self.is_player_async = inspect.iscoroutinefunction(
+            player_agent.get_next_move if self.fleet_agent is None else player_agent.get_next_moves)
+        self.player_executor = None # worker thread of a plain player agent, created when the game starts
+        self.player_call = None # concurrent.futures.Future of a plain player agent's decision that was not played yet
+
+    def run_game(self):
+        return asyncio.run(self.run_game_async())
+
+    async def decide(self, decide_fn, sensor_data):
+        decision = decide_fn(sensor_data)
+        if inspect.isawaitable(decision):
+            decision = await decision
+        return decision
+
+    async def decide_in_thread(self, sensor_data):
+        # A decision the agent missed an earlier deadline with is waited for again, the agent is only asked about this
+        # turn once it has been played
+        if self.player_call is None:
+            self.player_call = self.player_executor.submit(self.request_player_decision, sensor_data)
+        return await asyncio.wrap_future(self.player_call)
+
+    async def gather_decisions(self):
+        """Gather this turn's player and AI decisions concurrently. Returns (player_decision, {ai_drive: DriveMove})"""
+        # AI drives decide from the state at the start of the turn, their moves are still applied after the player's.
+        # Their tasks are started first, so plain AI drives have drawn their random numbers before a plain player agent
+        # starts on its thread, and seeded games play the same way every run
+        ai_tasks = {}
+        for ai_drive in self.ai_drive_list:
+            ai_tasks[ai_drive] = asyncio.ensure_future(self.decide(ai_drive.get_next_move, self.field.generate_sensor_data_for_drive(ai_drive)))
+        player_sensor_data = self.generate_player_sensor_data()
+        if self.is_player_async:
+            player_task = asyncio.ensure_future(self.decide(self.request_player_decision, player_sensor_data))
+        else:
+            player_task = asyncio.ensure_future(self.decide_in_thread(player_sensor_data))
+
+        done, pending = await asyncio.wait([player_task] + list(ai_tasks.values()), timeout=AGENT_DECISION_DEADLINE_SEC)
+        for task in pending:
+            task.cancel()
+
+        if player_task in done:
+            player_decision = player_task.result()
+            self.player_call = None
+        else:
+            print(f'Player missed the decision deadline of {AGENT_DECISION_DEADLINE_SEC}s, skipping turn')
+            player_decision = {} if self.fleet_agent is not None else DriveMove.NONE
+
+        ai_moves = {}
+        for ai_drive, task in ai_tasks.items():
+            ai_moves[ai_drive] = task.result() if task in done else DriveMove.NONE
+        return player_decision, ai_moves
+
+    async def render_loop(self):
+        # Draws the most recently published turn, at most FPS_LIMIT frames per second
+        while True:
+            await self.frame_ready.wait()
+            self.frame_ready.clear()
+            self.draw_frame()
+            await asyncio.sleep(1 / FPS_LIMIT)
+
+    def draw_frame(self):
+        if self.game_window is not None:
+            self.game_window.handle_events()
+            self.game_window.draw(self.frame_score)
+
+    async def telemetry_loop(self):
+        while True:
+            record = await self.telemetry_queue.get()
+            try:
+                self.telemetry_sink(record)
+            except Exception as e:
+                print(f'Telemetry sink failed. Exception: {e}')
+            self.telemetry_queue.task_done()
+
+    async def run_game_async(self):
+        self.frame_ready = asyncio.Event()
+        self.frame_score = 0
+        background_tasks = []
+        if self.game_window is not None:
+            background_tasks.append(asyncio.ensure_future(self.render_loop()))
+        if self.telemetry_sink is not None:
+            self.telemetry_queue = asyncio.Queue()
+            background_tasks.append(asyncio.ensure_future(self.telemetry_loop()))
+
+        if not self.is_player_async:
+            self.player_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        try:
+            score = await self.simulate()
+        finally:
+            if self.player_executor is not None:
+                self.player_executor.shutdown(wait=False)
+            for task in background_tasks:
+                task.cancel()
+            await asyncio.gather(*background_tasks, return_exceptions=True)
+
+        if score != -1:
+            print(f'VICTORY, Score = {score}')
+            if self.game_window is not None:
+                self.game_window.show_victory_screen(score)
+            self.close_frame_listeners(VICTORY_SCREEN, score)
+        else:
+            print(f'GAME OVER, Score = {self.frame_score}')
+            if self.game_window is not None:
+                self.game_window.show_loss_screen(self.frame_score)
+            self.close_frame_listeners(LOSS_SCREEN, self.frame_score)
+        if self.game_window is not None:
+            await asyncio.sleep(END_SCREEN_WAIT_TIME_SEC)
+        return score
+
+    async def simulate(self):
+        score = 0
+        turn = 0
+
+        while True:
+            turn_start = time.perf_counter()
+
+            try:
+                player_decision, ai_moves = await self.gather_decisions()
+            except Exception as e:
+                print(f'Failed to get next move from player. Exception: {e}')
+                print(traceback.format_exc())
+                return -1
+            decision_time = time.perf_counter() - turn_start
+
+            player_moves = self.build_player_moves(player_decision)
+            if player_moves is None:
+                return -1
+            valid_move = self.process_player_moves(player_moves)
+
+            if valid_move:
+                score += len(player_moves) # counter increments once per turn for each player drive
+                for ai_drive, ai_move in ai_moves.items():
+                    self.field.process_move_for_drive(ai_move, ai_drive)
+
+            self.field.advance_turn()
+            self.record_turn(player_moves, list(ai_moves.values()) if valid_move else None, score)
+
+            # Hand the new state to the render and telemetry tasks without waiting on them
+            self.frame_score = score
+            self.frame_ready.set()
+            self.publish_frame(score)
+            if self.telemetry.turns_enabled:
+                self.record_turn_telemetry(decision_time, time.perf_counter() - turn_start)
+            if self.telemetry_sink is not None:
+                self.telemetry_queue.put_nowait({
+                    'turn': turn,
+                    'score': score,
+                    'decision_time_sec': decision_time,
+                    'player_moves': {self.get_game_id(drive): move.name for drive, move in player_moves.items()},
+                    'valid_move': valid_move
+                })
+            turn += 1
+
+            if self.field.is_winning_condition():
+                self.draw_frame()
+                await self.flush_telemetry()
+                return score
+
+            if not valid_move:
+                print(f'Player colided with another drive or left the field! Crashed drive ids = {self.crashed_drive_ids}. Game Over')
+                self.draw_frame()
+                await self.flush_telemetry()
+                return -1
+
+            # The limit is on turns, a fleet's score grows by one per drive each turn and is only the cost
+            if turn >= MAX_MOVES_PER_ROUND:
+                print(f'Maximum moves reached: {MAX_MOVES_PER_ROUND}. Ending the round with a failing score')
+                await self.flush_telemetry()
+                return -1
+
+            # Wait remaining time such that the turn rate does not exceed FPS_LIMIT, other tasks run meanwhile.
+            # Headless games only yield to the other tasks
+            if self.game_window is not None:
+                await asyncio.sleep(max(0, 1 / FPS_LIMIT - (time.perf_counter() - turn_start)))
+            else:
+                await asyncio.sleep(0)
+
+    async def flush_telemetry(self):
+        if self.telemetry_sink is not None:
+            await self.telemetry_queue.join()
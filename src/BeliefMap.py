@@ -0,0 +1,91 @@
+from array import array
+from src.Constants import SensorData, CellBelief
+
+# Bit flags stored per cell in BeliefMap.cell_contents
+DRIVE_SEEN = 1
+POD_SEEN = 2
+
+
+class BeliefMap:
+    # Persistent world model for levels with a limited sensor range (GameLevel.sensor_range > 0).
+    # Call update(sensor_data) once per turn. Every cell inside the sensor window is marked as seen this turn and its
+    # contents are overwritten with what the sensors report, cells outside the window keep their last observation.
+    # Work per update is proportional to the sensor window, and all queries are O(1).
+
+    def __init__(self, field_grid_width, field_grid_height, sensor_range):
+        self.field_grid_width = field_grid_width
+        self.field_grid_height = field_grid_height
+        self.sensor_range = sensor_range
+        self.turn = -1
+        # Flat per-cell arrays, index = x * field_grid_height + y
+        self.last_seen_turns = array('i', [-1]) * (field_grid_width * field_grid_height)
+        self.cell_contents = bytearray(field_grid_width * field_grid_height)
+        self.pod_sightings = {} # key = pod id, val = (turn last seen, [x, y] where it was seen)
+
+    @classmethod
+    def from_sensor_data(cls, sensor_data):
+        field_grid_width, field_grid_height = sensor_data[SensorData.FIELD_DIMENSIONS]
+        return cls(field_grid_width, field_grid_height, sensor_data[SensorData.SENSOR_RANGE])
+
+    def update(self, sensor_data):
+        """Merge one turn of (filtered) sensor data into the map"""
+        self.turn += 1
+        sensor_locations = [sensor_data[SensorData.PLAYER_LOCATION]]
+        if SensorData.FLEET_LOCATIONS in sensor_data:
+            sensor_locations = list(sensor_data[SensorData.FLEET_LOCATIONS].values())
+
+        # Everything in the sensor window is observed free unless it is reported below
+        for location in sensor_locations:
+            self.clear_window(location[0], location[1])
+
+        for x, y in sensor_data[SensorData.DRIVE_LOCATIONS]:
+            if self.is_in_field(x, y):
+                self.mark_seen(x, y, DRIVE_SEEN)
+        for x, y in sensor_data[SensorData.REAL_TIME_POD_LOCATIONS]:
+            if self.is_in_field(x, y):
+                self.mark_seen(x, y, POD_SEEN)
+        for pod_id, location in sensor_data[SensorData.POD_LOCATIONS_BY_ID].items():
+            self.pod_sightings[pod_id] = (self.turn, location)
+
+    def clear_window(self, center_x, center_y):
+        # Unlimited sensor range means the window is the whole field
+        sensor_range = self.sensor_range if self.sensor_range > 0 else self.field_grid_width + self.field_grid_height
+        for x in range(max(0, center_x - sensor_range), min(self.field_grid_width, center_x + sensor_range + 1)):
+            reach = sensor_range - abs(x - center_x)
+            start = x * self.field_grid_height
+            for index in range(start + max(0, center_y - reach), start + min(self.field_grid_height - 1, center_y + reach) + 1):
+                self.last_seen_turns[index] = self.turn
+                self.cell_contents[index] = 0
+
+    def mark_seen(self, x, y, content_flag):
+        index = x * self.field_grid_height + y
+        self.last_seen_turns[index] = self.turn
+        self.cell_contents[index] |= content_flag
+
+    def is_in_field(self, x, y):
+        return 0 <= x < self.field_grid_width and 0 <= y < self.field_grid_height
+
+    def get_cell_belief(self, cell):
+        """CellBelief.UNKNOWN, KNOWN_FREE or LAST_SEEN_OCCUPIED (by a drive or a pod) for an [x, y] cell"""
+        if not self.is_in_field(cell[0], cell[1]):
+            return CellBelief.LAST_SEEN_OCCUPIED # Field boundaries are always blocked
+        index = cell[0] * self.field_grid_height + cell[1]
+        if self.last_seen_turns[index] == -1:
+            return CellBelief.UNKNOWN
+        if self.cell_contents[index]:
+            return CellBelief.LAST_SEEN_OCCUPIED
+        return CellBelief.KNOWN_FREE
+
+    def get_last_seen_turn(self, cell):
+        """Turn the cell was last observed on, counted in BeliefMap.update calls from 0. -1 if never seen"""
+        return self.last_seen_turns[cell[0] * self.field_grid_height + cell[1]]
+
+    def was_drive_last_seen_at(self, cell):
+        return bool(self.cell_contents[cell[0] * self.field_grid_height + cell[1]] & DRIVE_SEEN)
+
+    def was_pod_last_seen_at(self, cell):
+        return bool(self.cell_contents[cell[0] * self.field_grid_height + cell[1]] & POD_SEEN)
+
+    def get_pod_sighting(self, pod_id):
+        """(turn last seen, [x, y]) for a pod, None if it has never been seen"""
+        return self.pod_sightings.get(pod_id)
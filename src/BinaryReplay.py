@@ -0,0 +1,255 @@
+import mmap
+import struct
+from src.AIDrive import AIDrive
+from src.Constants import DriveMove, Heading
+from src.Field import Field
+from src.FleetDrive import FleetDrive
+from src.FrameState import VICTORY_SCREEN
+from src.GameConfig import REPLAY_KEYFRAME_INTERVAL
+from src.Pod import Pod
+
+REPLAY_MAGIC = b'ARREPLAY'
+REPLAY_FORMAT_VERSION = 1
+
+# magic, version, field width, field height, player drives, AI drives, pods, goals, sensor range, keyframe interval,
+# random seed (-1 if unknown), turns, final score, outcome, level name length, agent name length
+HEADER_STRUCT = struct.Struct('<8sHBBBBBBhHqIiBHH')
+# Offset of turns, final score and outcome in the header, they are written when the game ends
+HEADER_RESULT_OFFSET = 28
+HEADER_RESULT_STRUCT = struct.Struct('<IiB')
+
+# Outcome of the game stored in the header, unfinished if the replay was never closed
+OUTCOME_UNFINISHED = 0
+OUTCOME_WIN = 1
+OUTCOME_LOSS = 2
+
+NO_POD = 0xFF # carried pod index of a drive without a pod, and target goal coordinates of a pod without one
+
+HEADINGS = list(Heading) # heading code = index in this list
+
+
+def pack_moves(moves):
+    """DriveMove values packed two per byte, low nibble first"""
+    codes = [move.value for move in moves]
+    if len(codes) % 2:
+        codes.append(0)
+    return bytes(codes[i] | (codes[i + 1] << 4) for i in range(0, len(codes), 2))
+
+def unpack_moves(packed, num_moves):
+    return [DriveMove((packed[i // 2] >> (4 * (i % 2))) & 0xF) for i in range(num_moves)]
+
+
+class BinaryReplayLayout:
+    # Sizes and offsets shared by the writer and the reader.
+    # After the header the file is a sequence of blocks of the same size. Block b starts with a keyframe, the whole
+    # game state before turn b * keyframe_interval, followed by the packed moves of the keyframe_interval turns after
+    # it. Every turn and keyframe is therefore at a fixed offset, the last block is only as long as the game was.
+
+    def __init__(self, num_drives, num_pods, keyframe_interval, blocks_offset):
+        self.num_drives = num_drives
+        self.num_pods = num_pods
+        self.keyframe_interval = keyframe_interval
+        self.blocks_offset = blocks_offset
+        self.turn_size = (num_drives + 1) // 2
+        # score, then x, y, heading and carried pod of each drive, then x, y and delivered of each pod
+        self.keyframe_struct = struct.Struct('<I' + 'BBBB' * num_drives + 'BBB' * num_pods)
+        self.block_size = self.keyframe_struct.size + keyframe_interval * self.turn_size
+
+    def get_keyframe_offset(self, block):
+        return self.blocks_offset + block * self.block_size
+
+    def get_turn_offset(self, turn):
+        block, turn_in_block = divmod(turn, self.keyframe_interval)
+        return self.get_keyframe_offset(block) + self.keyframe_struct.size + turn_in_block * self.turn_size
+
+    def get_num_turns(self, file_size):
+        """Turns stored in a file of file_size bytes, for replays that were never closed"""
+        blocks, rest = divmod(file_size - self.blocks_offset, self.block_size)
+        return blocks * self.keyframe_interval + max(0, rest - self.keyframe_struct.size) // self.turn_size
+
+
+def get_keyframe_values(field, drives, pods, score):
+    values = [score]
+    for drive in drives:
+        state = field.drive_states_map[str(drive)]
+        carried_pod = field.drive_pod_pairings_map.get(str(drive))
+        values += [state.x, state.y, HEADINGS.index(field.field_grid[state.x][state.y].drive_heading),
+                   NO_POD if carried_pod is None else pods.index(carried_pod)]
+    for pod in pods:
+        x, y = field.pod_locations_map[str(pod)]
+        values += [x, y, 1 if str(pod) in field.collected_pods else 0]
+    return values
+
+
+class BinaryReplayWriter:
+    # Writes a game as it is played to a compact binary replay (see BinaryReplayLayout): a header with the level, the
+    # seed and the starting scenario, then one 4 bit move code per drive per turn and a keyframe every
+    # keyframe_interval turns. A level 3 game takes about 3.5 bytes per turn, so a million turns fit in a few MB.
+    # The orchestrator creates one for a replay_path and calls record_turn after every turn.
+
+    def __init__(self, path, level, agent_name, field, player_drives, ai_drives, random_seed=None,
+                 keyframe_interval=REPLAY_KEYFRAME_INTERVAL):
+        self.field = field
+        self.drives = list(player_drives) + list(ai_drives)
+        self.num_player_drives = len(player_drives)
+        self.pods = list(field.pods)
+        width, height = len(field.field_grid), len(field.field_grid[0])
+        if max(width, height, len(self.drives), len(self.pods) + 1) > 255:
+            raise Exception('Binary replays support fields, drive counts and pod counts up to 255')
+
+        level_name = level.name.encode()
+        agent_name = agent_name.encode()
+        header = HEADER_STRUCT.pack(
+            REPLAY_MAGIC, REPLAY_FORMAT_VERSION, width, height, len(player_drives), len(ai_drives), len(self.pods),
+            len(field.goal_coords_list), field.sensor_range, keyframe_interval,
+            -1 if random_seed is None else random_seed, 0, 0, OUTCOME_UNFINISHED, len(level_name), len(agent_name)
+        )
+        scenario = bytearray(level_name + agent_name)
+        for x, y in field.goal_coords_list:
+            scenario += bytes([x, y])
+        for pod in self.pods:
+            target_goal = pod.target_goal if pod.target_goal else (NO_POD, NO_POD)
+            scenario += struct.pack('<HBBBB', pod.pod_id, *pod.original_position, *target_goal)
+        for drive in self.drives:
+            scenario += struct.pack('<H', field.drive_to_game_id_map[str(drive)])
+
+        self.layout = BinaryReplayLayout(len(self.drives), len(self.pods), keyframe_interval, len(header) + len(scenario))
+        self.file = open(path, 'wb')
+        self.file.write(header + scenario)
+        self.turn = 0
+        self.write_keyframe(0)
+
+    def write_keyframe(self, score):
+        self.file.write(self.layout.keyframe_struct.pack(*get_keyframe_values(self.field, self.drives, self.pods, score)))
+
+    def record_turn(self, player_moves, ai_moves, score):
+        """Moves of the turn just played, in the order of the drives given to the constructor. ai_moves is None if
+        the AI drives did not move. score is the score after the turn"""
+        if ai_moves is None:
+            ai_moves = [DriveMove.NONE] * (len(self.drives) - self.num_player_drives)
+        self.file.write(pack_moves(list(player_moves) + list(ai_moves)))
+        self.turn += 1
+        if self.turn % self.layout.keyframe_interval == 0:
+            self.write_keyframe(score)
+
+    def close(self, end_screen, score):
+        """Writes the result to the header. Same arguments as a frame listener's close, no end screen counts as a loss"""
+        outcome = OUTCOME_WIN if end_screen == VICTORY_SCREEN else OUTCOME_LOSS
+        self.file.seek(HEADER_RESULT_OFFSET)
+        self.file.write(HEADER_RESULT_STRUCT.pack(self.turn, score, outcome))
+        self.file.close()
+
+
+class BinaryReplay:
+    # Reads a replay written by BinaryReplayWriter through a memory map, so opening one costs nothing however long
+    # the game was and only the parts that are looked at are read from disk.
+    # get_field(turn) rebuilds the field as it was before any turn from the keyframe before it, replaying at most
+    # keyframe_interval turns, and simulate() re-runs the game from the recorded moves without any agent.
+
+    def __init__(self, path):
+        with open(path, 'rb') as replay_file:
+            self.data = mmap.mmap(replay_file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.width, self.height, self.num_player_drives, self.num_ai_drives, num_pods, num_goals,
+         self.sensor_range, keyframe_interval, random_seed, num_turns, self.final_score, self.outcome,
+         level_name_length, agent_name_length) = HEADER_STRUCT.unpack_from(self.data)
+        if magic != REPLAY_MAGIC:
+            raise Exception(f'{path} is not a binary replay')
+        if version != REPLAY_FORMAT_VERSION:
+            raise Exception(f'Replay {path} has format version {version}, expected {REPLAY_FORMAT_VERSION}')
+        self.random_seed = None if random_seed == -1 else random_seed
+
+        offset = HEADER_STRUCT.size
+        self.level_name = self.data[offset:offset + level_name_length].decode()
+        offset += level_name_length
+        self.agent_name = self.data[offset:offset + agent_name_length].decode()
+        offset += agent_name_length
+        self.goals = [tuple(self.data[offset + 2*i:offset + 2*i + 2]) for i in range(num_goals)]
+        offset += 2 * num_goals
+        self.pod_scenario = [] # (pod id, original position, target goal or None)
+        for i in range(num_pods):
+            pod_id, x, y, goal_x, goal_y = struct.unpack_from('<HBBBB', self.data, offset)
+            self.pod_scenario.append((pod_id, (x, y), None if goal_x == NO_POD else (goal_x, goal_y)))
+            offset += 6
+        num_drives = self.num_player_drives + self.num_ai_drives
+        self.drive_game_ids = list(struct.unpack_from(f'<{num_drives}H', self.data, offset))
+        offset += 2 * num_drives
+
+        self.layout = BinaryReplayLayout(num_drives, num_pods, keyframe_interval, offset)
+        self.num_turns = num_turns if self.outcome != OUTCOME_UNFINISHED else self.layout.get_num_turns(len(self.data))
+
+    def close(self):
+        self.data.close()
+
+    def get_turn_moves(self, turn):
+        """(player moves, AI moves) of turn, in drive order"""
+        offset = self.layout.get_turn_offset(turn)
+        moves = unpack_moves(self.data[offset:offset + self.layout.turn_size], self.layout.num_drives)
+        return moves[:self.num_player_drives], moves[self.num_player_drives:]
+
+    def get_field(self, turn):
+        """
+        Field as it was before turn (after turn - 1, turn = num_turns for the end of the game), with its score.
+        Returns (field, player drives, AI drives, score)
+        """
+        if not 0 <= turn <= self.num_turns:
+            raise Exception(f'Turn {turn} is not in the replay, it has {self.num_turns} turns')
+        # The keyframe after the last turn can hold a crashed drive as if it was still on the field, so the end of the
+        # game is always replayed from the keyframe before it
+        block = (turn - 1 if turn == self.num_turns and turn > 0 else turn) // self.layout.keyframe_interval
+        field, player_drives, ai_drives, score = self.build_field_from_keyframe(block)
+        for replayed_turn in range(block * self.layout.keyframe_interval, turn):
+            score = self.play_turn(field, player_drives, ai_drives, replayed_turn, score)[1]
+        return field, player_drives, ai_drives, score
+
+    def build_field_from_keyframe(self, block):
+        values = self.layout.keyframe_struct.unpack_from(self.data, self.layout.get_keyframe_offset(block))
+        field = Field(self.width, self.height)
+        field.set_sensor_range(self.sensor_range)
+        for x, y in self.goals:
+            field.place_goal(x, y)
+
+        pods = []
+        pod_values = values[1 + 4 * self.layout.num_drives:]
+        for i, (pod_id, original_position, target_goal) in enumerate(self.pod_scenario):
+            pod = Pod(pod_id, original_position, target_goal)
+            x, y, delivered = pod_values[3*i:3*i + 3]
+            field.place_pod(pod, x, y)
+            if delivered:
+                field.set_delivered_pod(pod)
+            pods.append(pod)
+
+        drives = []
+        for i, game_id in enumerate(self.drive_game_ids):
+            is_player = i < self.num_player_drives
+            drive = FleetDrive(game_id) if is_player else AIDrive(game_id)
+            x, y, heading, carried_pod = values[1 + 4*i:5 + 4*i]
+            field.place_drive(drive, game_id, x, y, is_player)
+            field.field_grid[x][y].drive_heading = HEADINGS[heading]
+            if carried_pod != NO_POD:
+                field.set_lifted_pod(drive, pods[carried_pod])
+            drives.append(drive)
+        field.current_turn = block * self.layout.keyframe_interval
+        return field, drives[:self.num_player_drives], drives[self.num_player_drives:], values[0]
+
+    def play_turn(self, field, player_drives, ai_drives, turn, score):
+        """Applies the moves of turn like the orchestrator does. Returns (True if no player drive crashed, score)"""
+        player_moves, ai_moves = self.get_turn_moves(turn)
+        valid_move = True
+        for drive, move in zip(player_drives, player_moves):
+            if not field.process_move_for_drive(move, drive):
+                valid_move = False
+        if valid_move:
+            score += len(player_drives)
+            for drive, move in zip(ai_drives, ai_moves):
+                field.process_move_for_drive(move, drive)
+        field.advance_turn()
+        return valid_move, score
+
+    def simulate(self, start_turn=0, end_turn=None):
+        """Re-runs turns [start_turn, end_turn) headless. Yields (turn, field, score) after each turn, the field is
+        the same object every time"""
+        end_turn = self.num_turns if end_turn is None else end_turn
+        field, player_drives, ai_drives, score = self.get_field(start_turn)
+        for turn in range(start_turn, end_turn):
+            score = self.play_turn(field, player_drives, ai_drives, turn, score)[1]
+            yield turn, field, score
@@ -24,6 +24,19 @@ class SensorData(Enum):
     GOAL_LOCATIONS = 'goal_locations'
     DRIVE_LIFTED_POD_PAIRS = 'drive_lifted_pod_pairs'
     POD_TARGET_GOALS = 'pod_target_goals'  # New field for pod-goal assignments
+    FLEET_LOCATIONS = 'fleet_locations'  # Fleet mode only, {drive_id: [x, y]} for every drive in the fleet
+    RESERVATION_TABLE = 'reservation_table'  # ReservationTable shared by all drives, see src/ReservationTable.py
+    AI_OCCUPANCY_FORECAST = 'ai_occupancy_forecast'  # OccupancyForecast for the AI drives, see src/OccupancyForecast.py
+    POD_LOCATIONS_BY_ID = 'pod_locations_by_id'  # {pod_id: [x, y]}
+    FIELD_DIMENSIONS = 'field_dimensions'  # [width, height] of the field, never filtered by sensor range
+    SENSOR_RANGE = 'sensor_range'  # Manhattan sensor range of the level, -1 if everything is visible
+    GOAL_DISTANCE_FIELDS = 'goal_distance_fields'  # {(x, y) goal: GoalDistanceField}, see src/GoalDistanceField.py
+    STATE_HASH = 'state_hash'  # Field.zobrist_hash of the whole game state, None when the sensor range is limited
+
+class CellBelief(Enum):
+    UNKNOWN = 0
+    KNOWN_FREE = 1
+    LAST_SEEN_OCCUPIED = 2
 
 
 MOVE_TO_HEADING_MAP = {
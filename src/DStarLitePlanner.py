@@ -0,0 +1,253 @@
+import heapq
+from src.Constants import DriveMove
+
+
+class DStarLitePlanner:
+    # Incremental shortest path planner (D* Lite, Koenig & Likhachev 2002) for one goal on a 4-connected field grid.
+    # The search runs backwards from the goal, so when a few cells change occupancy only the part of the search those
+    # cells affect is repaired, instead of planning again from scratch like YourAgent.find_shortest_path.
+    #
+    # Usage, once per turn:
+    #     planner = DStarLitePlanner(width, height, goal, blocked_cells)   # first turn only
+    #     move = planner.get_next_move(player_location, changed_cells)     # changed_cells = {(x, y): is_blocked}
+    #
+    # Cells are stored as flat indices, index = x * field_grid_height + y, with flat per-cell lists like GridSearch.
+    # Costs are ints and self.infinity is larger than any path, so a queue key (k1, k2) packs into the single int
+    # k1 * key_span + k2 and a heap entry into key * num_cells + index, the same trick GridSearch uses.
+    # On the level fields a turn is cheaper than GridSearch.astar from scratch, but when hundreds of drives move every
+    # turn the repairs expand about as much as a new search and it is no faster (benchmarks/replanning_benchmark.py).
+
+    def __init__(self, field_grid_width, field_grid_height, goal, blocked_cells=()):
+        self.field_grid_width = field_grid_width
+        self.field_grid_height = field_grid_height
+        num_cells = field_grid_width * field_grid_height
+        self.num_cells = num_cells
+        self.infinity = num_cells + 1 # longer than any path, the cost of a blocked edge
+        self.key_span = 2 * self.infinity + 1 # larger than any k2 = min(g, rhs)
+        self.goal = goal[0] * field_grid_height + goal[1]
+        self.start = self.goal
+        self.start_x, self.start_y = goal[0], goal[1]
+        self.g = [self.infinity] * num_cells
+        self.rhs = [self.infinity] * num_cells
+        self.blocked = bytearray(num_cells)
+        for cell in blocked_cells:
+            if self.is_in_field(cell[0], cell[1]):
+                self.blocked[cell[0] * field_grid_height + cell[1]] = 1
+        self.neighbours = self.build_neighbour_table()
+        self.cell_x = [index // field_grid_height for index in range(num_cells)]
+        self.cell_y = [index % field_grid_height for index in range(num_cells)]
+        self.key_modifier = 0 # k_m in the paper, grows as the start moves so old queue keys stay valid lower bounds
+        self.open_keys = [-1] * num_cells # packed key of each cell in the priority queue, -1 if it is not queued
+        self.queue = [] # heap of packed (key, cell index), entries whose key differs from open_keys are stale
+        self.expansions = 0 # total nodes expanded, used by the benchmarks
+        self.is_initialised = False
+
+        self.rhs[self.goal] = 0
+        self.push(self.goal)
+
+    def is_in_field(self, x, y):
+        return 0 <= x < self.field_grid_width and 0 <= y < self.field_grid_height
+
+    def build_neighbour_table(self):
+        height = self.field_grid_height
+        neighbours = []
+        for x in range(self.field_grid_width):
+            for y in range(height):
+                cell_neighbours = []
+                if y + 1 < height:
+                    cell_neighbours.append(x * height + y + 1)
+                if y > 0:
+                    cell_neighbours.append(x * height + y - 1)
+                if x + 1 < self.field_grid_width:
+                    cell_neighbours.append((x + 1) * height + y)
+                if x > 0:
+                    cell_neighbours.append((x - 1) * height + y)
+                neighbours.append(tuple(cell_neighbours))
+        return neighbours
+
+    def cost(self, cell_a, cell_b):
+        if self.blocked[cell_a] or self.blocked[cell_b]:
+            return self.infinity
+        return 1
+
+    def calculate_key(self, cell):
+        best = min(self.g[cell], self.rhs[cell])
+        heuristic = abs(self.cell_x[cell] - self.start_x) + abs(self.cell_y[cell] - self.start_y)
+        return (best + heuristic + self.key_modifier) * self.key_span + best
+
+    def push(self, cell):
+        key = self.calculate_key(cell)
+        if self.open_keys[cell] != key: # already queued with this key otherwise
+            self.open_keys[cell] = key
+            heapq.heappush(self.queue, key * self.num_cells + cell)
+
+    def update_vertex(self, cell):
+        if self.g[cell] != self.rhs[cell]:
+            self.push(cell)
+        else:
+            self.open_keys[cell] = -1
+
+    def recompute_rhs(self, cell):
+        if cell == self.goal:
+            return
+        if self.blocked[cell]:
+            self.rhs[cell] = self.infinity
+            return
+        best = self.infinity
+        g = self.g
+        blocked = self.blocked
+        for neighbour in self.neighbours[cell]:
+            if not blocked[neighbour] and g[neighbour] + 1 < best:
+                best = g[neighbour] + 1
+        self.rhs[cell] = best
+
+    def compute_shortest_path(self):
+        g = self.g
+        rhs = self.rhs
+        blocked = self.blocked
+        neighbours = self.neighbours
+        open_keys = self.open_keys
+        queue = self.queue
+        num_cells = self.num_cells
+        infinity = self.infinity
+        goal = self.goal
+        start = self.start
+        cell_x = self.cell_x
+        cell_y = self.cell_y
+        start_x = self.start_x
+        start_y = self.start_y
+        key_modifier = self.key_modifier
+        key_span = self.key_span
+        while queue:
+            key_old, cell = divmod(queue[0], num_cells)
+            if open_keys[cell] != key_old:
+                heapq.heappop(queue) # stale entry
+                continue
+            if rhs[start] <= g[start]:
+                best = rhs[start]
+                if key_old >= (best + key_modifier) * key_span + best: # the start's key, its heuristic is 0
+                    break
+            self.expansions += 1
+            best = min(g[cell], rhs[cell])
+            key_new = (best + abs(cell_x[cell] - start_x) + abs(cell_y[cell] - start_y) + key_modifier) * key_span + best
+            if key_old < key_new:
+                open_keys[cell] = key_new
+                heapq.heapreplace(queue, key_new * num_cells + cell)
+            elif g[cell] > rhs[cell]:
+                heapq.heappop(queue)
+                open_keys[cell] = -1
+                g[cell] = rhs[cell]
+                if blocked[cell]:
+                    continue # edges into a blocked cell cost infinity, its neighbours' rhs cannot improve through it
+                value = g[cell] + 1
+                for neighbour in neighbours[cell]:
+                    if neighbour != goal and not blocked[neighbour] and value < rhs[neighbour]:
+                        rhs[neighbour] = value
+                        self.push(neighbour)
+            else:
+                heapq.heappop(queue)
+                open_keys[cell] = -1
+                g_old = g[cell]
+                g[cell] = infinity
+                for neighbour in neighbours[cell]:
+                    if neighbour != goal and not blocked[neighbour] and not blocked[cell] and rhs[neighbour] == g_old + 1:
+                        self.recompute_rhs(neighbour)
+                    self.update_vertex(neighbour)
+                self.recompute_rhs(cell)
+                self.update_vertex(cell)
+
+    def update_start(self, start):
+        new_start = start[0] * self.field_grid_height + start[1]
+        if self.is_initialised:
+            self.key_modifier += abs(start[0] - self.start_x) + abs(start[1] - self.start_y)
+        self.start = new_start
+        self.start_x, self.start_y = start[0], start[1]
+
+    def update_cells(self, changed_cells):
+        """Apply occupancy changes, changed_cells = {(x, y): is_blocked}. Only affected cells are re-queued"""
+        for cell, is_blocked in changed_cells.items():
+            if not self.is_in_field(cell[0], cell[1]):
+                continue
+            index = cell[0] * self.field_grid_height + cell[1]
+            if self.blocked[index] == bool(is_blocked):
+                continue
+            self.blocked[index] = 1 if is_blocked else 0
+            # Only the edges touching the cell changed cost. Blocking it can only hurt neighbours whose best route ran
+            # through it, unblocking it can only give neighbours a shorter route
+            g = self.g
+            rhs = self.rhs
+            route_cost = g[index] + 1
+            for neighbour in self.neighbours[index]:
+                if neighbour == self.goal or self.blocked[neighbour]:
+                    continue
+                if is_blocked and rhs[neighbour] == route_cost:
+                    self.recompute_rhs(neighbour)
+                    self.update_vertex(neighbour)
+                elif not is_blocked and route_cost < rhs[neighbour]:
+                    rhs[neighbour] = route_cost
+                    self.update_vertex(neighbour)
+            self.recompute_rhs(index)
+            self.update_vertex(index)
+
+    def get_next_step(self, start, changed_cells=None):
+        """Next (x, y) cell on a shortest path from start to the goal, None if at the goal or unreachable"""
+        self.update_start(start)
+        if changed_cells:
+            self.update_cells(changed_cells)
+        self.compute_shortest_path()
+        self.is_initialised = True
+
+        if self.start == self.goal or self.rhs[self.start] >= self.infinity:
+            return None
+        best_cell = None
+        best_value = self.infinity
+        for neighbour in self.neighbours[self.start]:
+            value = self.cost(self.start, neighbour) + self.g[neighbour]
+            if value < best_value:
+                best_value = value
+                best_cell = neighbour
+        if best_cell is None:
+            return None
+        return (best_cell // self.field_grid_height, best_cell % self.field_grid_height)
+
+    def get_next_move(self, start, changed_cells=None):
+        """Drop-in replacement for planning with find_shortest_path, returns the DriveMove towards the goal"""
+        next_step = self.get_next_step(start, changed_cells)
+        if next_step is None:
+            return DriveMove.NONE
+        if next_step[0] > start[0]:
+            return DriveMove.RIGHT
+        elif next_step[0] < start[0]:
+            return DriveMove.LEFT
+        elif next_step[1] > start[1]:
+            return DriveMove.UP
+        return DriveMove.DOWN
+
+    def get_path(self, start, max_length=None):
+        """Current shortest path [start, ..., goal] as (x, y) tuples, following the g values without replanning"""
+        height = self.field_grid_height
+        cell = start[0] * height + start[1]
+        path = [(start[0], start[1])]
+        limit = max_length if max_length is not None else len(self.g)
+        while cell != self.goal and len(path) <= limit:
+            best_cell = None
+            best_value = self.infinity
+            for neighbour in self.neighbours[cell]:
+                value = self.cost(cell, neighbour) + self.g[neighbour]
+                if value < best_value:
+                    best_value = value
+                    best_cell = neighbour
+            if best_cell is None:
+                return []
+            cell = best_cell
+            path.append((cell // height, cell % height))
+        return path
+
+
+def get_changed_cells(previous_blocked_cells, blocked_cells):
+    """Occupancy changes between two sets of blocked (x, y) cells, in the format DStarLitePlanner.update_cells takes"""
+    changed_cells = {cell: False for cell in previous_blocked_cells if cell not in blocked_cells}
+    for cell in blocked_cells:
+        if cell not in previous_blocked_cells:
+            changed_cells[cell] = True
+    return changed_cells
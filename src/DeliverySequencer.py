@@ -0,0 +1,189 @@
+import heapq
+import time
+import numpy as np
+
+# Pod counts up to this are ordered exactly with Held-Karp, O(n^2 * 2^n) but vectorised over the subsets with numpy
+MAX_EXACT_PODS = 13
+
+# Time budget for the Or-opt / 2-opt local search used for larger pod counts
+LOCAL_SEARCH_TIME_LIMIT_SEC = 0.02
+
+# Cost of a leg that cannot be driven, large enough that any reachable order is preferred
+UNREACHABLE_COST = 10 ** 6
+
+NEIGHBOUR_OFFSETS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+
+class DeliverySequencer:
+    # Picks the order to deliver pods in so the total number of moves is as small as possible.
+    # Delivering pod j right after pod i costs (empty drive from goal i to pod j) + (carry pod j to goal j) + 2 moves
+    # to lift and drop it, so the order only changes the empty legs and the problem is an open asymmetric TSP.
+    # Carried legs come from one BFS per pod with the other pods as obstacles. An empty drive passes under pods and the
+    # field has no inner walls, so its BFS distance is always the Manhattan distance and is computed as such.
+    # Other drives keep moving, so they are ignored here and left to the path planner.
+
+    def __init__(self, field_grid_width, field_grid_height):
+        self.field_grid_width = field_grid_width
+        self.field_grid_height = field_grid_height
+
+    def plan(self, start, pods):
+        """Best delivery order for pods = [(pod_id, [x, y] pod location, (x, y) target goal), ...] starting from
+        start. Returns (list of pod ids in delivery order, predicted number of moves)"""
+        if not pods:
+            return [], 0
+        start_costs, costs, carry_costs = self.build_cost_matrix(start, pods)
+        if len(pods) <= MAX_EXACT_PODS:
+            order = self.solve_exact(start_costs, costs)
+        else:
+            order = self.solve_local_search(start_costs, costs, carry_costs, LOCAL_SEARCH_TIME_LIMIT_SEC)
+        return [pods[i][0] for i in order], self.get_order_cost(order, start_costs, costs)
+
+    def build_cost_matrix(self, start, pods):
+        """start_costs[j] = moves to deliver pod j first, costs[i][j] = moves to deliver pod j right after pod i,
+        carry_costs[j] = moves to lift pod j, carry it to its goal and drop it (included in the other two)"""
+        pod_cells = [(location[0], location[1]) for pod_id, location, goal in pods]
+        carry_costs = []
+        for j, (pod_id, location, goal) in enumerate(pods):
+            other_pods = set(pod_cells[:j] + pod_cells[j + 1:])
+            carry_costs.append(self.get_carry_distance(pod_cells[j], goal, other_pods) + 2)
+
+        start_costs = [abs(start[0] - x) + abs(start[1] - y) + carry_costs[j] for j, (x, y) in enumerate(pod_cells)]
+        costs = [
+            [abs(goal[0] - x) + abs(goal[1] - y) + carry_costs[j] if i != j else 0 for j, (x, y) in enumerate(pod_cells)]
+            for i, (pod_id, location, goal) in enumerate(pods)
+        ]
+        return start_costs, costs, carry_costs
+
+    def get_carry_distance(self, pod_cell, goal, obstacles):
+        """Shortest carried distance between the goal and the pod, UNREACHABLE_COST if there is none.
+        A* guided by the Manhattan distance, which is exact unless other pods are in the way"""
+        width = self.field_grid_width
+        height = self.field_grid_height
+        start = (goal[0], goal[1])
+        g_costs = {start: 0}
+        queue = [(abs(start[0] - pod_cell[0]) + abs(start[1] - pod_cell[1]), 0, start)]
+        while queue:
+            f, negative_g, cell = heapq.heappop(queue)
+            if cell == pod_cell:
+                return -negative_g
+            if -negative_g > g_costs[cell]:
+                continue
+            new_g = 1 - negative_g
+            for dx, dy in NEIGHBOUR_OFFSETS:
+                next_cell = (cell[0] + dx, cell[1] + dy)
+                if (0 <= next_cell[0] < width and 0 <= next_cell[1] < height and next_cell not in obstacles
+                        and new_g < g_costs.get(next_cell, new_g + 1)):
+                    g_costs[next_cell] = new_g
+                    heapq.heappush(queue, (new_g + abs(next_cell[0] - pod_cell[0]) + abs(next_cell[1] - pod_cell[1]), -new_g, next_cell))
+        return UNREACHABLE_COST
+
+    def get_order_cost(self, order, start_costs, costs):
+        total = start_costs[order[0]]
+        for i in range(len(order) - 1):
+            total += costs[order[i]][order[i + 1]]
+        return total
+
+    def solve_exact(self, start_costs, costs):
+        """Held-Karp DP, best[mask, j] = cheapest way to deliver the pods in mask ending with pod j.
+        Subsets are processed in order of size and every subset of one size is updated at once"""
+        num_pods = len(start_costs)
+        num_masks = 1 << num_pods
+        cost_matrix = np.array(costs, dtype=np.int64)
+        best = np.full((num_masks, num_pods), UNREACHABLE_COST * (num_pods + 1), dtype=np.int64)
+        parents = np.full((num_masks, num_pods), -1, dtype=np.int64)
+        for j in range(num_pods):
+            best[1 << j, j] = start_costs[j]
+
+        masks = np.arange(num_masks)
+        mask_sizes = np.zeros(num_masks, dtype=np.int64)
+        for j in range(num_pods):
+            mask_sizes += (masks >> j) & 1
+        for size in range(2, num_pods + 1):
+            size_masks = masks[mask_sizes == size]
+            for j in range(num_pods):
+                ending_masks = size_masks[(size_masks >> j) & 1 == 1]
+                previous = best[ending_masks ^ (1 << j)] + cost_matrix[:, j]
+                best_last = previous.argmin(axis=1)
+                best[ending_masks, j] = previous[np.arange(len(ending_masks)), best_last]
+                parents[ending_masks, j] = best_last
+
+        mask = num_masks - 1
+        last = int(best[mask].argmin())
+        order = []
+        while last != -1:
+            order.append(last)
+            previous = int(parents[mask, last])
+            mask ^= 1 << last
+            last = previous
+        order.reverse()
+        return order
+
+    def solve_local_search(self, start_costs, costs, carry_costs, time_limit_sec):
+        """Nearest neighbour order improved with Or-opt and 2-opt moves until no move helps or time runs out.
+        Every move is evaluated in O(1) from the costs of the edges it changes"""
+        num_pods = len(start_costs)
+        deadline = time.perf_counter() + time_limit_sec
+
+        # Nearest neighbour on the empty legs only, the carried leg of a pod costs the same wherever it goes
+        remaining = set(range(num_pods))
+        current = min(remaining, key=lambda j: start_costs[j] - carry_costs[j])
+        order = [current]
+        remaining.remove(current)
+        while remaining:
+            current = min(remaining, key=lambda j: costs[current][j] - carry_costs[j])
+            order.append(current)
+            remaining.remove(current)
+
+        def edge_cost(a, b):
+            # a = -1 is the drive's start, b = -1 is the end of the order, which costs nothing to reach
+            if b == -1:
+                return 0
+            if a == -1:
+                return start_costs[b]
+            return costs[a][b]
+
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            # Or-opt: move a run of 1 to 3 pods, keeping its direction, between two other neighbouring pods
+            for segment_length in (1, 2, 3):
+                for i in range(num_pods - segment_length + 1):
+                    first, last = order[i], order[i + segment_length - 1]
+                    before = order[i - 1] if i > 0 else -1
+                    after = order[i + segment_length] if i + segment_length < num_pods else -1
+                    removal_gain = edge_cost(before, first) + edge_cost(last, after) - edge_cost(before, after)
+                    rest = order[:i] + order[i + segment_length:]
+                    for position in range(len(rest) + 1):
+                        if position == i:
+                            continue
+                        previous = rest[position - 1] if position > 0 else -1
+                        following = rest[position] if position < len(rest) else -1
+                        insertion_cost = edge_cost(previous, first) + edge_cost(last, following) - edge_cost(previous, following)
+                        if insertion_cost < removal_gain:
+                            order = rest[:position] + order[i:i + segment_length] + rest[position:]
+                            improved = True
+                            break
+                    if improved or time.perf_counter() >= deadline:
+                        break
+                if improved or time.perf_counter() >= deadline:
+                    break
+            if improved:
+                continue
+            # 2-opt: reverse order[i:j]. Costs are asymmetric, so the edges inside the run change too
+            for i in range(num_pods - 1):
+                before = order[i - 1] if i > 0 else -1
+                inside_forward = 0
+                inside_backward = 0
+                for j in range(i + 2, num_pods + 1):
+                    inside_forward += costs[order[j - 2]][order[j - 1]]
+                    inside_backward += costs[order[j - 1]][order[j - 2]]
+                    after = order[j] if j < num_pods else -1
+                    old_cost = edge_cost(before, order[i]) + inside_forward + edge_cost(order[j - 1], after)
+                    new_cost = edge_cost(before, order[j - 1]) + inside_backward + edge_cost(order[i], after)
+                    if new_cost < old_cost:
+                        order = order[:i] + order[i:j][::-1] + order[j:]
+                        improved = True
+                        break
+                if improved or time.perf_counter() >= deadline:
+                    break
+        return order
@@ -1,6 +1,7 @@
 from src.DriveInterface import DriveInterface
 from src.DriveState import DriveState
 from src.Constants import DriveMove, SensorData
+from src.GridSearch import GridSearch
 
 
 class DfsSolverAgent(DriveInterface):
@@ -12,13 +13,18 @@ class DfsSolverAgent(DriveInterface):
         self.path = []
         self.field_limits = []
         self.path_move_index = 0
+        self.grid_search = None
 
     def get_next_move(self, sensor_data: dict) -> DriveMove:
         # Main function called by game orchestrator
         # Returns a DriveMove enum value
         if len(self.path) == 0:
             # This example uses the first goal location in the list.
-            self.dfs_solve_path_to_goal(sensor_data, sensor_data[SensorData.GOAL_LOCATIONS][0])
+            self.solve_path_to_goal(sensor_data, sensor_data[SensorData.GOAL_LOCATIONS][0])
+
+        if self.path_move_index + 1 >= len(self.path):
+            # No path was found, or we are already at the goal
+            return DriveMove.NONE
 
         next_move, next_state = self.get_move_for_next_state_in_path()
         if self.will_next_state_collide(next_state, sensor_data):
@@ -29,7 +35,22 @@ class DfsSolverAgent(DriveInterface):
             return next_move
 
     def will_next_state_collide(self, state: DriveState, sensor_data: dict) -> bool:
-        # Not implemented yet
+        # The player moves before the AI drives, so the move crashes if another drive is on the next tile right now, or
+        # a pod while we carry one. Moves that clash with another drive's plan in SensorData.RESERVATION_TABLE (landing on
+        # a tile it reserved or swapping tiles with it) are avoided too. Otherwise the rest of our path is reserved
+        current_state = self.path[self.path_move_index - 1]
+        next_cell = state.to_tuple()
+        if list(next_cell) in sensor_data[SensorData.DRIVE_LOCATIONS]:
+            return True
+        if self.is_player_drive_carrying_a_pod(sensor_data) and list(next_cell) in sensor_data[SensorData.REAL_TIME_POD_LOCATIONS]:
+            return True
+
+        reservation_table = sensor_data[SensorData.RESERVATION_TABLE]
+        turn = reservation_table.current_turn
+        if reservation_table.is_move_conflicting(current_state.to_tuple(), next_cell, turn, self.game_id):
+            return True
+        reservation_table.release_drive(self.game_id)
+        reservation_table.reserve_path([drive_state.to_tuple() for drive_state in self.path[self.path_move_index - 1:]], turn, self.game_id)
         return False
 
     def get_move_for_next_state_in_path(self) -> DriveMove:
@@ -45,41 +66,16 @@ class DfsSolverAgent(DriveInterface):
         print('WARN next move could not be found')
         return DriveMove.NONE, next_state
 
-    def dfs_solve_path_to_goal(self, sensor_data: dict, goal: list[int]):
-        # Depth First Search solver to find a path between SensorData.PLAYER_LOCATION and the goal argument
+    def solve_path_to_goal(self, sensor_data: dict, goal: list[int]):
+        # Finds a path between SensorData.PLAYER_LOCATION and the goal argument with the shared GridSearch
+        # (this agent used to run its own depth first search, BFS also makes the path the shortest one)
         # Stores solved path as a list of DriveState(s) in the self.path variable
-        start_state = sensor_data[SensorData.PLAYER_LOCATION]
-
-        visited_states = set([])
-        paths = [[DriveState(x=start_state[0], y=start_state[1])]]
-
-        while len(paths) > 0:
-            current_path = paths.pop(len(paths)-1)
-            curr_state = current_path[-1]
-            if curr_state.x == goal[0] and curr_state.y == goal[1]:
-                self.path = current_path
-                return
-
-            visited_states.add(curr_state)
-            
-            for state in self.list_all_next_possible_states(curr_state):
-                if state not in visited_states and self.is_state_in_bounds(state, sensor_data):
-                    paths.append(current_path + [state])
-
-        print('WARN Could not find solution from DFS solver')
-
-    def list_all_next_possible_states(self, state: DriveState) -> list[int]:
-        # Returns a list of all reachable states from the argument state by iterating over all possible drive moves
-        next_states = []
-        for move in DriveMove:
-            x, y = state.get_next_state_from_move(move)
-            next_states.insert(0, DriveState(x=x, y=y))
-
-        return next_states
-
-    def is_state_in_bounds(self, state: DriveState, sensor_data: dict) -> bool:
-        # Checks if state argument is not a field wall
-        return [state.x, state.y] not in sensor_data[SensorData.FIELD_BOUNDARIES]
+        if self.grid_search is None:
+            self.grid_search = GridSearch(*sensor_data[SensorData.FIELD_DIMENSIONS])
+        path = self.grid_search.bfs(sensor_data[SensorData.PLAYER_LOCATION], [goal])
+        if not path:
+            print('WARN Could not find solution from BFS solver')
+        self.path = [DriveState(x=x, y=y) for x, y in path]
 
     def is_player_drive_carrying_a_pod(self, sensor_data: dict) -> bool:
         # Checks if player game id is the first value in any of the entries in SensorData.DRIVE_LIFTED_POD_PAIRS
@@ -3,6 +3,10 @@ from src.Constants import DriveMove
 
 
 class DriveInterface(ABC):
+    # Set to True if get_next_move depends only on the game state (no memory between turns, no randomness).
+    # The orchestrator then reuses the decision whenever the same state comes up again, see Field.zobrist_hash
+    cache_decisions = False
+
     def __init__(self, game_id):
         self.id = game_id
 
@@ -1,11 +1,17 @@
 import random
+import numpy as np
 from src.Constants import DriveMove, SensorData, MOVE_TO_HEADING_MAP
 from src.DriveState import DriveState
-from src.GameConfig import POD_PICKUP_PROBABILITY, MIN_GOAL_DIST
+from src.GameConfig import POD_PICKUP_PROBABILITY, MIN_GOAL_DIST, AI_OCCUPANCY_FORECAST_HORIZON
 from src.GameTile import GameTile
-from src.Utils import manhattan_dist_2D
+from src.Utils import manhattan_dist_one_to_many, manhattan_dist_many_to_many
 from src.GameIdProvider import GameIdProvider
+from src.GoalDistanceField import GoalDistanceField
+from src.OccupancyForecast import OccupancyForecast
 from src.Pod import Pod
+from src.ReservationTable import ReservationTable
+from src.Telemetry import NO_TELEMETRY, MOVE, CRASH, PICKUP, DELIVERY, FAILED_PICKUP, FAILED_DROP, POD_ASSIGNED
+from src.ZobristHash import get_zobrist_key, DRIVE_KEY, POD_KEY, CARRIED_POD_KEY, DELIVERED_POD_KEY, GOAL_KEY, POD_TARGET_GOAL_KEY
 
 
 SENSOR_DATA_FILTER_FIELDS = [
@@ -13,23 +19,36 @@ SENSOR_DATA_FILTER_FIELDS = [
     SensorData.DRIVE_LOCATIONS,
     SensorData.REAL_TIME_POD_LOCATIONS,
     SensorData.DRIVE_LIFTED_POD_PAIRS,
-    SensorData.POD_TARGET_GOALS
+    SensorData.POD_TARGET_GOALS,
+    SensorData.POD_LOCATIONS_BY_ID
 ]
 
 class Field:
-    def __init__(self, field_grid_width, field_grid_height):
+    def __init__(self, field_grid_width, field_grid_height, telemetry=NO_TELEMETRY):
         # Initialize backing grid
         self.field_grid = [[GameTile(drive=None, pod=None, is_goal=False) for row in range(field_grid_height)] for col in range(field_grid_width)]
         self.drive_pod_pairings_map = {} # key = drive object ID, val = Pod currently lifted by drive
         self.drive_states_map = {} # key = drive object ID, val = DriveState object for drive
         self.pod_locations_map = {} # key = pod object ID, val = [x, y] coords of pod
         self.drive_to_game_id_map = {} # key = drive object ID, val = assigned game id
-        self.player_id = ''
+        self.player_id = '' # primary player drive, first drive of the fleet in fleet mode
+        self.player_ids = set() # all drives controlled by the player's agent
         self.field_boundary_coords = self.build_list_of_field_boundaries()
         self.sensor_range = -1
         self.pods = []
         self.goal_coords_list = []
+        self.goal_distance_fields = {} # key = (x, y) goal, val = GoalDistanceField for that goal
+        self.cell_coords = np.array([[x, y] for x in range(field_grid_width) for y in range(field_grid_height)]) # [x, y] of every tile
+        self.near_goal_mask = np.zeros((field_grid_width, field_grid_height), dtype=bool) # [x, y] is True if closer than MIN_GOAL_DIST to a goal
         self.collected_pods = set()  # Set of collected pod IDs
+        self.current_turn = 0
+        self.reservation_table = ReservationTable()
+        self.ai_occupancy_forecast = OccupancyForecast(field_grid_width, field_grid_height, AI_OCCUPANCY_FORECAST_HORIZON, self.get_ai_drive_cells)
+        # Zobrist hash of goals, drive and pod positions, carried and delivered pods. Updated on every change of state,
+        # equal states always have equal hashes, see src/ZobristHash.py
+        self.zobrist_hash = 0
+        # Where pod operations and moves are reported, see src/Telemetry.py
+        self.telemetry = telemetry
         
         # Add ID providers
         self.pod_id_provider = GameIdProvider()
@@ -37,16 +56,59 @@ class Field:
     def set_sensor_range(self, sensor_range):
         self.sensor_range = sensor_range
 
+    def advance_turn(self):
+        """Called by the orchestrator once every drive has moved this turn"""
+        self.current_turn += 1
+        self.reservation_table.expire(self.current_turn)
+        self.ai_occupancy_forecast.mark_stale()
+
+    def compute_zobrist_hash(self):
+        """Zobrist hash of the current state built from scratch. Always equal to self.zobrist_hash, which is kept up to
+        date incrementally, useful to check the incremental updates"""
+        state_hash = 0
+        for x, y in self.goal_coords_list:
+            state_hash ^= get_zobrist_key(GOAL_KEY, x, y)
+        for drive_str, state in self.drive_states_map.items():
+            state_hash ^= get_zobrist_key(DRIVE_KEY, self.drive_to_game_id_map[drive_str], state.x, state.y)
+        pods = {str(tile.pod): tile.pod for column in self.field_grid for tile in column if tile.pod is not None}
+        for pod in pods.values():
+            x, y = self.pod_locations_map[str(pod)]
+            state_hash ^= get_zobrist_key(POD_KEY, pod.pod_id, x, y)
+            if pod.target_goal is not None:
+                state_hash ^= get_zobrist_key(POD_TARGET_GOAL_KEY, pod.pod_id, *pod.target_goal)
+            if str(pod) in self.collected_pods:
+                state_hash ^= get_zobrist_key(DELIVERED_POD_KEY, pod.pod_id)
+        for drive_str, pod in self.drive_pod_pairings_map.items():
+            state_hash ^= get_zobrist_key(CARRIED_POD_KEY, self.drive_to_game_id_map[drive_str], pod.pod_id)
+        return state_hash
+
+    def get_ai_drive_cells(self):
+        """Cells of the AI drives, only those within sensor range of a player drive when the level has a sensor range"""
+        ai_drive_cells = {d: self.drive_states_map[d].to_tuple() for d in self.drive_states_map.keys() if d not in self.player_ids}
+        if self.sensor_range > 0 and ai_drive_cells:
+            sensor_locations = [[self.drive_states_map[d].x, self.drive_states_map[d].y] for d in self.player_ids]
+            in_range = self.get_locations_in_sensor_range(list(ai_drive_cells.values()), sensor_locations)
+            ai_drive_cells = {d: cell for (d, cell), is_in_range in zip(ai_drive_cells.items(), in_range) if is_in_range}
+        return ai_drive_cells
+
     def spawn_goal(self, num_goals):
         """Spawn one goal for each pod we'll create"""
         for _ in range(num_goals):
             x = random.randint(0, len(self.field_grid) - 1)
             y = random.randint(0, len(self.field_grid[0]) - 1)
-            while any(manhattan_dist_2D([x, y], goal) < MIN_GOAL_DIST for goal in self.goal_coords_list):
+            while self.near_goal_mask[x, y]:
                 x = random.randint(0, len(self.field_grid) - 1)
                 y = random.randint(0, len(self.field_grid[0]) - 1)
-            self.field_grid[x][y].is_goal = True
-            self.goal_coords_list.append([x, y])
+            self.place_goal(x, y)
+
+    def place_goal(self, x, y):
+        self.field_grid[x][y].is_goal = True
+        self.goal_coords_list.append([x, y])
+        self.zobrist_hash ^= get_zobrist_key(GOAL_KEY, x, y)
+        # Distances from the new goal to every tile in one call, so spawn loops only need a mask lookup per draw
+        self.near_goal_mask |= (manhattan_dist_one_to_many([x, y], self.cell_coords) < MIN_GOAL_DIST).reshape(self.near_goal_mask.shape)
+        # Goals never move, so their distance fields are built once here and shared with every agent
+        self.goal_distance_fields[(x, y)] = GoalDistanceField((x, y), len(self.field_grid), len(self.field_grid[0]))
 
     def spawn_player(self, player, player_id):
         if not self.goal_coords_list:
@@ -55,13 +117,21 @@ class Field:
         field_y = len(self.field_grid[0]) - 1
         x = random.randint(field_x // 4, 3 * field_x // 4)
         y = random.randint(field_y // 4, 3 * field_y // 4)
-        while any(manhattan_dist_2D([x, y], goal_coords) < MIN_GOAL_DIST for goal_coords in self.goal_coords_list):
+        while self.near_goal_mask[x, y]:
             y = random.randint(0, len(self.field_grid[0]) - 1)
             x = random.randint(0, len(self.field_grid) - 1)
-        self.field_grid[x][y].drive = player
-        self.drive_states_map[str(player)] = DriveState(x=x, y=y)
-        self.player_id = str(player)
-        self.drive_to_game_id_map[str(player)] = player_id
+        self.place_drive(player, player_id, x, y, is_player=True)
+
+    def spawn_fleet_drive(self, fleet_drive):
+        """Spawn an additional player controlled drive. Call Field.spawn_player for the first drive of the fleet"""
+        if not self.player_id:
+            raise Exception('No primary player drive exists. Call Field.spawn_player before Field.spawn_fleet_drive')
+        x = random.randint(0, len(self.field_grid) - 1)
+        y = random.randint(0, len(self.field_grid[0]) - 1)
+        while self.field_grid[x][y].drive != None or self.field_grid[x][y].is_goal:
+            y = random.randint(0, len(self.field_grid[0])-1)
+            x = random.randint(0, len(self.field_grid)-1)
+        self.place_drive(fleet_drive, fleet_drive.id, x, y, is_player=True)
 
     def spawn_new_ai_drive(self, ai_drive):
         x = random.randint(0, len(self.field_grid) - 1)
@@ -69,26 +139,36 @@ class Field:
         while self.field_grid[x][y].drive != None: 
             y = random.randint(0, len(self.field_grid[0])-1)
             x = random.randint(0, len(self.field_grid)-1)
-        self.field_grid[x][y].drive = ai_drive
-        self.drive_states_map[str(ai_drive)] = DriveState(x=x, y=y)
-        self.drive_to_game_id_map[str(ai_drive)] = ai_drive.id
+        self.place_drive(ai_drive, ai_drive.id, x, y)
+
+    def place_drive(self, drive, game_id, x, y, is_player=False):
+        """Put a drive on tile (x, y). The first player drive placed is the primary player drive"""
+        self.field_grid[x][y].drive = drive
+        self.drive_states_map[str(drive)] = DriveState(x=x, y=y)
+        self.zobrist_hash ^= get_zobrist_key(DRIVE_KEY, game_id, x, y)
+        self.drive_to_game_id_map[str(drive)] = game_id
+        if is_player:
+            if not self.player_id:
+                self.player_id = str(drive)
+            self.player_ids.add(str(drive))
 
     def spawn_target_pod(self, pod, can_other_drives_lift=False):
         field_x = len(self.field_grid) - 1
         field_y = len(self.field_grid[0]) - 1
         x = random.randint(field_x // 4, 3 * field_x // 4)
         y = random.randint(field_y // 4, 3 * field_y // 4)
-        while any(manhattan_dist_2D([x, y], goal_coords) < MIN_GOAL_DIST for goal_coords in self.goal_coords_list):
+        while self.near_goal_mask[x, y]:
             y = random.randint(0, len(self.field_grid[0])-1)
             x = random.randint(0, len(self.field_grid)-1)
 
         self.field_grid[x][y].pod = pod
         self.pod_locations_map[str(pod)] = [x, y]
+        self.zobrist_hash ^= get_zobrist_key(POD_KEY, pod.pod_id, x, y)
 
         if can_other_drives_lift == True:
             if self.field_grid[x][y].drive != None:
                 if random.uniform(0, 1) < POD_PICKUP_PROBABILITY: # start with pod on drive
-                    self.drive_pod_pairings_map[str(self.field_grid[x][y].drive)] = pod
+                    self.set_lifted_pod(self.field_grid[x][y].drive, pod)
 
     def spawn_new_pod(self, pod_id: int):
         """Spawn a new pod and assign it a unique target goal"""
@@ -109,28 +189,51 @@ class Field:
 
         if available_goals:
             pod.target_goal = tuple(random.choice(available_goals))
-            print(f"Pod {pod.pod_id} assigned to goal {pod.target_goal}")
+            if self.telemetry.events_enabled:
+                self.telemetry.record(POD_ASSIGNED, self.current_turn, pod=pod.pod_id, x=pod.target_goal[0], y=pod.target_goal[1])
+        self.place_pod(pod, x, y)
 
+        if self.field_grid[x][y].drive != None and not self.is_drive_player(self.field_grid[x][y].drive):
+            if random.uniform(0, 1) < POD_PICKUP_PROBABILITY:
+                self.set_lifted_pod(self.field_grid[x][y].drive, pod)
+
+    def place_pod(self, pod, x, y):
+        """Put a pod, with its target goal already assigned, on tile (x, y)"""
+        if pod.target_goal:
+            self.zobrist_hash ^= get_zobrist_key(POD_TARGET_GOAL_KEY, pod.pod_id, *pod.target_goal)
         self.pods.append(pod)
         self.field_grid[x][y].pod = pod
         self.pod_locations_map[str(pod)] = [x, y]
+        self.zobrist_hash ^= get_zobrist_key(POD_KEY, pod.pod_id, x, y)
 
-        if self.field_grid[x][y].drive != None and str(self.field_grid[x][y].drive) != self.player_id:
-            if random.uniform(0, 1) < POD_PICKUP_PROBABILITY:
-                self.drive_pod_pairings_map[str(self.field_grid[x][y].drive)] = pod
+    def set_lifted_pod(self, drive, pod):
+        # A drive lifting a new pod lets go of the one it was carrying
+        if str(drive) in self.drive_pod_pairings_map:
+            self.zobrist_hash ^= get_zobrist_key(CARRIED_POD_KEY, self.drive_to_game_id_map[str(drive)], self.drive_pod_pairings_map[str(drive)].pod_id)
+        self.drive_pod_pairings_map[str(drive)] = pod
+        self.zobrist_hash ^= get_zobrist_key(CARRIED_POD_KEY, self.drive_to_game_id_map[str(drive)], pod.pod_id)
+
+    def set_delivered_pod(self, pod):
+        if str(pod) not in self.collected_pods:
+            self.zobrist_hash ^= get_zobrist_key(DELIVERED_POD_KEY, pod.pod_id)
+        self.collected_pods.add(str(pod))
 
     def is_drive_player(self, drive):
-        return str(drive) == self.player_id
+        return str(drive) in self.player_ids
 
     def process_move_for_drive(self, move, drive):
-        # Debug log:
-        # print("Received move:", move)
         current_drive_state = self.drive_states_map[str(drive)]
+        if self.telemetry.moves_enabled:
+            self.telemetry.record(MOVE, self.current_turn, self.drive_to_game_id_map[str(drive)], x=current_drive_state.x,
+                                  y=current_drive_state.y, value=move.value)
 
         if self.will_next_move_crash(move, drive):
             if self.is_drive_player(drive):
                 self.field_grid[current_drive_state.x][current_drive_state.y].drive = None
                 self.field_grid[current_drive_state.x][current_drive_state.y].is_crash = True
+                if self.telemetry.events_enabled:
+                    self.telemetry.record(CRASH, self.current_turn, self.drive_to_game_id_map[str(drive)],
+                                          x=current_drive_state.x, y=current_drive_state.y)
                 return False
             else:
                 # Do not move AI drives into invalid states. Skip turn for AI instead
@@ -139,11 +242,14 @@ class Field:
             # Process Pod operations before moves
             if move == DriveMove.LIFT_POD:
                 if self.field_grid[current_drive_state.x][current_drive_state.y].pod != None:
-                    self.drive_pod_pairings_map[str(drive)] = self.field_grid[current_drive_state.x][current_drive_state.y].pod
-                    print(f"Picked up pod at {current_drive_state.x}, {current_drive_state.y}")
-                else:
-                    if self.is_drive_player(drive):
-                        print(f'Player drive {drive} tried picking up a pod, but no pod was present at current state')
+                    pod = self.field_grid[current_drive_state.x][current_drive_state.y].pod
+                    self.set_lifted_pod(drive, pod)
+                    if self.telemetry.events_enabled:
+                        self.telemetry.record(PICKUP, self.current_turn, self.drive_to_game_id_map[str(drive)], pod.pod_id,
+                                              current_drive_state.x, current_drive_state.y)
+                elif self.telemetry.events_enabled and self.is_drive_player(drive):
+                    self.telemetry.record(FAILED_PICKUP, self.current_turn, self.drive_to_game_id_map[str(drive)],
+                                          x=current_drive_state.x, y=current_drive_state.y)
             elif move == DriveMove.DROP_POD:
                 if self.is_drive_carrying_a_pod(drive):
                     pod = self.drive_pod_pairings_map[str(drive)]
@@ -151,27 +257,37 @@ class Field:
                     
                     # Only allow dropping at pod's target goal
                     if current_pos == pod.target_goal:
-                        self.collected_pods.add(str(pod))
+                        self.set_delivered_pod(pod)
                         del self.drive_pod_pairings_map[str(drive)]
-                        print(f"Pod {pod.pod_id} delivered to its target goal {pod.target_goal}")
+                        self.zobrist_hash ^= get_zobrist_key(CARRIED_POD_KEY, self.drive_to_game_id_map[str(drive)], pod.pod_id)
+                        if self.telemetry.events_enabled:
+                            self.telemetry.record(DELIVERY, self.current_turn, self.drive_to_game_id_map[str(drive)],
+                                                  pod.pod_id, current_drive_state.x, current_drive_state.y)
                     else:
-                        print(f"Can't drop pod here - not its target goal {pod.target_goal}")
+                        if self.telemetry.events_enabled:
+                            self.telemetry.record(FAILED_DROP, self.current_turn, self.drive_to_game_id_map[str(drive)],
+                                                  pod.pod_id, current_drive_state.x, current_drive_state.y)
                         return True  # Don't allow dropping at wrong location
-                else:
-                    if self.is_drive_player(drive):
-                        print(f'Player drive {drive} tried dropping a pod, but wasn\'t carrying one')
+                elif self.telemetry.events_enabled and self.is_drive_player(drive):
+                    self.telemetry.record(FAILED_DROP, self.current_turn, self.drive_to_game_id_map[str(drive)],
+                                          x=current_drive_state.x, y=current_drive_state.y)
             else:
                 # Move drive
+                game_id = self.drive_to_game_id_map[str(drive)]
                 self.field_grid[current_drive_state.x][current_drive_state.y].drive = None
+                self.zobrist_hash ^= get_zobrist_key(DRIVE_KEY, game_id, current_drive_state.x, current_drive_state.y)
                 if self.is_drive_carrying_a_pod(drive):
                     self.field_grid[current_drive_state.x][current_drive_state.y].pod = None
+                    self.zobrist_hash ^= get_zobrist_key(POD_KEY, self.drive_pod_pairings_map[str(drive)].pod_id, current_drive_state.x, current_drive_state.y)
 
                 current_drive_state.update_state_from_move(move)
                 self.field_grid[current_drive_state.x][current_drive_state.y].drive = drive
                 self.drive_states_map[str(drive)] = current_drive_state
+                self.zobrist_hash ^= get_zobrist_key(DRIVE_KEY, game_id, current_drive_state.x, current_drive_state.y)
                 if self.is_drive_carrying_a_pod(drive):
                     self.field_grid[current_drive_state.x][current_drive_state.y].pod = self.drive_pod_pairings_map[str(drive)]
                     self.pod_locations_map[str(self.field_grid[current_drive_state.x][current_drive_state.y].pod)] = [current_drive_state.x, current_drive_state.y]
+                    self.zobrist_hash ^= get_zobrist_key(POD_KEY, self.drive_pod_pairings_map[str(drive)].pod_id, current_drive_state.x, current_drive_state.y)
                 
                 # Update drive heading for UI
                 new_heading = MOVE_TO_HEADING_MAP[move]
@@ -202,6 +318,28 @@ class Field:
 
     def generate_sensor_data_for_drive(self, drive):
         """Generate sensor data dictionary for a specific drive"""
+        sensor_data = self.build_sensor_data(excluded_drives=set([str(drive)]))
+
+        if self.sensor_range > 0:
+            self.filter_sensor_data_for_sensor_range(sensor_data, [self.player_id])
+
+        return sensor_data
+
+    def generate_sensor_data_for_fleet(self, fleet_drives):
+        """Generate one sensor data dictionary shared by every drive in the fleet"""
+        fleet_drive_strs = [str(drive) for drive in fleet_drives]
+        sensor_data = self.build_sensor_data(excluded_drives=set(fleet_drive_strs))
+        sensor_data[SensorData.FLEET_LOCATIONS] = {}
+        for d in fleet_drive_strs:
+            sensor_data[SensorData.FLEET_LOCATIONS][self.drive_to_game_id_map[d]] = [self.drive_states_map[d].x, self.drive_states_map[d].y]
+
+        if self.sensor_range > 0:
+            # Anything seen by at least one drive of the fleet is shared with the whole fleet
+            self.filter_sensor_data_for_sensor_range(sensor_data, fleet_drive_strs)
+
+        return sensor_data
+
+    def build_sensor_data(self, excluded_drives):
         sensor_data = {
             SensorData.FIELD_BOUNDARIES: self.field_boundary_coords,
             SensorData.DRIVE_LOCATIONS: [],
@@ -209,14 +347,21 @@ class Field:
             SensorData.DRIVE_LIFTED_POD_PAIRS: self.build_drive_lifted_pod_pairs(),
             SensorData.PLAYER_LOCATION: [self.drive_states_map[self.player_id].x, self.drive_states_map[self.player_id].y],
             SensorData.GOAL_LOCATIONS: self.goal_coords_list,
-            SensorData.POD_TARGET_GOALS: self.pods  # Add pod-goal mapping
+            SensorData.POD_TARGET_GOALS: self.pods,  # Add pod-goal mapping
+            SensorData.RESERVATION_TABLE: self.reservation_table,
+            SensorData.AI_OCCUPANCY_FORECAST: self.ai_occupancy_forecast,
+            SensorData.POD_LOCATIONS_BY_ID: {pod.pod_id: self.pod_locations_map[str(pod)] for pod in self.pods},
+            SensorData.FIELD_DIMENSIONS: [len(self.field_grid), len(self.field_grid[0])],
+            SensorData.SENSOR_RANGE: self.sensor_range,
+            SensorData.GOAL_DISTANCE_FIELDS: self.goal_distance_fields,
+            SensorData.STATE_HASH: self.zobrist_hash
         }
 
 
 
-        # Add all drive locations except the requesting drive
+        # Add all drive locations except the requesting drive(s)
         for d in self.drive_states_map.keys():
-            if d != str(drive):
+            if d not in excluded_drives:
                 sensor_data[SensorData.DRIVE_LOCATIONS].append(
                     [self.drive_states_map[d].x, self.drive_states_map[d].y]
                 )
@@ -225,9 +370,6 @@ class Field:
         for p in self.pod_locations_map.keys():
             sensor_data[SensorData.REAL_TIME_POD_LOCATIONS].append(self.pod_locations_map[p])
 
-        if self.sensor_range > 0:
-            self.filter_sensor_data_for_sensor_range(sensor_data)
-
         return sensor_data
 
     def build_drive_lifted_pod_pairs(self):
@@ -244,15 +386,32 @@ class Field:
         else:
             return []
 
-    def filter_sensor_data_for_sensor_range(self, sensor_data):
-        player_state = self.drive_states_map[self.player_id]
-        player_location = [player_state.x, player_state.y]
+    def filter_sensor_data_for_sensor_range(self, sensor_data, sensing_drives):
+        sensor_locations = [[self.drive_states_map[d].x, self.drive_states_map[d].y] for d in sensing_drives]
+        sensor_data[SensorData.STATE_HASH] = None # The hash changes with things outside the sensor range
+        drive_locations_by_game_id = {self.drive_to_game_id_map[d]: [state.x, state.y] for d, state in self.drive_states_map.items()}
         for data_field in SENSOR_DATA_FILTER_FIELDS:
-            new_data = []
-            for val in sensor_data[data_field]:
-                if round(manhattan_dist_2D(player_location, val)) <= self.sensor_range:
-                    new_data.append(val)
-            sensor_data[data_field] = new_data
+            if data_field == SensorData.POD_LOCATIONS_BY_ID:
+                values = list(sensor_data[data_field].items())
+                locations = [location for pod_id, location in values]
+            else:
+                values = sensor_data[data_field]
+                if data_field == SensorData.POD_TARGET_GOALS:
+                    locations = [self.pod_locations_map[str(val)] for val in values] # Pod objects are seen where the pod currently is
+                elif data_field == SensorData.DRIVE_LIFTED_POD_PAIRS:
+                    locations = [drive_locations_by_game_id[val[0]] for val in values] # Lifted pods are seen where the lifting drive is
+                else:
+                    locations = values
+            in_range = self.get_locations_in_sensor_range(locations, sensor_locations)
+            new_data = [val for val, is_in_range in zip(values, in_range) if is_in_range]
+            sensor_data[data_field] = dict(new_data) if data_field == SensorData.POD_LOCATIONS_BY_ID else new_data
+
+    def get_locations_in_sensor_range(self, locations, sensor_locations):
+        """Boolean array, True for each location within sensor range of any of the sensor locations.
+        All distances are computed in one call"""
+        if not locations:
+            return []
+        return manhattan_dist_many_to_many(sensor_locations, locations).min(axis=0) <= self.sensor_range
 
     def is_winning_condition(self):
         """Check if all pods have been delivered to their specific goals"""
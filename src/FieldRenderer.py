@@ -1,132 +1,213 @@
 import pygame
-from src.Constants import Heading
 from src.GameConfig import GRID_BLOCK_DIMENSIONS, WINDOW_DIMENSIONS
-from src.PygameGraphicsUtils import BLACK, WHITE, RED, GREEN, SCORE_FONT, END_FONT, YELLOW
-from images.PygameDriveOrange import orange_drive_img
-from images.PygameDriveBlue import blue_drive_img
-from images.PygamePlayerDriveOrange import player_orange_drive_img
-from images.PygamePodYellow import pod_yellow_img
-from images.PygamePodGreen import pod_green_img
+from src.PygameGraphicsUtils import BLACK, WHITE, YELLOW, get_score_font, get_end_font
+from src.FrameState import FrameState, NO_POD, OUTLINED_POD, VICTORY_SCREEN, LOSS_SCREEN
+from src.SpriteAtlas import get_sprite_atlas
+
+# Side of the square buckets, in tiles, that pod to goal lines are indexed by so redraw_rect only looks at lines near it
+LINE_BUCKET_TILES = 8
+# When the rects changed in a frame cover more than this fraction of the field, the whole field is redrawn at once
+FULL_REDRAW_AREA_FRACTION = 0.5
 
 
 class FieldRenderer:
-    def __init__(self, field, game_window, agent_class, level_name):
+    # Draws the field in layers. The grid and goals never change during a level, so they are drawn once onto a cached
+    # background surface. Each frame only the tiles whose drive, pod or crash state changed are redrawn: the
+    # background is copied back over them, then their sprites, goal and crash markers and any pod to goal lines
+    # crossing them are drawn on top. update_game_window returns the rectangles it touched so the caller can pass
+    # them to pygame.display.update instead of updating the whole window.
+    # Frames are drawn from a FrameState, so a renderer without a Field (like the one in a RenderProcess) can be
+    # given frame states directly through draw_frame_state. field is None then and the goals are passed in instead.
+    # The field uses y-up coordinates, these are mapped to the window's y-down coordinates as each item is drawn.
+    # With a tile_size smaller than GRID_BLOCK_DIMENSIONS the whole field, banner and text are drawn scaled down, with
+    # sprites from the SpriteAtlas of that size. game_window can then be a subsurface of a bigger window.
+
+    def __init__(self, field, game_window, agent_class, level_name, goals=None, tile_size=GRID_BLOCK_DIMENSIONS):
         self.field = field
         self.game_window = game_window
         self.agent_class = agent_class
         self.level_name = level_name
 
-    def update_game_window(self, score):
-        # clear screen
-        self.game_window.fill(BLACK)
-
-        # draw grid
-        self.draw_field_grid()
+        self.tile_width, self.tile_height = tile_size
+        self.scale = self.tile_height / GRID_BLOCK_DIMENSIONS[1]
+        self.grid_width = WINDOW_DIMENSIONS[0] // GRID_BLOCK_DIMENSIONS[0]
+        self.grid_height = WINDOW_DIMENSIONS[1] // GRID_BLOCK_DIMENSIONS[1]
+        self.field_width = self.grid_width * self.tile_width
+        self.field_height = self.grid_height * self.tile_height
+
+        self.window_height = game_window.get_height()
+        self.background = None # grid and goals, built on the first frame
+        self.sprite_atlas = get_sprite_atlas(tile_size)
+        self.goal_cells = set(tuple(goal) for goal in (goals if goals is not None else field.goal_coords_list))
+        self.frame_state = FrameState() # what is on the window right now
+        self.line_bucket_width = LINE_BUCKET_TILES * self.tile_width
+        self.line_bucket_height = LINE_BUCKET_TILES * self.tile_height
+        self.line_rects = {} # key = pod id, val = window rect of the pod's line in frame_state
+        self.line_buckets = {} # key = (column, row) of a bucket, val = set of pod ids whose line rect overlaps it
 
-        # draw each tile in the field
-        for x in range(len(self.field.field_grid)):
-            for y in range(len(self.field.field_grid[0])):
-                self.draw_game_tile_at_x_y(x, y)
+    def update_game_window(self, score):
+        """Redraws what changed in the field since the last frame, returns the list of window rects that were drawn to"""
+        return self.draw_frame_state(FrameState.from_field(self.field, score))
+
+    def draw_frame_state(self, frame_state):
+        """Redraws what changed since the last frame, returns the list of window rects that were drawn to"""
+        if self.background is None:
+            self.build_background()
+            dirty_rects = [self.game_window.get_rect()]
+            changed_lines = frame_state.pod_lines
+        else:
+            delta = frame_state.get_delta(self.frame_state)
+            changed_lines = delta['pod_lines']
+            dirty_rects = [self.get_tile_rect(x, y) for x, y in delta['tile_views']]
+            for pod_id in changed_lines:
+                dirty_rects += [
+                    self.get_line_rect(*line) for line in (frame_state.pod_lines.get(pod_id), self.frame_state.pod_lines.get(pod_id)) if line
+                ]
+            # Many small rects cost more than one redraw of the field, like when hundreds of fleet drives move at once
+            field_rect = pygame.Rect(0, self.window_height - self.field_height, self.field_width, self.field_height)
+            if sum(rect.width * rect.height for rect in dirty_rects) > FULL_REDRAW_AREA_FRACTION * self.field_width * self.field_height:
+                dirty_rects = [field_rect]
+        self.frame_state = frame_state
+        for pod_id in changed_lines:
+            self.update_line_index(pod_id, frame_state.pod_lines.get(pod_id))
+
+        for rect in dirty_rects:
+            self.redraw_rect(rect)
 
         # update score banner
-        self.update_score_banner(score)
-
-        # flip screen over y axis to put origin in bottom left
-        flip_surface = pygame.transform.flip(self.game_window, False, True)
-        self.game_window.blit(flip_surface, (0, 0))
+        dirty_rects.append(self.update_score_banner(*frame_state.banner))
+        return dirty_rects
+
+    def to_window_point(self, x, y):
+        """Window pixel of field pixel (x, y), field pixels have their origin in the bottom left"""
+        return (x, self.window_height - 1 - y)
+
+    def get_tile_rect(self, x, y):
+        return pygame.Rect(x*self.tile_width, self.window_height - (y+1)*self.tile_height, self.tile_width, self.tile_height)
+
+    def get_tile_center(self, x, y):
+        return self.to_window_point(x*self.tile_width + self.tile_width//2, y*self.tile_height + self.tile_height//2)
+
+    def get_line_rect(self, start_cell, end_cell):
+        start_pos = self.get_tile_center(*start_cell)
+        end_pos = self.get_tile_center(*end_cell)
+        return pygame.Rect(min(start_pos[0], end_pos[0]), min(start_pos[1], end_pos[1]),
+                           abs(start_pos[0] - end_pos[0]) + 1, abs(start_pos[1] - end_pos[1]) + 1)
+
+    def get_buckets(self, rect):
+        """(column, row) of every line bucket rect overlaps"""
+        return [(column, row)
+                for column in range(max(0, rect.left) // self.line_bucket_width, max(0, rect.right - 1) // self.line_bucket_width + 1)
+                for row in range(max(0, rect.top) // self.line_bucket_height, max(0, rect.bottom - 1) // self.line_bucket_height + 1)]
+
+    def update_line_index(self, pod_id, line):
+        """Moves pod_id's line to its new window rect in the bucket index, line is None if the pod has no line anymore"""
+        old_rect = self.line_rects.pop(pod_id, None)
+        if old_rect is not None:
+            for bucket in self.get_buckets(old_rect):
+                self.line_buckets[bucket].discard(pod_id)
+        if line is not None:
+            rect = self.get_line_rect(*line)
+            self.line_rects[pod_id] = rect
+            for bucket in self.get_buckets(rect):
+                self.line_buckets.setdefault(bucket, set()).add(pod_id)
+
+    def get_tiles_in_rect(self, rect):
+        """Cells of frame_state.tile_views whose tile overlaps rect, looked up by cell"""
+        # Window rows grow downwards while field rows grow upwards, the bottom window row of rect is the lowest field row
+        min_x = max(0, rect.left // self.tile_width)
+        max_x = min(self.grid_width - 1, (rect.right - 1) // self.tile_width)
+        min_y = max(0, (self.window_height - rect.bottom) // self.tile_height)
+        max_y = min(self.grid_height - 1, (self.window_height - 1 - rect.top) // self.tile_height)
+        tile_views = self.frame_state.tile_views
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(tile_views):
+            return [cell for cell in tile_views if min_x <= cell[0] <= max_x and min_y <= cell[1] <= max_y]
+        return [(x, y) for x in range(min_x, max_x + 1) for y in range(min_y, max_y + 1) if (x, y) in tile_views]
+
+    def get_lines_in_rect(self, rect):
+        """Lines of frame_state.pod_lines whose rect overlaps rect, looked up in the bucket index"""
+        pod_ids = set()
+        for bucket in self.get_buckets(rect):
+            pod_ids.update(self.line_buckets.get(bucket, ()))
+        return [self.frame_state.pod_lines[pod_id] for pod_id in pod_ids if self.line_rects[pod_id].colliderect(rect)]
+
+    def build_background(self):
+        self.background = pygame.Surface(self.game_window.get_size())
+        self.background.fill(BLACK)
+        self.draw_field_grid(self.background)
+        for x, y in self.goal_cells:
+            self.draw_goal(self.background, x, y)
+
+    def redraw_rect(self, rect):
+        # The background and tiles are clipped to rect, so tiles that only partly overlap it are drawn correctly
+        self.game_window.set_clip(rect)
+        self.game_window.blit(self.background, rect, rect)
+        for x, y in self.get_tiles_in_rect(rect):
+            self.draw_game_tile_at_x_y(x, y)
+        # Lines are drawn whole: a clipped line can take different pixels than the same line drawn in full. Lines are the
+        # top layer, so the pixels they cover outside rect already show them
+        self.game_window.set_clip(None)
+        for start_cell, end_cell in self.get_lines_in_rect(rect):
+            pygame.draw.line(self.game_window, YELLOW, self.get_tile_center(*start_cell), self.get_tile_center(*end_cell), 1)
+
+    def draw_goal(self, surface, x, y):
+        surface.blit(self.sprite_atlas.goal_marker, self.get_tile_rect(x, y))
 
     def draw_game_tile_at_x_y(self, x, y):
-        if self.field.field_grid[x][y].drive != None: # drive is present
-            drive = self.field.field_grid[x][y].drive
-            draw_pod_on_top = False
-            if self.field.field_grid[x][y].pod != None:
-                img = self.get_drive_image_for_drive(drive)
-                draw_pod_on_top = True
-            else:
-                img = self.get_drive_image_for_drive(drive)
- 
-            heading = self.field.field_grid[x][y].drive_heading
-            if heading == Heading.NORTH: 
-                img = pygame.transform.rotate(img, 180)
-            elif heading == Heading.EAST:
-                img = pygame.transform.rotate(img, 270)
-            elif heading == Heading.SOUTH:
-                img = pygame.transform.rotate(img, 0)
-            else: # Heading.WEST
-                img = pygame.transform.rotate(img, 90)
-
-            self.game_window.blit(img, (x*GRID_BLOCK_DIMENSIONS[0], y*GRID_BLOCK_DIMENSIONS[1]))
-            if draw_pod_on_top:
-                if self.field.is_drive_carrying_a_pod(drive):
-                    self.game_window.blit(pod_green_img, (x*GRID_BLOCK_DIMENSIONS[0], y*GRID_BLOCK_DIMENSIONS[1]))
-                else:
-                    self.game_window.blit(pod_yellow_img, (x*GRID_BLOCK_DIMENSIONS[0], y*GRID_BLOCK_DIMENSIONS[1]))
-        elif self.field.field_grid[x][y].pod != None: # pod without drive
-            self.game_window.blit(pod_yellow_img, (x*GRID_BLOCK_DIMENSIONS[0], y*GRID_BLOCK_DIMENSIONS[1]))
-
-            # Highlight uncollected pods
-            pod = self.field.field_grid[x][y].pod
-            if str(pod) not in self.field.collected_pods:
-                outline_surface = pygame.Surface((GRID_BLOCK_DIMENSIONS[0], GRID_BLOCK_DIMENSIONS[1]), pygame.SRCALPHA, 32)
-                pygame.draw.rect(outline_surface, RED, pygame.Rect(0, 0, GRID_BLOCK_DIMENSIONS[0], GRID_BLOCK_DIMENSIONS[1]), 2)
-                self.game_window.blit(outline_surface, (x*GRID_BLOCK_DIMENSIONS[0], y*GRID_BLOCK_DIMENSIONS[1]))
-            
-        # Draw all goal locations
-        if [x, y] in self.field.goal_coords_list:
-            pygame.draw.circle(self.game_window, GREEN, (x*GRID_BLOCK_DIMENSIONS[0]+GRID_BLOCK_DIMENSIONS[0]//2, y*GRID_BLOCK_DIMENSIONS[1]+GRID_BLOCK_DIMENSIONS[1]//2), GRID_BLOCK_DIMENSIONS[1]//4)
-
-        if self.field.field_grid[x][y].is_crash:
-            pygame.draw.circle(self.game_window, RED, (x*GRID_BLOCK_DIMENSIONS[0]+GRID_BLOCK_DIMENSIONS[0]//2, y*GRID_BLOCK_DIMENSIONS[1]+GRID_BLOCK_DIMENSIONS[1]//2), GRID_BLOCK_DIMENSIONS[1]//3)
-
-        # Draw lines connecting pods to their target goals
-        if self.field.field_grid[x][y].pod != None:
-            pod = self.field.field_grid[x][y].pod
-            if pod.target_goal:
-                start_pos = (x*GRID_BLOCK_DIMENSIONS[0] + GRID_BLOCK_DIMENSIONS[0]//2,
-                            y*GRID_BLOCK_DIMENSIONS[1] + GRID_BLOCK_DIMENSIONS[1]//2)
-                end_pos = (pod.target_goal[0]*GRID_BLOCK_DIMENSIONS[0] + GRID_BLOCK_DIMENSIONS[0]//2,
-                          pod.target_goal[1]*GRID_BLOCK_DIMENSIONS[1] + GRID_BLOCK_DIMENSIONS[1]//2)
-                pygame.draw.line(self.game_window, YELLOW, start_pos, end_pos, 1)
-
-    def get_drive_image_for_drive(self, drive):
-        if str(drive) == self.field.player_id:
-            return player_orange_drive_img
-        else:
-            return blue_drive_img
-
-    def draw_field_grid(self):
-        for x in range(0, WINDOW_DIMENSIONS[0], GRID_BLOCK_DIMENSIONS[0]):
-            for y in range(0, WINDOW_DIMENSIONS[1], GRID_BLOCK_DIMENSIONS[1]):
-                if x <= WINDOW_DIMENSIONS[0]-GRID_BLOCK_DIMENSIONS[0] and y <= WINDOW_DIMENSIONS[1]-GRID_BLOCK_DIMENSIONS[1]:
-                    rect = pygame.Rect(x, y, GRID_BLOCK_DIMENSIONS[0], GRID_BLOCK_DIMENSIONS[1])
-                    pygame.draw.rect(self.game_window, WHITE, rect, 1)
-
-    def update_score_banner(self, score):
-        """Update score banner with pod collection progress"""
-        total_pods = len(self.field.pod_locations_map)
-        collected_pods = len(self.field.collected_pods)
-        text_surface = SCORE_FONT.render(
+        is_player, heading, pod, is_crash = self.frame_state.tile_views[(x, y)]
+        tile_position = self.get_tile_rect(x, y).topleft
+        if is_player is not None: # drive is present, with the pod it is under or carrying on top
+            self.game_window.blit(self.sprite_atlas.get_drive_sprite(is_player, heading, pod), tile_position)
+        elif pod == OUTLINED_POD: # uncollected pod without drive, highlighted
+            self.game_window.blit(self.sprite_atlas.outlined_pod_sprite, tile_position)
+        elif pod != NO_POD: # delivered pod without drive
+            self.game_window.blit(self.sprite_atlas.pod_sprite, tile_position)
+
+        # Goals are part of the background, but are drawn again on top of drives and pods
+        if (x, y) in self.goal_cells:
+            self.draw_goal(self.game_window, x, y)
+
+        if is_crash:
+            self.game_window.blit(self.sprite_atlas.crash_marker, tile_position)
+
+    def draw_field_grid(self, surface):
+        for x in range(self.grid_width):
+            for y in range(self.grid_height):
+                pygame.draw.rect(surface, WHITE, self.get_tile_rect(x, y), 1)
+
+    def update_score_banner(self, collected_pods, total_pods, score):
+        """Update score banner with pod collection progress, returns the banner rect"""
+        text_surface = get_score_font(self.scale).render(
             f'Level: {self.level_name} | Pods: {collected_pods}/{total_pods} | Cost = {score}', 
             False, 
             (255, 255, 255)
         )
-        text_surface = pygame.transform.flip(text_surface, False, True)
-        self.game_window.blit(text_surface, (10, WINDOW_DIMENSIONS[1]+5))
+        # The banner is above the field, its text starts 5 pixels above the top row of tiles
+        banner_rect = pygame.Rect(0, 0, self.game_window.get_width(), self.window_height - self.field_height)
+        self.game_window.fill(BLACK, banner_rect)
+        self.game_window.blit(text_surface, (round(10*self.scale), banner_rect.height - round(5*self.scale) - text_surface.get_height()))
+        return banner_rect
 
     def show_victory_screen(self, score):
-        text_surface = END_FONT.render(f'VICTORY! Total Cost = {score}', True, WHITE)
-        temp_surface = pygame.Surface(text_surface.get_size())
-        temp_surface.fill(BLACK)
-        temp_surface.blit(text_surface, (0, 0))
-        text_rect = text_surface.get_rect(center=(WINDOW_DIMENSIONS[0]//2, WINDOW_DIMENSIONS[1]//2))
-        self.game_window.blit(temp_surface, text_rect)
+        self.draw_end_screen(VICTORY_SCREEN, score)
         pygame.display.update()
 
     def show_loss_screen(self, score):
-        text_surface = END_FONT.render('GAME OVER', True, WHITE)
+        self.draw_end_screen(LOSS_SCREEN, score)
+        pygame.display.update()
+
+    def draw_end_screen(self, end_screen, score):
+        """Draws the VICTORY_SCREEN or LOSS_SCREEN text of an end_screen, without updating the display"""
+        if end_screen == VICTORY_SCREEN:
+            self.draw_end_text(f'VICTORY! Total Cost = {score}')
+        elif end_screen == LOSS_SCREEN:
+            self.draw_end_text('GAME OVER')
+
+    def draw_end_text(self, text):
+        """End screen text centered over the field, drawn without updating the display"""
+        text_surface = get_end_font(self.scale).render(text, True, WHITE)
         temp_surface = pygame.Surface(text_surface.get_size())
         temp_surface.fill(BLACK)
         temp_surface.blit(text_surface, (0, 0))
-        text_rect = text_surface.get_rect(center=(WINDOW_DIMENSIONS[0]//2, WINDOW_DIMENSIONS[1]//2))
+        text_rect = text_surface.get_rect(center=(self.field_width//2, self.field_height//2))
         self.game_window.blit(temp_surface, text_rect)
-        pygame.display.update()
@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+
+
+class FleetAgentInterface(ABC):
+    # Agent that controls a whole fleet of drives with a single decision call per turn
+    # Set to True if get_next_moves depends only on the game state, see DriveInterface.cache_decisions
+    cache_decisions = False
+
+    def __init__(self, drive_ids):
+        self.drive_ids = drive_ids
+
+    @abstractmethod
+    def get_next_moves(self, sensor_data) -> dict:
+        # Returns {drive_id: DriveMove}. Drives missing from the dict do DriveMove.NONE this turn
+        pass
@@ -0,0 +1,7 @@
+from src.DriveInterface import DriveInterface
+
+
+class FleetDrive(DriveInterface):
+    # Drive body on the field for one member of a fleet. Its moves come from FleetAgentInterface.get_next_moves
+    def get_next_move(self, sensor_data):
+        raise Exception('FleetDrive moves are decided by FleetAgentInterface.get_next_moves')
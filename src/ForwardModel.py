@@ -0,0 +1,146 @@
+from src.Constants import SensorData
+
+# Moves a drive can make in one turn, DriveMove.NONE included. Move tables are indexed [cell * NUM_MOVES + move.value]
+NUM_MOVES = 5
+MOVE_OFFSETS = [(0, 0), (0, 1), (0, -1), (1, 0), (-1, 0)] # indexed by DriveMove value: NONE, UP, DOWN, RIGHT, LEFT
+
+
+class ForwardModel:
+    # Compact copy of the Field movement rules for lookahead agents, built from one turn of sensor data.
+    # Cells are flat integer indices (index = x * field_grid_height + y). Occupancy is kept in two bytearrays, one for
+    # drives and one for pods, so a rollout can copy the whole state in a few microseconds and never touches the
+    # Field, GameTile or DriveState objects.
+    # The rules are the ones in Field.will_next_move_crash and Field.process_move_for_drive:
+    #   - leaving the field or moving onto another drive is a crash
+    #   - a drive carrying a pod crashes into any other pod, and its pod moves with it
+    #   - the player crashing ends the game, an AI drive that would crash skips its move instead
+    # Each turn the player moves first and the AI drives follow one after another, each seeing the moves before it.
+    # The AI drives are listed in sensor data order, which need not be the order the orchestrator moves them in.
+    #
+    # Usage:
+    #     model = ForwardModel(width, height)
+    #     model.load(sensor_data, drive_id)
+    #     rollout = model.copy()
+    #     if rollout.move_player(DriveMove.UP.value):
+    #         rollout.move_ai_drives(ai_moves)
+
+    def __init__(self, field_grid_width, field_grid_height, move_targets=None):
+        self.field_grid_width = field_grid_width
+        self.field_grid_height = field_grid_height
+        self.num_cells = field_grid_width * field_grid_height
+        self.move_targets = move_targets if move_targets is not None else self.build_move_table()
+
+        self.drive_cells = bytearray(self.num_cells) # 1 where a drive (the player included) is
+        self.pod_cells = bytearray(self.num_cells) # 1 where a pod is, lifted pods included
+        self.player_cell = -1
+        self.player_carrying = False
+        self.ai_cells = [] # cell of each AI drive
+        self.ai_carrying = [] # True for the AI drives that carry a pod
+
+    def build_move_table(self):
+        # Cell reached by each move from each cell, -1 if the move leaves the field
+        height = self.field_grid_height
+        move_targets = []
+        for x in range(self.field_grid_width):
+            for y in range(height):
+                for dx, dy in MOVE_OFFSETS:
+                    if 0 <= x + dx < self.field_grid_width and 0 <= y + dy < height:
+                        move_targets.append((x + dx) * height + y + dy)
+                    else:
+                        move_targets.append(-1)
+        return move_targets
+
+    def to_index(self, cell):
+        return cell[0] * self.field_grid_height + cell[1]
+
+    def to_cell(self, index):
+        return (index // self.field_grid_height, index % self.field_grid_height)
+
+    def load(self, sensor_data, drive_id):
+        """Reset the model to the state in the sensor data of drive_id, which becomes the player"""
+        self.drive_cells = bytearray(self.num_cells)
+        self.pod_cells = bytearray(self.num_cells)
+        for pod in sensor_data[SensorData.REAL_TIME_POD_LOCATIONS]:
+            self.pod_cells[self.to_index(pod)] = 1
+
+        # A lifted pod is always on the same tile as the drive carrying it
+        pod_locations = sensor_data[SensorData.POD_LOCATIONS_BY_ID]
+        carried_cells = set(
+            self.to_index(pod_locations[pod_id]) for carrier_id, pod_id in sensor_data[SensorData.DRIVE_LIFTED_POD_PAIRS]
+            if carrier_id != drive_id and pod_id in pod_locations
+        )
+        self.player_carrying = any(carrier_id == drive_id for carrier_id, pod_id in sensor_data[SensorData.DRIVE_LIFTED_POD_PAIRS])
+
+        self.player_cell = self.to_index(sensor_data[SensorData.PLAYER_LOCATION])
+        self.drive_cells[self.player_cell] = 1
+        self.ai_cells = []
+        self.ai_carrying = []
+        for drive in sensor_data[SensorData.DRIVE_LOCATIONS]:
+            cell = self.to_index(drive)
+            self.drive_cells[cell] = 1
+            self.ai_cells.append(cell)
+            self.ai_carrying.append(cell in carried_cells)
+
+    def copy(self):
+        model = ForwardModel(self.field_grid_width, self.field_grid_height, self.move_targets)
+        model.drive_cells = self.drive_cells[:]
+        model.pod_cells = self.pod_cells[:]
+        model.player_cell = self.player_cell
+        model.player_carrying = self.player_carrying
+        model.ai_cells = self.ai_cells[:]
+        model.ai_carrying = self.ai_carrying
+        return model
+
+    def is_player_move_valid(self, move):
+        """False if the player would crash making move, a DriveMove value between 0 and 4"""
+        target = self.move_targets[self.player_cell * NUM_MOVES + move]
+        if target == self.player_cell:
+            return True
+        return target != -1 and not self.drive_cells[target] and not (self.player_carrying and self.pod_cells[target])
+
+    def move_player(self, move):
+        """Apply a player move, a DriveMove value between 0 and 4. Returns False and leaves the state as it was if
+        the player would crash"""
+        if not self.is_player_move_valid(move):
+            return False
+        target = self.move_targets[self.player_cell * NUM_MOVES + move]
+        if target != self.player_cell:
+            self.drive_cells[self.player_cell] = 0
+            self.drive_cells[target] = 1
+            if self.player_carrying:
+                self.pod_cells[self.player_cell] = 0
+                self.pod_cells[target] = 1
+            self.player_cell = target
+        return True
+
+    def move_ai_drives(self, ai_moves, offset=0):
+        """Apply one turn of AI moves. ai_moves[offset + i] is the move of AI drive i, only its lowest two bits are
+        used so random bytes give the uniform UP/DOWN/RIGHT/LEFT choice of AIDrive"""
+        move_targets = self.move_targets
+        drive_cells = self.drive_cells
+        pod_cells = self.pod_cells
+        ai_cells = self.ai_cells
+        ai_carrying = self.ai_carrying
+        for i in range(len(ai_cells)):
+            cell = ai_cells[i]
+            target = move_targets[cell * NUM_MOVES + (ai_moves[offset + i] & 3) + 1]
+            if target == -1 or drive_cells[target]:
+                continue
+            if ai_carrying[i]:
+                if pod_cells[target]:
+                    continue
+                pod_cells[cell] = 0
+                pod_cells[target] = 1
+            drive_cells[cell] = 0
+            drive_cells[target] = 1
+            ai_cells[i] = target
+
+    def freeze_ai_drives_beyond(self, cell, distance):
+        """AI drives more than distance moves (Manhattan) from cell keep blocking their tile but no longer move"""
+        x, y = self.to_cell(cell)
+        near = [
+            i for i, ai_cell in enumerate(self.ai_cells)
+            if abs(ai_cell // self.field_grid_height - x) + abs(ai_cell % self.field_grid_height - y) <= distance
+        ]
+        self.ai_cells = [self.ai_cells[i] for i in near]
+        self.ai_carrying = [self.ai_carrying[i] for i in near]
@@ -0,0 +1,109 @@
+# What is drawn on a tile besides the drive: nothing, a pod the drive is under, a pod the drive is carrying, or for
+# tiles without a drive a delivered pod or an uncollected pod (highlighted with an outline)
+NO_POD = 0
+YELLOW_POD = 1
+GREEN_POD = 2
+OUTLINED_POD = 3
+
+# End screen shown over a finished game, passed to the close() of frame listeners like RenderProcess
+VICTORY_SCREEN = 'victory'
+LOSS_SCREEN = 'loss'
+
+
+def get_tile_views(field):
+    """
+    What FieldRenderer draws on each tile that differs from the background, as plain picklable values.
+    key = (x, y), val = (True for the player / False for an AI drive / None without a drive, drive Heading or None,
+    NO_POD/YELLOW_POD/GREEN_POD/OUTLINED_POD, True if the tile shows a crash)
+    Only tiles with a drive or a pod on them are looked at. A crashed player's tile is kept in drive_states_map,
+    so it is covered too
+    """
+    cells = set(drive_state.to_tuple() for drive_state in field.drive_states_map.values())
+    cells.update(tuple(location) for location in field.pod_locations_map.values())
+    tile_views = {}
+    for x, y in cells:
+        tile = field.field_grid[x][y]
+        if tile.drive is not None:
+            if tile.pod is None:
+                pod = NO_POD
+            elif field.is_drive_carrying_a_pod(tile.drive):
+                pod = GREEN_POD
+            else:
+                pod = YELLOW_POD
+            tile_views[(x, y)] = (field.is_drive_player(tile.drive), tile.drive_heading, pod, tile.is_crash)
+        elif tile.pod is not None:
+            pod = YELLOW_POD if str(tile.pod) in field.collected_pods else OUTLINED_POD
+            tile_views[(x, y)] = (None, None, pod, tile.is_crash)
+        elif tile.is_crash:
+            tile_views[(x, y)] = (None, None, NO_POD, True)
+    return tile_views
+
+def get_pod_lines(field):
+    """Line from each pod to its target goal. key = pod id, val = ((x, y) pod cell, (x, y) target goal)"""
+    pod_lines = {}
+    for x, y in field.pod_locations_map.values():
+        pod = field.field_grid[x][y].pod
+        if pod is not None and pod.target_goal:
+            pod_lines[pod.pod_id] = ((x, y), tuple(pod.target_goal))
+    return pod_lines
+
+
+class FrameState:
+    # Everything FieldRenderer needs to draw one frame, without the Field object behind it.
+    # A FrameState can be kept up to date from a stream of deltas (see get_delta / apply_delta), which is how a game
+    # is drawn by a RenderProcess: only the tiles, lines and banner values that changed are sent each turn.
+    # Deltas map a key to its new value, or to None if it is gone, so several deltas merge with dict.update.
+
+    def __init__(self):
+        self.tile_views = {}
+        self.pod_lines = {}
+        self.banner = (0, 0, 0) # (collected pods, total pods, score)
+
+    @staticmethod
+    def from_field(field, score):
+        frame_state = FrameState()
+        frame_state.tile_views = get_tile_views(field)
+        frame_state.pod_lines = get_pod_lines(field)
+        frame_state.banner = (len(field.collected_pods), len(field.pod_locations_map), score)
+        return frame_state
+
+    def copy(self):
+        frame_state = FrameState()
+        frame_state.tile_views = dict(self.tile_views)
+        frame_state.pod_lines = dict(self.pod_lines)
+        frame_state.banner = self.banner
+        return frame_state
+
+    def get_delta(self, previous):
+        """Delta that turns previous into this frame state"""
+        return {
+            'tile_views': get_dict_delta(previous.tile_views, self.tile_views),
+            'pod_lines': get_dict_delta(previous.pod_lines, self.pod_lines),
+            'banner': self.banner
+        }
+
+    def apply_delta(self, delta):
+        apply_dict_delta(self.tile_views, delta['tile_views'])
+        apply_dict_delta(self.pod_lines, delta['pod_lines'])
+        self.banner = delta['banner']
+
+
+def get_dict_delta(previous, current):
+    delta = {key: value for key, value in current.items() if previous.get(key) != value}
+    delta.update((key, None) for key in previous if key not in current)
+    return delta
+
+def apply_dict_delta(values, delta):
+    for key, value in delta.items():
+        if value is None:
+            values.pop(key, None)
+        else:
+            values[key] = value
+
+def merge_deltas(older, newer):
+    """One delta with the effect of applying older and then newer"""
+    return {
+        'tile_views': {**older['tile_views'], **newer['tile_views']},
+        'pod_lines': {**older['pod_lines'], **newer['pod_lines']},
+        'banner': newer['banner']
+    }
@@ -7,8 +7,17 @@ SCORE_BANNER_HEIGHT = 40
 
 FPS_LIMIT = 5
 
+# Used by AsyncGameSimulationOrchestrator. Drives that have not decided by the deadline do DriveMove.NONE for the turn
+AGENT_DECISION_DEADLINE_SEC = 1.0
+
 END_SCREEN_WAIT_TIME_SEC = 3
 
+# Used by RenderProcess. Turns waiting to be drawn, when the queue is full newer turns are merged until there is room
+RENDER_QUEUE_MAX_DELTAS = 8
+
+# Used by MosaicDashboard. Largest window the games are tiled into, each game is scaled down to fit
+DASHBOARD_WINDOW_DIMENSIONS = [1600, 900]
+
 GAME_LEVELS = [
     # GameLevel(name='Level 1 - Collect One Pods',
     #          num_ai_drives=0,
@@ -28,6 +37,7 @@ GAME_LEVELS = [
               sensor_range=-1)
 ]
 
+# Turns a round may last, every drive of a fleet moves once per turn
 MAX_MOVES_PER_ROUND = 1000
 
 POD_PICKUP_PROBABILITY = 0.8
@@ -35,6 +45,19 @@ POD_DROP_PROBABILITY = 0.1
 
 MIN_GOAL_DIST = 10
 
+# Number of future AI moves covered by Field.ai_occupancy_forecast
+AI_OCCUPANCY_FORECAST_HORIZON = 8
+
+# Decisions remembered by the orchestrator for agents with cache_decisions = True, least recently used are dropped first
+DECISION_CACHE_MAX_ENTRIES = 100000
+
+# Turns between two keyframes of a binary replay. Seeking to a turn replays at most this many turns from the keyframe
+# before it, each keyframe costs 4 bytes per drive and 3 per pod
+REPLAY_KEYFRAME_INTERVAL = 64
+
+# Events held by a Telemetry buffer, with a writer they are flushed to it in batches of this size
+TELEMETRY_BUFFER_EVENTS = 4096
+
 class DynamicConfig:
     def __init__(self):
         self.num_pods = 10
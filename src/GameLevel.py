@@ -6,4 +6,5 @@ class GameLevel:
     name: str
     num_ai_drives: int
     num_pods: int  # All pods must be collected
-    sensor_range: int
\ No newline at end of file
+    sensor_range: int
+    num_fleet_drives: int = 1  # Only used when the agent is a FleetAgentInterface
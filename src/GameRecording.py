@@ -0,0 +1,66 @@
+import pickle
+from src.FrameState import FrameState
+
+RECORDING_FORMAT_VERSION = 1
+
+
+class GameRecording:
+    # Every frame of one game, stored as the FrameState deltas a RenderProcess would have been sent, so the game can
+    # be drawn again later (see src/ReplayExporter.py) without re-running the simulation or the agent.
+    # It has the same publish/close interface as RenderProcess and is fed by the orchestrator in the same way.
+    # Frame i is the field after turn i, frame 0 being the first turn. The file written by close() is a pickle, only
+    # load recordings you made yourself.
+
+    def __init__(self, level_name, goals, path=None):
+        self.level_name = level_name
+        self.goals = [tuple(goal) for goal in goals]
+        self.path = path # where close() saves the recording, None to keep it in memory only
+        self.deltas = [] # deltas[i] turns frame i - 1 (an empty field for i = 0) into frame i
+        self.end_screen = None
+        self.final_score = 0
+        self.last_frame_state = FrameState()
+
+    @property
+    def num_frames(self):
+        return len(self.deltas)
+
+    def publish(self, field, score):
+        frame_state = FrameState.from_field(field, score)
+        self.deltas.append(frame_state.get_delta(self.last_frame_state))
+        self.last_frame_state = frame_state
+
+    def close(self, end_screen=None, score=0):
+        self.end_screen = end_screen
+        self.final_score = score
+        if self.path is not None:
+            self.save(self.path)
+
+    def get_frame_state(self, frame):
+        """FrameState of frame, rebuilt from the start of the game"""
+        frame_state = FrameState()
+        for delta in self.deltas[:frame + 1]:
+            frame_state.apply_delta(delta)
+        return frame_state
+
+    def save(self, path):
+        with open(path, 'wb') as recording_file:
+            pickle.dump({
+                'version': RECORDING_FORMAT_VERSION,
+                'level_name': self.level_name,
+                'goals': self.goals,
+                'deltas': self.deltas,
+                'end_screen': self.end_screen,
+                'final_score': self.final_score
+            }, recording_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as recording_file:
+            data = pickle.load(recording_file)
+        if data.get('version') != RECORDING_FORMAT_VERSION:
+            raise Exception(f'Recording {path} has format version {data.get("version")}, expected {RECORDING_FORMAT_VERSION}')
+        recording = GameRecording(data['level_name'], data['goals'])
+        recording.deltas = data['deltas']
+        recording.end_screen = data['end_screen']
+        recording.final_score = data['final_score']
+        return recording
@@ -1,41 +1,74 @@
-import pygame
+import inspect
 import time
 import random
 import math
 import traceback
 from src.AIDrive import AIDrive
+from src.BinaryReplay import BinaryReplayWriter
 from src.Constants import DriveMove
 from src.Field import Field
-from src.FieldRenderer import FieldRenderer
-from src.GameConfig import WINDOW_DIMENSIONS, GRID_BLOCK_DIMENSIONS, SCORE_BANNER_HEIGHT, END_SCREEN_WAIT_TIME_SEC, FPS_LIMIT, MAX_MOVES_PER_ROUND
+from src.FleetAgentInterface import FleetAgentInterface
+from src.FleetDrive import FleetDrive
+from src.FrameState import VICTORY_SCREEN, LOSS_SCREEN
+from src.GameConfig import WINDOW_DIMENSIONS, GRID_BLOCK_DIMENSIONS, END_SCREEN_WAIT_TIME_SEC, FPS_LIMIT, MAX_MOVES_PER_ROUND, DECISION_CACHE_MAX_ENTRIES
 from src.GameIdProvider import GameIdProvider
+from src.GameRecording import GameRecording
+from src.PhaseProfiler import (SENSOR_GENERATION, PLAYER_DECISION, AI_DECISIONS, MOVE_PROCESSING, WIN_CHECK, RENDERING,
+                               CLOCK_WAIT, END_SCREEN)
 from src.Pod import Pod
+from src.RenderProcess import RenderProcess
+from src.Telemetry import NO_TELEMETRY, DECISION_LATENCY, TURN_DURATION
+from src.TranspositionCache import TranspositionCache
 
-class GameSimulationOrchestrator:
-
-    def __init__(self, drive_agent, level):
+# Decisions of agents with cache_decisions = True, shared by every game in the process so that seed sweeps and
+# levels that start the same way reuse them. key = (agent class, sensor range, Field.zobrist_hash)
+DECISION_CACHE = TranspositionCache(DECISION_CACHE_MAX_ENTRIES)
 
-        # Initialise game window
-        pygame.display.set_caption('AR Simulator Game')
-
-        self.game_window = pygame.display.set_mode((WINDOW_DIMENSIONS[0], WINDOW_DIMENSIONS[1] + SCORE_BANNER_HEIGHT))
+class GameSimulationOrchestrator:
 
-        # FPS (frames per second) controller
-        self.game_clock = pygame.time.Clock()
+    def __init__(self, drive_agent, level, render=True, render_process=False, recording_path=None, frame_listeners=None,
+                 replay_path=None, random_seed=None, profiler=None, telemetry=None):
+        """With render=False the game runs headless: no window, no frame rate limit and pygame is never imported.
+        With render_process=True the game is drawn by a RenderProcess and the simulation runs without a frame rate
+        limit either. With a recording_path every frame is saved there as a GameRecording when the game ends.
+        frame_listeners are extra objects sent every frame, like a MosaicDashboard panel.
+        With a replay_path the moves of every turn are written there as a binary replay (see BinaryReplay), random_seed
+        is only stored in it so the game can be traced back to the seed it was played with.
+        With a PhaseProfiler the time of every turn phase is measured, see instrument.
+        Events of the game are recorded in telemetry, a Telemetry that can be shared by several games"""
 
         # Initialize game field
         field_grid_width = math.floor(WINDOW_DIMENSIONS[0]/GRID_BLOCK_DIMENSIONS[0])
         field_grid_height = math.floor(WINDOW_DIMENSIONS[1]/GRID_BLOCK_DIMENSIONS[1])
-        self.field = Field(field_grid_width, field_grid_height)
+        self.telemetry = telemetry if telemetry is not None else NO_TELEMETRY
+        self.telemetry.start_game(level.name)
+        self.field = Field(field_grid_width, field_grid_height, self.telemetry)
         self.field.set_sensor_range(level.sensor_range)
 
         # Initialize game objects
         id_provider = GameIdProvider()
         self.field.spawn_goal(level.num_pods)
         
-        player_id = id_provider.get_new_id()
-        self.player_drive = drive_agent(player_id)
-        self.field.spawn_player(self.player_drive, player_id)
+        if issubclass(drive_agent, FleetAgentInterface):
+            # Fleet mode, one agent decides the moves of every fleet drive each turn
+            if level.num_fleet_drives + level.num_ai_drives > field_grid_width * field_grid_height - level.num_pods:
+                raise Exception(f'Level {level.name} has more drives than free tiles on the field')
+            self.player_drives = [FleetDrive(id_provider.get_new_id()) for i in range(level.num_fleet_drives)]
+            self.fleet_agent = drive_agent([drive.id for drive in self.player_drives])
+            self.player_drive = self.player_drives[0]
+            self.field.spawn_player(self.player_drive, self.player_drive.id)
+            for fleet_drive in self.player_drives[1:]:
+                self.field.spawn_fleet_drive(fleet_drive)
+        else:
+            player_id = id_provider.get_new_id()
+            self.player_drive = drive_agent(player_id)
+            self.player_drives = [self.player_drive]
+            self.fleet_agent = None
+            self.field.spawn_player(self.player_drive, player_id)
+
+        # Per drive accounting, key = drive game id. Agent classes are not required to store their game id as .id
+        self.drive_scores = {self.get_game_id(drive): 0 for drive in self.player_drives}
+        self.crashed_drive_ids = []
 
         self.ai_drive_list = []
         for i in range(level.num_ai_drives):
@@ -47,57 +80,192 @@ class GameSimulationOrchestrator:
         for i in range(level.num_pods):
             self.field.spawn_new_pod(self.field.pod_id_provider.get_new_id())
 
-        # Create game renderer
-        self.renderer = FieldRenderer(self.field, self.game_window, drive_agent, level.name)
+        self.replay_writer = None
+        if replay_path is not None:
+            self.replay_writer = BinaryReplayWriter(replay_path, level, drive_agent.__name__, self.field, self.player_drives,
+                                                    self.ai_drive_list, random_seed)
+
+        # Create game window and renderer. Imported here so that headless games never load pygame
+        self.game_window = None
+        # Objects with publish(field, score) and close(end_screen, score) that are sent every frame
+        self.frame_listeners = list(frame_listeners or [])
+        if render_process:
+            self.frame_listeners.append(RenderProcess(level.name, self.field.goal_coords_list))
+        if recording_path is not None:
+            self.frame_listeners.append(GameRecording(level.name, self.field.goal_coords_list, recording_path))
+        if render and not render_process:
+            from src.GameWindow import GameWindow
+            self.game_window = GameWindow(self.field, drive_agent, level.name)
+
+        if profiler is not None:
+            self.instrument(profiler)
+
+    def instrument(self, profiler):
+        # Each phase is the set of methods below, wrapped on this game's objects only
+        profiler.wrap(self.field, 'generate_sensor_data_for_drive', SENSOR_GENERATION)
+        profiler.wrap(self.field, 'generate_sensor_data_for_fleet', SENSOR_GENERATION)
+        profiler.wrap(self, 'request_player_decision', PLAYER_DECISION)
+        for ai_drive in self.ai_drive_list:
+            profiler.wrap(ai_drive, 'get_next_move', AI_DECISIONS)
+        profiler.wrap(self.field, 'process_move_for_drive', MOVE_PROCESSING)
+        profiler.wrap(self.field, 'is_winning_condition', WIN_CHECK)
+        profiler.wrap(self, 'publish_frame', RENDERING)
+        profiler.wrap(self, 'game_over_win', END_SCREEN)
+        profiler.wrap(self, 'game_over_loss', END_SCREEN)
+        if self.game_window is not None:
+            profiler.wrap(self.game_window, 'handle_events', RENDERING)
+            profiler.wrap(self.game_window, 'draw', RENDERING)
+            profiler.wrap(self.game_window, 'tick', CLOCK_WAIT)
 
     def game_over_win(self, score):
         print(f'VICTORY, Score = {score}')
-        self.renderer.show_victory_screen(score)
-        time.sleep(END_SCREEN_WAIT_TIME_SEC)
+        if self.game_window is not None:
+            self.game_window.show_victory_screen(score)
+            time.sleep(END_SCREEN_WAIT_TIME_SEC)
+        self.close_frame_listeners(VICTORY_SCREEN, score)
 
 
     def game_over_loss(self, score):
         print(f'GAME OVER, Score = {score}')
-        self.renderer.show_loss_screen(score)
-        time.sleep(END_SCREEN_WAIT_TIME_SEC)
+        if self.game_window is not None:
+            self.game_window.show_loss_screen(score)
+            time.sleep(END_SCREEN_WAIT_TIME_SEC)
+        self.close_frame_listeners(LOSS_SCREEN, score)
+
+    def publish_frame(self, score):
+        for frame_listener in self.frame_listeners:
+            frame_listener.publish(self.field, score)
+
+    def record_turn(self, player_moves, ai_moves, score):
+        if self.replay_writer is not None:
+            self.replay_writer.record_turn(player_moves.values(), ai_moves, score)
+
+    def record_turn_telemetry(self, decision_time, turn_duration):
+        # Called after Field.advance_turn, so the turn just played is the one before the current one
+        self.telemetry.record(DECISION_LATENCY, self.field.current_turn - 1, value=decision_time)
+        self.telemetry.record(TURN_DURATION, self.field.current_turn - 1, value=turn_duration)
+
+    def close_frame_listeners(self, end_screen=None, score=0):
+        # The replay writer and telemetry are closed and flushed here too, they end with the game like the frame listeners
+        for frame_listener in self.frame_listeners:
+            frame_listener.close(end_screen, score)
+        self.frame_listeners = []
+        if self.replay_writer is not None:
+            self.replay_writer.close(end_screen, score)
+            self.replay_writer = None
+        self.telemetry.flush()
+
+    def get_game_id(self, drive):
+        return self.field.drive_to_game_id_map[str(drive)]
+
+    def generate_player_sensor_data(self):
+        if self.fleet_agent is None:
+            return self.field.generate_sensor_data_for_drive(self.player_drive)
+        return self.field.generate_sensor_data_for_fleet(self.player_drives)
+
+    def request_player_decision(self, player_sensor_data):
+        # Raw agent output, a DriveMove for a single drive agent or {drive_id: DriveMove} for a fleet agent
+        agent = self.player_drive if self.fleet_agent is None else self.fleet_agent
+        if not getattr(agent, 'cache_decisions', False): # duck typed agents without the interface do not cache
+            return self.call_player_agent(player_sensor_data)
+
+        cache_key = (type(agent), self.field.sensor_range, self.field.zobrist_hash)
+        player_decision = DECISION_CACHE.get(cache_key)
+        if player_decision is None:
+            player_decision = self.call_player_agent(player_sensor_data)
+            if inspect.isawaitable(player_decision):
+                return player_decision # Async decisions are not known yet, so they cannot be cached
+            DECISION_CACHE.put(cache_key, player_decision)
+        return dict(player_decision) if isinstance(player_decision, dict) else player_decision
+
+    def call_player_agent(self, player_sensor_data):
+        if self.fleet_agent is None:
+            return self.player_drive.get_next_move(player_sensor_data)
+        return self.fleet_agent.get_next_moves(player_sensor_data)
+
+    def get_player_moves(self):
+        """Query the player's agent for this turn. Returns {drive: DriveMove}, or None if the agent failed"""
+        try:
+            player_decision = self.request_player_decision(self.generate_player_sensor_data())
+        except Exception as e:
+            print(f'Failed to get next move from player. Exception: {e}')
+            print(traceback.format_exc())
+            return None
+        return self.build_player_moves(player_decision)
+
+    def build_player_moves(self, player_decision):
+        """Map the raw agent output to {drive: DriveMove}. Returns None if the output is invalid"""
+        if self.fleet_agent is None:
+            player_moves = {self.player_drive: player_decision}
+        else:
+            if not isinstance(player_decision, dict):
+                print('Received invalid moves from fleet agent. Moves must be a dict of {drive_id: Constants.DriveMove}')
+                return None
+            player_moves = {drive: player_decision.get(drive.id, DriveMove.NONE) for drive in self.player_drives}
+
+        for player_move in player_moves.values():
+            if not isinstance(player_move, DriveMove):
+                print('Received invalid move from player. Move must be an instance of Constants.DriveMove')
+                return None
+        return player_moves
+
+    def process_player_moves(self, player_moves):
+        # Every player drive follows the same crash rules as a single player drive. Returns False if any drive crashed
+        valid_move = True
+        for drive, move in player_moves.items():
+            if self.field.process_move_for_drive(move, drive):
+                self.drive_scores[self.get_game_id(drive)] += 1
+            else:
+                self.crashed_drive_ids.append(self.get_game_id(drive))
+                valid_move = False
+        return valid_move
+
+    def move_ai_drives(self):
+        """Returns the list of AI moves, in the order of ai_drive_list"""
+        ai_moves = []
+        for ai_drive in self.ai_drive_list:
+            sensor_data = self.field.generate_sensor_data_for_drive(ai_drive)
+            ai_move = ai_drive.get_next_move(sensor_data)
+            self.field.process_move_for_drive(ai_move, ai_drive)
+            ai_moves.append(ai_move)
+        return ai_moves
 
     def run_game(self):
         score = 0
+        turn = 0
 
         while True:
             # Get inputs from player (ignored for simulator)
-            for event in pygame.event.get():
-                pass
+            if self.game_window is not None:
+                self.game_window.handle_events()
 
             # Update all game entities 
+            turn_start = time.perf_counter()
 
-            # Start with the player entity first
-            player_sensor_data = self.field.generate_sensor_data_for_drive(self.player_drive)
-            try:
-                player_move = self.player_drive.get_next_move(player_sensor_data)
-            except Exception as e:
-                print(f'Failed to get next move from player. Exception: {e}')
-                print(traceback.format_exc())
-                return -1
-            if not isinstance(player_move, DriveMove):
-                print('Received invalid move from player. Move must be an instance of Constants.DriveMove')
+            # Start with the player entities first
+            player_moves = self.get_player_moves()
+            decision_time = time.perf_counter() - turn_start
+            if player_moves is None:
+                self.close_frame_listeners()
                 return -1
-            valid_move = self.field.process_move_for_drive(player_move, self.player_drive)
+            valid_move = self.process_player_moves(player_moves)
 
+            ai_moves = None
             if valid_move:
-                score += 1 # counter increments once per turn
+                score += len(player_moves) # counter increments once per turn for each player drive
 
                 # Next move all AI drives
-                for ai_drive in self.ai_drive_list:
-                    sensor_data = self.field.generate_sensor_data_for_drive(ai_drive)
-                    ai_move = ai_drive.get_next_move(sensor_data)
-                    self.field.process_move_for_drive(ai_move, ai_drive)
+                ai_moves = self.move_ai_drives()
 
-            # render new field
-            self.renderer.update_game_window(score)
+            self.field.advance_turn()
+            self.record_turn(player_moves, ai_moves, score)
 
-            # Refresh game screen
-            pygame.display.update()
+            # render new field and refresh game screen
+            if self.game_window is not None:
+                self.game_window.draw(score)
+            self.publish_frame(score)
+            if self.telemetry.turns_enabled:
+                self.record_turn_telemetry(decision_time, time.perf_counter() - turn_start)
 
             # Check for win condition:
             if self.field.is_winning_condition():
@@ -106,16 +274,19 @@ class GameSimulationOrchestrator:
 
             # If the player move was invalid end the game (done after AI moves and UI update to visualize the failure)
             if not valid_move:
-                print('Player colided with another drive or left the field! Game Over')
+                print(f'Player colided with another drive or left the field! Crashed drive ids = {self.crashed_drive_ids}. Game Over')
                 self.game_over_loss(score)
                 score = -1
                 break
          
             # Wait remaining time such that fps does not exceed FPS_LIMIT
-            self.game_clock.tick(FPS_LIMIT)
+            if self.game_window is not None:
+                self.game_window.tick(FPS_LIMIT)
 
-            # Check if max moves has been exceeded
-            if score >= MAX_MOVES_PER_ROUND:
+            # Check if max moves has been exceeded. The limit is on turns, a fleet's score grows by one per drive each
+            # turn and is only the cost
+            turn += 1
+            if turn >= MAX_MOVES_PER_ROUND:
                 print(f'Maximum moves reached: {MAX_MOVES_PER_ROUND}. Ending the round with a failing score')
                 self.game_over_loss(score)
                 return -1
@@ -0,0 +1,38 @@
+import pygame
+from src.FieldRenderer import FieldRenderer
+from src.GameConfig import WINDOW_DIMENSIONS, SCORE_BANNER_HEIGHT
+from src.PygameGraphicsUtils import init_pygame
+
+
+class GameWindow:
+    # The pygame window a game is drawn in. Everything that needs pygame goes through here, and orchestrators only
+    # import this module when a game is rendered, so headless simulations never load pygame at all.
+
+    def __init__(self, field, agent_class, level_name):
+        init_pygame()
+        pygame.display.set_caption('AR Simulator Game')
+        self.surface = pygame.display.set_mode((WINDOW_DIMENSIONS[0], WINDOW_DIMENSIONS[1] + SCORE_BANNER_HEIGHT))
+
+        # FPS (frames per second) controller
+        self.clock = pygame.time.Clock()
+
+        self.renderer = FieldRenderer(field, self.surface, agent_class, level_name)
+
+    def handle_events(self):
+        # Inputs are ignored by the simulator, but the event queue has to be emptied for the window to stay responsive
+        for event in pygame.event.get():
+            pass
+
+    def draw(self, score):
+        dirty_rects = self.renderer.update_game_window(score)
+        pygame.display.update(dirty_rects)
+
+    def tick(self, fps_limit):
+        """Wait the remaining time such that fps does not exceed fps_limit"""
+        self.clock.tick(fps_limit)
+
+    def show_victory_screen(self, score):
+        self.renderer.show_victory_screen(score)
+
+    def show_loss_screen(self, score):
+        self.renderer.show_loss_screen(score)
@@ -0,0 +1,99 @@
+import heapq
+from collections import deque
+import numpy as np
+
+NEIGHBOUR_OFFSETS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+
+class GoalDistanceField:
+    # Shortest path distance from every cell of the field to one goal, computed once with a BFS over the static map.
+    # `distances` is a read-only numpy array indexed [x, y], -1 marks cells that cannot reach the goal.
+    # Other drives and pods move, so they are not part of the static map. get_corrected_path adds them back for a
+    # single query by running A* with the static distances as an exact-when-unblocked heuristic.
+
+    def __init__(self, goal, field_grid_width, field_grid_height, static_obstacles=()):
+        self.goal = (goal[0], goal[1])
+        self.field_grid_width = field_grid_width
+        self.field_grid_height = field_grid_height
+        self.distances = self.compute_distances(set(tuple(cell) for cell in static_obstacles))
+        self.distances.flags.writeable = False
+
+    def compute_distances(self, static_obstacles):
+        # BFS on a flat list (index = x * height + y), converted to a numpy array once at the end
+        height = self.field_grid_height
+        distances = [-1] * (self.field_grid_width * height)
+        distances[self.goal[0] * height + self.goal[1]] = 0
+        queue = deque([self.goal])
+        while queue:
+            x, y = queue.popleft()
+            next_distance = distances[x * height + y] + 1
+            for dx, dy in NEIGHBOUR_OFFSETS:
+                next_x, next_y = x + dx, y + dy
+                if (0 <= next_x < self.field_grid_width and 0 <= next_y < height
+                        and distances[next_x * height + next_y] == -1 and (next_x, next_y) not in static_obstacles):
+                    distances[next_x * height + next_y] = next_distance
+                    queue.append((next_x, next_y))
+        return np.array(distances, dtype=np.int32).reshape(self.field_grid_width, height)
+
+    def is_in_field(self, x, y):
+        return 0 <= x < self.field_grid_width and 0 <= y < self.field_grid_height
+
+    def get_distance(self, cell):
+        """Static shortest path length from cell to the goal, -1 if unreachable or outside the field"""
+        if not self.is_in_field(cell[0], cell[1]):
+            return -1
+        return int(self.distances[cell[0], cell[1]])
+
+    def get_best_next_step(self, cell, blocked_cells=None):
+        """Neighbouring (x, y) cell that is closest to the goal and not in blocked_cells.
+        Returns None at the goal or if every neighbour is blocked"""
+        if (cell[0], cell[1]) == self.goal:
+            return None
+        best_step = None
+        best_distance = -1
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            next_cell = (cell[0] + dx, cell[1] + dy)
+            distance = self.get_distance(next_cell)
+            if distance == -1 or (blocked_cells and next_cell in blocked_cells):
+                continue
+            if best_step is None or distance < best_distance:
+                best_step = next_cell
+                best_distance = distance
+        return best_step
+
+    def get_corrected_path(self, cell, blocked_cells, max_expansions=10000):
+        """Shortest path [cell, ..., goal] that avoids blocked_cells, as a list of (x, y) tuples.
+        Only the area around blocked cells is explored, because the static distance is exact elsewhere.
+        Returns an empty list if the goal cannot be reached within max_expansions"""
+        start = (cell[0], cell[1])
+        if self.get_distance(start) == -1:
+            return []
+        parents = {start: None}
+        g_costs = {start: 0}
+        # Ties on f are broken towards the deepest node, with an exact heuristic that walks straight to the goal
+        queue = [(self.get_distance(start), 0, start)]
+        expansions = 0
+        while queue and expansions < max_expansions:
+            f, negative_g, current = heapq.heappop(queue)
+            g = -negative_g
+            if current == self.goal:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = parents[current]
+                path.reverse()
+                return path
+            if g > g_costs[current]:
+                continue
+            expansions += 1
+            for dx, dy in NEIGHBOUR_OFFSETS:
+                next_cell = (current[0] + dx, current[1] + dy)
+                distance = self.get_distance(next_cell)
+                if distance == -1 or next_cell in blocked_cells:
+                    continue
+                new_g = g + 1
+                if new_g < g_costs.get(next_cell, new_g + 1):
+                    g_costs[next_cell] = new_g
+                    parents[next_cell] = current
+                    heapq.heappush(queue, (new_g + distance, -new_g, next_cell))
+        return []
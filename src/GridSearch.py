@@ -0,0 +1,210 @@
+import heapq
+from array import array
+
+
+class GridSearch:
+    # Shared shortest path searches on the 4-connected field grid, used by the built-in agents.
+    # Cells are flat integer indices (index = x * field_grid_height + y) and the neighbours of every cell are
+    # precomputed once, so field boundaries never have to be checked during a search.
+    # All per-cell state lives in buffers allocated once and reused by every search. Instead of clearing them, each
+    # search takes a new stamp and a cell only counts as seen/closed/goal/blocked if it carries the current stamp.
+    # Heap entries are plain ints that pack (f, tie break, cell index), so a search allocates no per-node objects.
+    #
+    # Usage:
+    #     grid_search = GridSearch(width, height)
+    #     path = grid_search.astar(start, goals, blocked_cells)   # [(x, y), ...], empty if no goal can be reached
+
+    def __init__(self, field_grid_width, field_grid_height):
+        self.field_grid_width = field_grid_width
+        self.field_grid_height = field_grid_height
+        self.num_cells = field_grid_width * field_grid_height
+        self.neighbours = self.build_neighbour_table()
+
+        # Reusable search buffers
+        self.parents = array('i', [-1]) * self.num_cells
+        self.costs = array('l', [0]) * self.num_cells
+        self.seen_stamps = array('L', [0]) * self.num_cells
+        self.closed_stamps = array('L', [0]) * self.num_cells
+        self.goal_stamps = array('L', [0]) * self.num_cells
+        self.blocked_stamps = array('L', [0]) * self.num_cells
+        self.queue = array('i', [0]) * self.num_cells # BFS queue, every cell is enqueued at most once
+        self.stamp = 0
+
+        # Manhattan distance to the nearest goal, filled in lazily per cell and kept while the goals stay the same
+        self.heuristic_values = array('l', [0]) * self.num_cells
+        self.heuristic_stamps = array('L', [0]) * self.num_cells
+        self.heuristic_stamp = 0
+        self.heuristic_goals = None
+        self.heuristic_goal_cells = []
+
+        self.expansions = 0 # cells expanded by the last search
+        self.path_cost = -1 # cost of the last path found, -1 if the last search failed
+
+    def build_neighbour_table(self):
+        height = self.field_grid_height
+        neighbours = []
+        for x in range(self.field_grid_width):
+            for y in range(height):
+                cell_neighbours = []
+                if y + 1 < height:
+                    cell_neighbours.append(x * height + y + 1)
+                if y > 0:
+                    cell_neighbours.append(x * height + y - 1)
+                if x + 1 < self.field_grid_width:
+                    cell_neighbours.append((x + 1) * height + y)
+                if x > 0:
+                    cell_neighbours.append((x - 1) * height + y)
+                neighbours.append(tuple(cell_neighbours))
+        return neighbours
+
+    def is_in_field(self, x, y):
+        return 0 <= x < self.field_grid_width and 0 <= y < self.field_grid_height
+
+    def to_index(self, cell):
+        return cell[0] * self.field_grid_height + cell[1]
+
+    def to_cell(self, index):
+        return (index // self.field_grid_height, index % self.field_grid_height)
+
+    def start_search(self, goals, blocked_cells):
+        # New stamp for this search, then mark goals and blocked cells. Returns the goal indices
+        self.stamp += 1
+        self.expansions = 0
+        self.path_cost = -1
+        stamp = self.stamp
+        for x, y in blocked_cells:
+            if self.is_in_field(x, y):
+                self.blocked_stamps[x * self.field_grid_height + y] = stamp
+        goal_indexes = []
+        for x, y in goals:
+            if self.is_in_field(x, y):
+                index = x * self.field_grid_height + y
+                self.goal_stamps[index] = stamp
+                goal_indexes.append(index)
+        return goal_indexes
+
+    def build_path(self, index):
+        path = []
+        while index != -1:
+            path.append(self.to_cell(index))
+            index = self.parents[index]
+        path.reverse()
+        return path
+
+    def set_heuristic_goals(self, goal_indexes):
+        # Changing the goals invalidates every cached heuristic value at once
+        goal_set = frozenset(goal_indexes)
+        if goal_set != self.heuristic_goals:
+            self.heuristic_goals = goal_set
+            self.heuristic_goal_cells = [self.to_cell(index) for index in goal_set]
+            self.heuristic_stamp += 1
+
+    def get_heuristic(self, index):
+        """Manhattan distance from a cell index to the nearest goal of the last A* search"""
+        if self.heuristic_stamps[index] != self.heuristic_stamp:
+            x, y = divmod(index, self.field_grid_height)
+            self.heuristic_values[index] = min(abs(x - goal_x) + abs(y - goal_y) for goal_x, goal_y in self.heuristic_goal_cells)
+            self.heuristic_stamps[index] = self.heuristic_stamp
+        return self.heuristic_values[index]
+
+    def bfs(self, start, goals, blocked_cells=()):
+        """Shortest path [start, ..., nearest goal] with every move costing 1, empty if no goal can be reached"""
+        goal_indexes = self.start_search(goals, blocked_cells)
+        if not goal_indexes or not self.is_in_field(start[0], start[1]):
+            return []
+        stamp = self.stamp
+        neighbours = self.neighbours
+        parents = self.parents
+        costs = self.costs
+        seen_stamps = self.seen_stamps
+        blocked_stamps = self.blocked_stamps
+        goal_stamps = self.goal_stamps
+        queue = self.queue
+
+        start_index = self.to_index(start)
+        parents[start_index] = -1
+        costs[start_index] = 0
+        seen_stamps[start_index] = stamp
+        queue[0] = start_index
+        head = 0
+        tail = 1
+        while head < tail:
+            index = queue[head]
+            head += 1
+            self.expansions += 1
+            if goal_stamps[index] == stamp:
+                self.path_cost = costs[index]
+                return self.build_path(index)
+            next_cost = costs[index] + 1
+            for neighbour in neighbours[index]:
+                if seen_stamps[neighbour] != stamp and blocked_stamps[neighbour] != stamp:
+                    seen_stamps[neighbour] = stamp
+                    parents[neighbour] = index
+                    costs[neighbour] = next_cost
+                    queue[tail] = neighbour
+                    tail += 1
+        return []
+
+    def dijkstra(self, start, goals, blocked_cells=(), cell_costs=None):
+        """Cheapest path [start, ..., nearest goal]. cell_costs[index] is the cost of entering a cell (1 if None),
+        it must be an int of at least 1"""
+        return self.search(start, goals, blocked_cells, cell_costs, use_heuristic=False)
+
+    def astar(self, start, goals, blocked_cells=(), cell_costs=None):
+        """Same result as dijkstra, guided by the Manhattan distance to the nearest goal.
+        cell_costs must be ints of at least 1 everywhere, which also keeps the heuristic admissible"""
+        return self.search(start, goals, blocked_cells, cell_costs, use_heuristic=True)
+
+    def search(self, start, goals, blocked_cells, cell_costs, use_heuristic):
+        goal_indexes = self.start_search(goals, blocked_cells)
+        if not goal_indexes or not self.is_in_field(start[0], start[1]):
+            return []
+        stamp = self.stamp
+        neighbours = self.neighbours
+        parents = self.parents
+        costs = self.costs
+        seen_stamps = self.seen_stamps
+        closed_stamps = self.closed_stamps
+        blocked_stamps = self.blocked_stamps
+        goal_stamps = self.goal_stamps
+        if use_heuristic:
+            self.set_heuristic_goals(goal_indexes)
+        get_heuristic = self.get_heuristic
+        num_cells = self.num_cells
+
+        # Heap entry = (f * tie_span + tie_span - 1 - g) * num_cells + index. Equal f values pop the deepest cell
+        # first, which walks straight along one of the many equally short paths of an open grid
+        max_cell_cost = 1
+        if cell_costs is not None:
+            if any(type(cost) is not int for cost in cell_costs) or min(cell_costs) < 1:
+                raise Exception('cell_costs must be ints of at least 1')
+            max_cell_cost = max(cell_costs)
+        tie_span = num_cells * max_cell_cost + 1
+
+        start_index = self.to_index(start)
+        parents[start_index] = -1
+        costs[start_index] = 0
+        seen_stamps[start_index] = stamp
+        start_f = get_heuristic(start_index) if use_heuristic else 0
+        queue = [(start_f * tie_span + tie_span - 1) * num_cells + start_index]
+        while queue:
+            index = heapq.heappop(queue) % num_cells
+            if closed_stamps[index] == stamp:
+                continue
+            closed_stamps[index] = stamp
+            self.expansions += 1
+            if goal_stamps[index] == stamp:
+                self.path_cost = costs[index]
+                return self.build_path(index)
+            g = costs[index]
+            for neighbour in neighbours[index]:
+                if closed_stamps[neighbour] == stamp or blocked_stamps[neighbour] == stamp:
+                    continue
+                new_g = g + (cell_costs[neighbour] if cell_costs is not None else 1)
+                if seen_stamps[neighbour] != stamp or new_g < costs[neighbour]:
+                    seen_stamps[neighbour] = stamp
+                    costs[neighbour] = new_g
+                    parents[neighbour] = index
+                    f = new_g + get_heuristic(neighbour) if use_heuristic else new_g
+                    heapq.heappush(queue, (f * tie_span + tie_span - 1 - new_g) * num_cells + neighbour)
+        return []
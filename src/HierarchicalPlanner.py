@@ -0,0 +1,265 @@
+import heapq
+from collections import deque
+
+NEIGHBOUR_OFFSETS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+# Borders shorter than this get one entrance in the middle, longer ones get one at each end (Botea et al. 2004)
+MAX_SINGLE_ENTRANCE_LENGTH = 6
+
+
+class HierarchicalPlanner:
+    # Hierarchical path planner (HPA*, Botea, Mueller & Schaeffer 2004) for very large fields.
+    # The field is split into square clusters. Free runs of cells along each border between two clusters become
+    # entrances, and the distances between all entrances of a cluster are precomputed with a BFS inside the cluster.
+    # Long range queries run A* on this small abstract graph, and only the first few steps are refined into cells.
+    # The graph is built from obstacles that rarely move, like pods. update_cells rebuilds only the clusters containing
+    # the changed cells (and the borders they share), which is far too slow to do for drives that move every turn.
+    # Drives are passed to each query as dynamic_blocked instead: the start is connected to its cluster's entrances
+    # around them and the refined steps avoid them, while the abstract route ignores them since they will have moved
+    # by the time the route gets there.
+
+    def __init__(self, field_grid_width, field_grid_height, blocked_cells=(), cluster_size=10):
+        self.field_grid_width = field_grid_width
+        self.field_grid_height = field_grid_height
+        self.cluster_size = cluster_size
+        self.num_clusters_x = (field_grid_width + cluster_size - 1) // cluster_size
+        self.num_clusters_y = (field_grid_height + cluster_size - 1) // cluster_size
+        self.blocked = set(tuple(cell) for cell in blocked_cells)
+
+        self.border_transitions = {} # key = (cluster, neighbouring cluster to the right or above), val = list of (cell, cell) pairs
+        self.transition_pairs = set() # (cell, cell) for every inter-cluster edge, in both directions
+        self.cluster_nodes = {} # key = cluster, val = set of entrance cells inside the cluster
+        self.intra_edges = {} # key = cluster, val = {entrance cell: {other entrance cell: distance inside the cluster}}
+        self.rebuilt_clusters = 0 # clusters rebuilt by the last update_cells call
+
+        for cluster_x in range(self.num_clusters_x):
+            for cluster_y in range(self.num_clusters_y):
+                if cluster_x + 1 < self.num_clusters_x:
+                    self.build_border((cluster_x, cluster_y), (cluster_x + 1, cluster_y))
+                if cluster_y + 1 < self.num_clusters_y:
+                    self.build_border((cluster_x, cluster_y), (cluster_x, cluster_y + 1))
+        for cluster_x in range(self.num_clusters_x):
+            for cluster_y in range(self.num_clusters_y):
+                self.build_cluster((cluster_x, cluster_y))
+
+    def get_cluster(self, cell):
+        return (cell[0] // self.cluster_size, cell[1] // self.cluster_size)
+
+    def get_cluster_bounds(self, cluster):
+        min_x = cluster[0] * self.cluster_size
+        min_y = cluster[1] * self.cluster_size
+        return min_x, min(min_x + self.cluster_size, self.field_grid_width), min_y, min(min_y + self.cluster_size, self.field_grid_height)
+
+    def is_free(self, x, y):
+        return 0 <= x < self.field_grid_width and 0 <= y < self.field_grid_height and (x, y) not in self.blocked
+
+    def build_border(self, cluster, other_cluster):
+        # Replace the entrances on the border between cluster and the cluster to its right or above it
+        for cell, other_cell in self.border_transitions.get((cluster, other_cluster), []):
+            self.transition_pairs.discard((cell, other_cell))
+            self.transition_pairs.discard((other_cell, cell))
+
+        min_x, max_x, min_y, max_y = self.get_cluster_bounds(cluster)
+        if other_cluster[0] != cluster[0]:
+            border_pairs = [((max_x - 1, y), (max_x, y)) for y in range(min_y, max_y)]
+        else:
+            border_pairs = [((x, max_y - 1), (x, max_y)) for x in range(min_x, max_x)]
+
+        transitions = []
+        run = []
+        for cell, other_cell in border_pairs + [(None, None)]:
+            if cell is not None and self.is_free(*cell) and self.is_free(*other_cell):
+                run.append((cell, other_cell))
+                continue
+            if len(run) > MAX_SINGLE_ENTRANCE_LENGTH:
+                transitions.append(run[0])
+                transitions.append(run[-1])
+            elif run:
+                transitions.append(run[len(run) // 2])
+            run = []
+
+        self.border_transitions[(cluster, other_cluster)] = transitions
+        for cell, other_cell in transitions:
+            self.transition_pairs.add((cell, other_cell))
+            self.transition_pairs.add((other_cell, cell))
+
+    def get_cluster_borders(self, cluster):
+        cluster_x, cluster_y = cluster
+        borders = []
+        if cluster_x > 0:
+            borders.append(((cluster_x - 1, cluster_y), cluster))
+        if cluster_x + 1 < self.num_clusters_x:
+            borders.append((cluster, (cluster_x + 1, cluster_y)))
+        if cluster_y > 0:
+            borders.append(((cluster_x, cluster_y - 1), cluster))
+        if cluster_y + 1 < self.num_clusters_y:
+            borders.append((cluster, (cluster_x, cluster_y + 1)))
+        return borders
+
+    def build_cluster(self, cluster):
+        # Collect the cluster's entrance cells and the distances between them inside the cluster
+        nodes = set()
+        for border in self.get_cluster_borders(cluster):
+            for cell, other_cell in self.border_transitions[border]:
+                nodes.add(cell if self.get_cluster(cell) == cluster else other_cell)
+        self.cluster_nodes[cluster] = nodes
+
+        # Distances are symmetric, so each BFS only has to look for the nodes after it
+        ordered_nodes = sorted(nodes)
+        edges = {node: {} for node in ordered_nodes}
+        for i, node in enumerate(ordered_nodes):
+            later_nodes = set(ordered_nodes[i + 1:])
+            if not later_nodes:
+                break
+            distances, parents = self.search_in_cluster(node, cluster, targets=later_nodes)
+            for other_node in later_nodes:
+                if other_node in distances:
+                    edges[node][other_node] = distances[other_node]
+                    edges[other_node][node] = distances[other_node]
+        self.intra_edges[cluster] = edges
+
+    def search_in_cluster(self, start, cluster, targets=None, dynamic_blocked=()):
+        """BFS from start that never leaves the cluster or enters a cell in dynamic_blocked. Returns (distances, parents).
+        Stops early once every cell in targets has been reached"""
+        min_x, max_x, min_y, max_y = self.get_cluster_bounds(cluster)
+        blocked = self.blocked
+        distances = {start: 0}
+        parents = {start: None}
+        remaining = len(targets) - (start in targets) if targets else -1
+        queue = deque([start])
+        while queue and remaining != 0:
+            cell = queue.popleft()
+            x, y = cell
+            next_distance = distances[cell] + 1
+            for next_cell in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y)):
+                if (min_x <= next_cell[0] < max_x and min_y <= next_cell[1] < max_y
+                        and next_cell not in distances and next_cell not in blocked and next_cell not in dynamic_blocked):
+                    distances[next_cell] = next_distance
+                    parents[next_cell] = cell
+                    queue.append(next_cell)
+                    if targets and next_cell in targets:
+                        remaining -= 1
+        return distances, parents
+
+    def update_cells(self, changed_cells):
+        """Apply occupancy changes, changed_cells = {(x, y): is_blocked}. Rebuilds only the touched clusters"""
+        dirty_clusters = set()
+        for cell, is_blocked in changed_cells.items():
+            cell = (cell[0], cell[1])
+            if not (0 <= cell[0] < self.field_grid_width and 0 <= cell[1] < self.field_grid_height):
+                continue
+            if (cell in self.blocked) == bool(is_blocked):
+                continue
+            if is_blocked:
+                self.blocked.add(cell)
+            else:
+                self.blocked.discard(cell)
+            dirty_clusters.add(self.get_cluster(cell))
+
+        # Borders of dirty clusters may gain or lose entrances, which changes the neighbouring clusters' nodes too
+        clusters_to_rebuild = set(dirty_clusters)
+        rebuilt_borders = set()
+        for cluster in dirty_clusters:
+            for border in self.get_cluster_borders(cluster):
+                if border not in rebuilt_borders:
+                    old_transitions = self.border_transitions[border]
+                    self.build_border(*border)
+                    rebuilt_borders.add(border)
+                    if self.border_transitions[border] != old_transitions:
+                        clusters_to_rebuild.update(border)
+        for cluster in clusters_to_rebuild:
+            self.build_cluster(cluster)
+        self.rebuilt_clusters = len(clusters_to_rebuild)
+
+    def find_abstract_path(self, start, goal, dynamic_blocked=()):
+        """Waypoints [start, entrance cells..., goal] of the best route on the abstract graph, empty if unreachable.
+        Cells in dynamic_blocked only block the way from start to the entrances of its cluster"""
+        start = (start[0], start[1])
+        goal = (goal[0], goal[1])
+        if not self.is_free(*goal):
+            return []
+        start_cluster = self.get_cluster(start)
+        goal_cluster = self.get_cluster(goal)
+
+        # Temporarily connect start and goal to the entrances of their clusters
+        start_distances, start_parents = self.search_in_cluster(start, start_cluster, dynamic_blocked=dynamic_blocked)
+        start_edges = {node: start_distances[node] for node in self.cluster_nodes[start_cluster] if node in start_distances}
+        if goal_cluster == start_cluster and goal in start_distances:
+            start_edges[goal] = start_distances[goal]
+        goal_distances, goal_parents = self.search_in_cluster(goal, goal_cluster)
+        goal_edges = {node: goal_distances[node] for node in self.cluster_nodes[goal_cluster] if node in goal_distances}
+
+        parents = {start: None}
+        g_costs = {start: 0}
+        queue = [(abs(start[0] - goal[0]) + abs(start[1] - goal[1]), 0, start)]
+        closed = set()
+        while queue:
+            f, g, node = heapq.heappop(queue)
+            if node == goal:
+                abstract_path = []
+                while node is not None:
+                    abstract_path.append(node)
+                    node = parents[node]
+                abstract_path.reverse()
+                return abstract_path
+            if node in closed:
+                continue
+            closed.add(node)
+            for next_node, cost in self.get_abstract_edges(node, start, start_edges, goal, goal_edges):
+                new_g = g + cost
+                if next_node not in closed and new_g < g_costs.get(next_node, new_g + 1):
+                    g_costs[next_node] = new_g
+                    parents[next_node] = node
+                    heapq.heappush(queue, (new_g + abs(next_node[0] - goal[0]) + abs(next_node[1] - goal[1]), new_g, next_node))
+        return []
+
+    def get_abstract_edges(self, node, start, start_edges, goal, goal_edges):
+        if node == start:
+            edges = list(start_edges.items())
+        else:
+            edges = list(self.intra_edges[self.get_cluster(node)].get(node, {}).items())
+            if node in goal_edges:
+                edges.append((goal, goal_edges[node]))
+        for dx, dy in NEIGHBOUR_OFFSETS:
+            next_cell = (node[0] + dx, node[1] + dy)
+            if (node, next_cell) in self.transition_pairs:
+                edges.append((next_cell, 1))
+        return edges
+
+    def find_path(self, start, goal, refine_steps=10, dynamic_blocked=()):
+        """Cells [start, ...] for at least refine_steps moves along the abstract route (the whole path if shorter).
+        Refined steps go around the cells in dynamic_blocked (other drives), refining stops early at a waypoint they
+        cut off. Returns an empty list if the goal is unreachable"""
+        dynamic_blocked = set(tuple(cell) for cell in dynamic_blocked)
+        dynamic_blocked.discard((start[0], start[1]))
+        abstract_path = self.find_abstract_path(start, goal, dynamic_blocked)
+        if not abstract_path:
+            return []
+        path = [abstract_path[0]]
+        for waypoint in abstract_path[1:]:
+            current = path[-1]
+            if waypoint in dynamic_blocked:
+                break
+            if abs(current[0] - waypoint[0]) + abs(current[1] - waypoint[1]) == 1:
+                path.append(waypoint)
+            else:
+                distances, parents = self.search_in_cluster(current, self.get_cluster(current), targets=(waypoint,),
+                                                            dynamic_blocked=dynamic_blocked)
+                if waypoint not in distances:
+                    break
+                segment = []
+                cell = waypoint
+                while cell != current:
+                    segment.append(cell)
+                    cell = parents[cell]
+                path.extend(reversed(segment))
+            if len(path) - 1 >= refine_steps:
+                break
+        return path
+
+    def get_next_step(self, start, goal, dynamic_blocked=()):
+        """Next (x, y) cell towards the goal, None if at the goal, unreachable or cut off by dynamic_blocked this turn"""
+        path = self.find_path(start, goal, refine_steps=1, dynamic_blocked=dynamic_blocked)
+        if len(path) < 2:
+            return None
+        return path[1]
@@ -0,0 +1,126 @@
+import random
+import time
+from src.Constants import DriveMove, SensorData
+from src.ForwardModel import ForwardModel, NUM_MOVES
+from src.GoalDistanceField import GoalDistanceField
+from src.YourAgent import YourAgent
+from typing import List, Optional, Tuple
+
+# Turns simulated by each rollout, the first move included
+ROLLOUT_HORIZON = 8
+
+# Time spent on rollouts each turn. Every candidate move gets at least MIN_ROLLOUTS_PER_MOVE rollouts, even if that
+# takes longer
+ROLLOUT_TIME_BUDGET_SEC = 0.05
+MIN_ROLLOUTS_PER_MOVE = 16
+MAX_ROLLOUTS_PER_MOVE = 2000
+
+# Distance used for cells that cannot reach the target, large enough that any other cell is preferred
+UNREACHABLE_DISTANCE = 10 ** 4
+
+CANDIDATE_MOVES = [DriveMove.UP, DriveMove.DOWN, DriveMove.RIGHT, DriveMove.LEFT, DriveMove.NONE]
+
+
+class MonteCarloAgent(YourAgent):
+    # Sampling-based lookahead agent. It picks pods and plans paths like YourAgent, but when an AI drive is close
+    # enough to matter, the next step is chosen by simulating the next ROLLOUT_HORIZON turns many times on a
+    # ForwardModel, with the AI drives moving uniformly at random like AIDrive does.
+    # Each rollout makes one candidate move, then walks greedily down the distance field of the target (waiting when
+    # every closer tile is taken) and costs the turns used plus the distance still left at the end. The move with the
+    # lowest total cost wins. Every candidate move is scored against the same sampled AI moves, so the comparison
+    # between moves is not drowned out by the AI randomness.
+    # The agent has its own random.Random, so sampling never changes the moves of the AI drives in the game.
+
+    def __init__(self, drive_id: int):
+        super().__init__(drive_id)
+        self.rng = random.Random(drive_id)
+        self.forward_model: Optional[ForwardModel] = None
+
+        # Distance field of the current target, as a flat list indexed like ForwardModel cells
+        self.distance_key = None
+        self.distances: List[int] = []
+
+        self.rollouts = 0 # rollouts run on the last turn
+
+    def get_forward_model(self, sensor_data: dict) -> ForwardModel:
+        if self.forward_model is None:
+            self.forward_model = ForwardModel(*sensor_data[SensorData.FIELD_DIMENSIONS])
+        return self.forward_model
+
+    def get_distances(self, goal: Tuple[int, int], sensor_data: dict, carrying_pod: bool) -> List[int]:
+        """Distances to goal around the pods we cannot pass, rebuilt only when the goal or those pods change"""
+        obstacles = frozenset(
+            tuple(pod) for pod in sensor_data[SensorData.REAL_TIME_POD_LOCATIONS]
+            if carrying_pod and tuple(pod) != tuple(sensor_data[SensorData.PLAYER_LOCATION])
+        )
+        if (goal, obstacles) != self.distance_key:
+            width, height = sensor_data[SensorData.FIELD_DIMENSIONS]
+            distance_field = GoalDistanceField(goal, width, height, obstacles)
+            self.distances = [
+                distance if distance >= 0 else UNREACHABLE_DISTANCE for distance in distance_field.distances.ravel().tolist()
+            ]
+            self.distance_key = (goal, obstacles)
+        return self.distances
+
+    def get_move_along_path(
+        self, player_pos: Tuple[int, int], path: List[Tuple[int, int]], sensor_data: dict, carrying_pod: bool
+    ) -> DriveMove:
+        """Next step towards the end of the path, picked by rollouts when AI drives are nearby"""
+        path_move = super().get_move_along_path(player_pos, path, sensor_data, carrying_pod)
+        self.rollouts = 0
+
+        model = self.get_forward_model(sensor_data)
+        model.load(sensor_data, self.drive_id)
+        # Drives and the player each move at most one tile per turn, drives further away cannot meet us in time
+        model.freeze_ai_drives_beyond(model.player_cell, 2 * ROLLOUT_HORIZON)
+        if not model.ai_cells:
+            return path_move
+
+        candidates = [path_move] + [move for move in CANDIDATE_MOVES if move != path_move]
+        candidates = [move for move in candidates if model.is_player_move_valid(move.value)]
+        goal_cell = model.to_index(path[-1])
+        distances = self.get_distances(path[-1], sensor_data, carrying_pod)
+
+        totals = [0] * len(candidates)
+        rounds = 0
+        deadline = time.perf_counter() + ROLLOUT_TIME_BUDGET_SEC
+        while rounds < MIN_ROLLOUTS_PER_MOVE or (rounds < MAX_ROLLOUTS_PER_MOVE and time.perf_counter() < deadline):
+            ai_moves = self.rng.randbytes(ROLLOUT_HORIZON * len(model.ai_cells))
+            for i, move in enumerate(candidates):
+                totals[i] += self.rollout(model, move.value, ai_moves, distances, goal_cell)
+            rounds += 1
+        self.rollouts = rounds * len(candidates)
+
+        # Ties keep the planned path move, it is first in the candidates
+        best = min(range(len(candidates)), key=lambda i: totals[i])
+        return candidates[best]
+
+    def rollout(self, model: ForwardModel, first_move: int, ai_moves: bytes, distances: List[int], goal_cell: int) -> int:
+        """Cost of making first_move and then walking greedily towards goal_cell for the rest of the horizon"""
+        state = model.copy()
+        state.move_player(first_move)
+        if state.player_cell == goal_cell:
+            return 1
+        num_ai = len(state.ai_cells)
+        state.move_ai_drives(ai_moves, 0)
+
+        move_targets = state.move_targets
+        drive_cells = state.drive_cells
+        pod_cells = state.pod_cells
+        carrying = state.player_carrying
+        for step in range(1, ROLLOUT_HORIZON):
+            cell = state.player_cell
+            best_move = 0
+            best_distance = distances[cell]
+            for move in (1, 2, 3, 4):
+                target = move_targets[cell * NUM_MOVES + move]
+                if target == -1 or drive_cells[target] or (carrying and pod_cells[target]):
+                    continue
+                if distances[target] < best_distance:
+                    best_move = move
+                    best_distance = distances[target]
+            state.move_player(best_move)
+            if state.player_cell == goal_cell:
+                return step + 1
+            state.move_ai_drives(ai_moves, step * num_ai)
+        return ROLLOUT_HORIZON + distances[state.player_cell]
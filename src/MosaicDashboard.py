@@ -0,0 +1,252 @@
+import math
+import multiprocessing
+import os
+import queue
+import time
+from src.FrameState import FrameState, merge_deltas, LOSS_SCREEN
+from src.GameConfig import (WINDOW_DIMENSIONS, GRID_BLOCK_DIMENSIONS, SCORE_BANNER_HEIGHT, DASHBOARD_WINDOW_DIMENSIONS,
+                            FPS_LIMIT, END_SCREEN_WAIT_TIME_SEC, RENDER_QUEUE_MAX_DELTAS)
+from src.RenderProcess import RENDER_PROCESS_EXIT_TIMEOUT_SEC
+
+# Pixels between two games on the dashboard
+DASHBOARD_PANEL_GAP = 4
+
+worker_dashboard_queue = None # the dashboard queue of a game process, set by init_dashboard_worker
+
+
+def get_mosaic_layout(num_games, columns=None):
+    """
+    Where each game goes on the dashboard. Games are tiled in a grid of `columns` columns (about square by default)
+    and scaled down by the same amount until the grid fits in DASHBOARD_WINDOW_DIMENSIONS.
+    Returns ((tile width, tile height), [(x, y, width, height) of each game], (window width, window height))
+    """
+    columns = columns or math.ceil(math.sqrt(num_games))
+    rows = math.ceil(num_games / columns)
+    full_width = WINDOW_DIMENSIONS[0]
+    full_height = WINDOW_DIMENSIONS[1] + SCORE_BANNER_HEIGHT
+    scale = min(1,
+                (DASHBOARD_WINDOW_DIMENSIONS[0] - DASHBOARD_PANEL_GAP * (columns - 1)) / (columns * full_width),
+                (DASHBOARD_WINDOW_DIMENSIONS[1] - DASHBOARD_PANEL_GAP * (rows - 1)) / (rows * full_height))
+
+    # Whole pixel tiles, so the grid lines and sprites stay sharp
+    tile_size = (max(2, math.floor(GRID_BLOCK_DIMENSIONS[0] * scale)), max(2, math.floor(GRID_BLOCK_DIMENSIONS[1] * scale)))
+    panel_width = WINDOW_DIMENSIONS[0] // GRID_BLOCK_DIMENSIONS[0] * tile_size[0]
+    panel_height = WINDOW_DIMENSIONS[1] // GRID_BLOCK_DIMENSIONS[1] * tile_size[1] + \
+        round(SCORE_BANNER_HEIGHT * tile_size[1] / GRID_BLOCK_DIMENSIONS[1])
+
+    panel_rects = []
+    for index in range(num_games):
+        row, column = divmod(index, columns)
+        panel_rects.append((column * (panel_width + DASHBOARD_PANEL_GAP), row * (panel_height + DASHBOARD_PANEL_GAP),
+                            panel_width, panel_height))
+    window_size = (min(num_games, columns) * (panel_width + DASHBOARD_PANEL_GAP) - DASHBOARD_PANEL_GAP,
+                   rows * (panel_height + DASHBOARD_PANEL_GAP) - DASHBOARD_PANEL_GAP)
+    return tile_size, panel_rects, window_size
+
+
+class DashboardPanel:
+    # One game's connection to a MosaicDashboard. Pass it to the game's orchestrator in frame_listeners, it sends the
+    # dashboard the changes of every turn the same way RenderProcess.publish does, without ever blocking on the queue.
+    # Headless games have no frame rate limit, so with a fps_limit the panel paces the game itself: publish waits until
+    # 1 / fps_limit has passed since the previous turn. With fps_limit=None games run as fast as they can.
+
+    def __init__(self, dashboard_queue, index, fps_limit=FPS_LIMIT):
+        self.queue = dashboard_queue
+        self.index = index
+        self.fps_limit = fps_limit
+        self.started = False
+        self.is_connected = True
+        self.frame_state = FrameState()
+        self.pending_delta = None
+        self.last_publish_time = None
+
+    def publish(self, field, score):
+        if self.fps_limit:
+            if self.last_publish_time is not None:
+                time.sleep(max(0, 1 / self.fps_limit - (time.perf_counter() - self.last_publish_time)))
+            self.last_publish_time = time.perf_counter()
+        if not self.started:
+            # The dashboard cannot draw the game before it knows the goals, so this one waits for room in the queue
+            self.started = True
+            try:
+                self.queue.put(('start', self.index, [tuple(goal) for goal in field.goal_coords_list]),
+                               timeout=RENDER_PROCESS_EXIT_TIMEOUT_SEC)
+            except queue.Full:
+                print('Dashboard is not responding, game not shown')
+                self.is_connected = False
+        if not self.is_connected:
+            return
+        frame_state = FrameState.from_field(field, score)
+        delta = frame_state.get_delta(self.frame_state)
+        self.frame_state = frame_state
+        if self.pending_delta is not None:
+            delta = merge_deltas(self.pending_delta, delta)
+        try:
+            self.queue.put_nowait(('delta', self.index, delta))
+            self.pending_delta = None
+        except queue.Full:
+            self.pending_delta = delta
+
+    def close(self, end_screen=None, score=0):
+        if not self.is_connected:
+            return
+        try:
+            if self.pending_delta is not None:
+                self.queue.put(('delta', self.index, self.pending_delta), timeout=RENDER_PROCESS_EXIT_TIMEOUT_SEC)
+                self.pending_delta = None
+            self.queue.put(('end', self.index, end_screen, score), timeout=RENDER_PROCESS_EXIT_TIMEOUT_SEC)
+        except queue.Full:
+            print('Dashboard is not responding, game end not shown')
+
+
+class MosaicDashboard:
+    # One window that shows many games at once, each scaled down into its own tile of the window.
+    # The games run in their own processes and send their changes through DashboardPanel objects to a single
+    # dashboard process. That process draws each game with a FieldRenderer on a subsurface of the window, all with the
+    # same scaled SpriteAtlas, and updates the window with one display flip per frame however many games there are.
+    # Like RenderProcess the dashboard is a spawned process, scripts using it need an `if __name__ == '__main__':` guard.
+
+    def __init__(self, titles, columns=None, fps_limit=FPS_LIMIT):
+        context = multiprocessing.get_context('spawn')
+        self.queue = context.Queue(RENDER_QUEUE_MAX_DELTAS * len(titles))
+        self.fps_limit = fps_limit
+        self.process = context.Process(target=run_dashboard_process, args=(self.queue, titles, columns, fps_limit), daemon=True)
+        self.process.start()
+
+    def get_panel(self, index):
+        """Frame listener for the game shown in tile `index`, the game with titles[index], paced at the dashboard's fps_limit"""
+        return DashboardPanel(self.queue, index, self.fps_limit)
+
+    def close(self):
+        """Shows the end screens of the games for END_SCREEN_WAIT_TIME_SEC, then closes the window"""
+        try:
+            self.queue.put(('close',), timeout=RENDER_PROCESS_EXIT_TIMEOUT_SEC)
+        except queue.Full:
+            print('Dashboard is not responding, stopping it')
+        self.process.join(END_SCREEN_WAIT_TIME_SEC + RENDER_PROCESS_EXIT_TIMEOUT_SEC)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def run_dashboard_process(dashboard_queue, titles, columns, fps_limit):
+    # Entry point of the dashboard process. pygame and the renderer are imported here so that importing this module
+    # in the game processes does not load them
+    import pygame
+    import time
+    from src.FieldRenderer import FieldRenderer
+    from src.PygameGraphicsUtils import init_pygame, BLACK
+
+    init_pygame()
+    tile_size, panel_rects, window_size = get_mosaic_layout(len(titles), columns)
+    pygame.display.set_caption('AR Simulator Dashboard')
+    window = pygame.display.set_mode(window_size)
+    window.fill(BLACK)
+    panels = [window.subsurface(panel_rect) for panel_rect in panel_rects]
+    clock = pygame.time.Clock()
+
+    renderers = [None] * len(titles) # created when the game starts and sends its goals
+    frame_states = [FrameState() for title in titles]
+    end_screens = {} # key = game index, val = (end screen, score)
+    closing = False
+
+    while True:
+        # Wait for the next message, then catch up on everything that arrived meanwhile
+        messages = [dashboard_queue.get()]
+        while True:
+            try:
+                messages.append(dashboard_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        changed = set()
+        for message in messages:
+            if message[0] == 'start':
+                index, goals = message[1:]
+                renderers[index] = FieldRenderer(None, panels[index], None, titles[index], goals, tile_size)
+                changed.add(index)
+            elif message[0] == 'delta':
+                index, delta = message[1:]
+                frame_states[index].apply_delta(delta)
+                changed.add(index)
+            elif message[0] == 'end':
+                index, end_screen, score = message[1:]
+                end_screens[index] = (end_screen, score)
+                changed.add(index)
+            elif message[0] == 'close':
+                closing = True
+
+        # Only the games that changed are drawn, each into its own part of the window, then the window is flipped once
+        for index in changed:
+            if renderers[index] is not None:
+                renderers[index].draw_frame_state(frame_states[index].copy())
+                if index in end_screens:
+                    renderers[index].draw_end_screen(*end_screens[index])
+        for event in pygame.event.get():
+            pass
+        if changed:
+            pygame.display.flip()
+
+        if closing:
+            if end_screens:
+                time.sleep(END_SCREEN_WAIT_TIME_SEC)
+            pygame.quit()
+            return
+
+        clock.tick(fps_limit)
+
+
+def init_dashboard_worker(dashboard_queue):
+    # Queues can only be handed to a pool's processes when they start, so each game process keeps the dashboard's here
+    global worker_dashboard_queue
+    worker_dashboard_queue = dashboard_queue
+
+
+def run_dashboard_game(task):
+    # Entry point of a game process, plays one game headless, paced by its panel, and returns (index, score)
+    import random
+    import traceback
+    from importlib import import_module
+    from src.GameSimulationOrchestrator import GameSimulationOrchestrator
+
+    agent_class_str, level, random_seed, index, fps_limit = task
+    panel = DashboardPanel(worker_dashboard_queue, index, fps_limit)
+    score = -1
+    try:
+        module_path, class_name = agent_class_str.rsplit('.', 1)
+        agent_class = getattr(import_module(module_path), class_name)
+        random.seed(random_seed)
+        score = GameSimulationOrchestrator(agent_class, level, render=False, frame_listeners=[panel]).run_game()
+    except Exception as e:
+        print(f'Failed to run simulator for agent: {agent_class_str}. Exception: {e}')
+        print(traceback.format_exc())
+        panel.close(LOSS_SCREEN, score)
+    return index, score
+
+def run_games_on_dashboard(games, columns=None, fps_limit=FPS_LIMIT, workers=None):
+    """
+    Plays the games of `games`, a list of (agent class string, GameLevel, random seed), each in its own process and
+    shows them all on one MosaicDashboard. At most `workers` games (one per CPU by default) run at the same time, the
+    others start as those finish. Games are paced at fps_limit turns per second, None runs them as fast as they can.
+    Each game is seeded like a game run on its own, so the scores are the same. Returns the list of scores in the
+    order of `games`, -1 for failed games
+    """
+    titles = [f'{level.name.strip()} ({agent_class_str.rsplit(".", 1)[-1]})' for agent_class_str, level, random_seed in games]
+    dashboard = MosaicDashboard(titles, columns, fps_limit or FPS_LIMIT)
+    context = multiprocessing.get_context('spawn')
+    workers = min(workers or os.cpu_count() or 1, len(games))
+    tasks = [(agent_class_str, level, random_seed, index, fps_limit) for index, (agent_class_str, level, random_seed) in enumerate(games)]
+
+    scores = [-1] * len(games)
+    # One game per process, like running the games one by one, so no agent state is shared between games
+    pool = context.Pool(workers, initializer=init_dashboard_worker, initargs=(dashboard.queue,), maxtasksperchild=1)
+    try:
+        for index, score in pool.imap_unordered(run_dashboard_game, tasks):
+            scores[index] = score
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    dashboard.close()
+    return scores
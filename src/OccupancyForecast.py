@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class OccupancyForecast:
+    # k-step occupancy probability maps for drives that move uniformly at random, like AIDrive.
+    # maps[s][x][y] is the probability that any of the random drives is on (x, y) after s more of their moves, so
+    # maps[0] is where they are right now. Each drive is modelled independently: every turn it picks one of the 4
+    # directions with equal probability and stays in place if that would leave the field. Blocking by other drives and
+    # pods is ignored, which slightly overestimates how far the drives spread.
+    # The maps are refreshed lazily on the first query after Field.advance_turn. Random drives move nearly every turn,
+    # so most of them are propagated again on every refresh, but a drive cannot get further than horizon tiles in
+    # horizon moves: each one is propagated and combined only inside the (2 * horizon + 1) square window around it.
+    # The field is padded by horizon tiles on every side so that windows near the edges are full size slices too.
+
+    def __init__(self, field_grid_width, field_grid_height, horizon, get_drive_cells):
+        self.field_grid_width = field_grid_width
+        self.field_grid_height = field_grid_height
+        self.horizon = horizon
+        self.window_size = 2 * horizon + 1
+        self.get_drive_cells = get_drive_cells # callable returning {drive key: (x, y)} for the drives to forecast
+        self.drive_cells = {} # key = drive key, val = cell the drive's forecast was computed from
+        self.drive_forecasts = {} # key = drive key, val = array of shape (horizon + 1, window size, window size)
+        self.is_stale = True
+        self.occupancy_maps = np.zeros((horizon + 1, field_grid_width, field_grid_height), dtype=np.float32)
+
+        # Probability that a random move from each cell is blocked by the field edge and the drive stays in place, and 1
+        # on the tiles of the field, 0 on the padding. Index [x + horizon, y + horizon] is field tile (x, y)
+        padded_shape = (field_grid_width + 2 * horizon, field_grid_height + 2 * horizon)
+        field_slice = (slice(horizon, horizon + field_grid_width), slice(horizon, horizon + field_grid_height))
+        self.stay_probability = np.zeros(padded_shape, dtype=np.float32)
+        stay_probability = self.stay_probability[field_slice]
+        stay_probability[0, :] += 0.25
+        stay_probability[-1, :] += 0.25
+        stay_probability[:, 0] += 0.25
+        stay_probability[:, -1] += 0.25
+        self.in_field = np.zeros(padded_shape, dtype=np.float32)
+        self.in_field[field_slice] = 1.0
+        self.field_slice = field_slice
+
+    def mark_stale(self):
+        self.is_stale = True
+
+    @property
+    def maps(self):
+        """Read-only array of shape (horizon + 1, width, height)"""
+        if self.is_stale:
+            self.refresh()
+        return self.occupancy_maps
+
+    def probability(self, cell, steps_ahead):
+        """Probability that a random drive is on cell after steps_ahead of their moves. Capped at the horizon"""
+        x, y = cell[0], cell[1]
+        if x < 0 or x >= self.field_grid_width or y < 0 or y >= self.field_grid_height:
+            return 0.0
+        return float(self.maps[min(steps_ahead, self.horizon), x, y])
+
+    def path_collision_probability(self, path):
+        """Probability that following path collides with a random drive. path[0] is the drive's current cell.
+        The player moves before the AI drives each turn, so path[i] is checked against the drives after i - 1 moves"""
+        occupancy_maps = self.maps
+        free_probability = 1.0
+        for i in range(1, len(path)):
+            x, y = path[i][0], path[i][1]
+            if 0 <= x < self.field_grid_width and 0 <= y < self.field_grid_height:
+                free_probability *= 1.0 - float(occupancy_maps[min(i - 1, self.horizon), x, y])
+        return 1.0 - free_probability
+
+    def get_window(self, cell):
+        """Slices of the padded field for the window centered on field tile cell"""
+        return slice(cell[0], cell[0] + self.window_size), slice(cell[1], cell[1] + self.window_size)
+
+    def refresh(self):
+        drive_cells = self.get_drive_cells()
+        for drive in [drive for drive in self.drive_forecasts if drive not in drive_cells]:
+            del self.drive_forecasts[drive]
+            del self.drive_cells[drive]
+
+        moved_drives = [drive for drive, cell in drive_cells.items() if self.drive_cells.get(drive) != cell]
+        if moved_drives:
+            # Propagate all moved drives together, one vectorized stencil application per step on a stack of windows
+            windows = [self.get_window(drive_cells[drive]) for drive in moved_drives]
+            stay_probability = np.stack([self.stay_probability[window] for window in windows])
+            in_field = np.stack([self.in_field[window] for window in windows])
+            forecasts = np.zeros((len(moved_drives), self.horizon + 1, self.window_size, self.window_size), dtype=np.float32)
+            forecasts[:, 0, self.horizon, self.horizon] = 1.0
+            for step in range(1, self.horizon + 1):
+                forecasts[:, step] = self.propagate(forecasts[:, step - 1], stay_probability, in_field)
+            for i, drive in enumerate(moved_drives):
+                self.drive_forecasts[drive] = forecasts[i]
+                self.drive_cells[drive] = drive_cells[drive]
+
+        # Probability that no drive is on a tile, multiplied together window by window
+        free_probability = np.ones((self.horizon + 1,) + self.in_field.shape, dtype=np.float32)
+        for drive, forecast in self.drive_forecasts.items():
+            free_probability[(slice(None),) + self.get_window(self.drive_cells[drive])] *= 1.0 - forecast
+        self.occupancy_maps = 1.0 - free_probability[(slice(None),) + self.field_slice]
+        self.occupancy_maps.flags.writeable = False
+        self.is_stale = False
+
+    def propagate(self, probabilities, stay_probability, in_field):
+        # One random move for a batch of window distributions of shape (n, window size, window size). Moves off the
+        # field land on the padding and are dropped, stay_probability keeps them on the edge tile instead
+        next_probabilities = probabilities * stay_probability
+        next_probabilities[:, 1:, :] += 0.25 * probabilities[:, :-1, :] # moved right
+        next_probabilities[:, :-1, :] += 0.25 * probabilities[:, 1:, :] # moved left
+        next_probabilities[:, :, 1:] += 0.25 * probabilities[:, :, :-1] # moved up
+        next_probabilities[:, :, :-1] += 0.25 * probabilities[:, :, 1:] # moved down
+        return next_probabilities * in_field
@@ -0,0 +1,169 @@
+import time
+import tracemalloc
+from functools import wraps
+
+# Phases of a turn, see GameSimulationOrchestrator.instrument
+SENSOR_GENERATION = 'sensor generation'
+PLAYER_DECISION = 'player decision'
+AI_DECISIONS = 'AI decisions'
+MOVE_PROCESSING = 'move processing'
+WIN_CHECK = 'win check'
+RENDERING = 'rendering'
+CLOCK_WAIT = 'clock wait'
+END_SCREEN = 'end screen'
+SETUP = 'setup'
+# Time of a level that is in none of its phases: the orchestrator's own loop, score keeping and replays
+OTHER = 'other'
+
+
+class ProfiledCall:
+    # One entry of PhaseProfiler.stack
+    __slots__ = ('path', 'start_memory', 'peak_memory')
+
+    def __init__(self, path, start_memory):
+        self.path = path
+        self.start_memory = start_memory
+        self.peak_memory = start_memory
+
+
+class PhaseProfiler:
+    # Breaks the wall time of each level down into the phases of a turn.
+    # The profiler does not touch the game code: GameSimulationOrchestrator.instrument replaces the methods of one
+    # game's field, drives and window that make up each phase by timed wrappers on those objects only, so games run
+    # without a profiler pay nothing. Time is counted once, in the innermost phase running (self time), and kept per
+    # stack of phases (agent;level;phase), which is the collapsed stack format flame graph tools read.
+    # With trace_memory=True tracemalloc also reports the peak memory allocated in each phase, which slows the game
+    # down a lot, so times measured that way are only good for comparing phases with each other.
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stack = []
+        self.last_time = 0
+        self.times = {} # key = stack of phases as a tuple, val = self time in seconds
+        self.calls = {} # key = stack of phases as a tuple, val = times the phase was entered
+        self.peak_memory = {} # key = stack of phases as a tuple, val = highest bytes allocated on top of the start
+        self.levels = [] # (agent, level) in the order played
+
+    def enter(self, phase):
+        now = time.perf_counter()
+        if self.stack:
+            top = self.stack[-1]
+            self.times[top.path] = self.times.get(top.path, 0) + now - self.last_time
+            path = top.path + (phase,)
+        else:
+            path = (phase,)
+        self.calls[path] = self.calls.get(path, 0) + 1
+
+        start_memory = 0
+        if self.trace_memory:
+            current_memory, peak_memory = tracemalloc.get_traced_memory()
+            if self.stack:
+                self.stack[-1].peak_memory = max(self.stack[-1].peak_memory, peak_memory)
+            tracemalloc.reset_peak()
+            start_memory = current_memory
+        self.stack.append(ProfiledCall(path, start_memory))
+        self.last_time = time.perf_counter()
+
+    def exit(self):
+        now = time.perf_counter()
+        call = self.stack.pop()
+        self.times[call.path] = self.times.get(call.path, 0) + now - self.last_time
+
+        if self.trace_memory:
+            call.peak_memory = max(call.peak_memory, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            self.peak_memory[call.path] = max(self.peak_memory.get(call.path, 0), call.peak_memory - call.start_memory)
+            if self.stack:
+                # What the phase allocated also counts for the phases around it
+                self.stack[-1].peak_memory = max(self.stack[-1].peak_memory, call.peak_memory)
+        self.last_time = time.perf_counter()
+
+    def phase(self, phase):
+        return ProfiledPhase(self, phase)
+
+    def level(self, agent_name, level_name):
+        """Context manager around everything done for one level, the root of its phases"""
+        level_name = level_name.strip()
+        self.levels.append((agent_name, level_name))
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        return ProfiledLevel(self, agent_name, level_name)
+
+    def wrap(self, obj, method_name, phase):
+        """Replaces obj.method_name, on this object only, by a wrapper that runs it as phase"""
+        method = getattr(obj, method_name)
+        profiler = self
+
+        @wraps(method)
+        def profiled_method(*args, **kwargs):
+            # Calls from inside the same phase, like a sensor data helper calling another, stay in that phase
+            if profiler.stack and profiler.stack[-1].path[-1] == phase:
+                return method(*args, **kwargs)
+            profiler.enter(phase)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                profiler.exit()
+        setattr(obj, method_name, profiled_method)
+
+    def write_collapsed_stacks(self, path):
+        """Writes the self time of every stack of phases in microseconds, one `agent;level;phase time` per line.
+        Open it with speedscope or turn it into an SVG with flamegraph.pl"""
+        with open(path, 'w') as output_file:
+            for stack, seconds in self.times.items():
+                frames = [frame.replace(';', ',') for frame in stack]
+                if len(frames) == 2:
+                    frames.append(OTHER)
+                output_file.write(f'{";".join(frames)} {round(seconds * 1e6)}\n')
+
+    def print_report(self):
+        for agent_name, level_name in self.levels:
+            root = (agent_name, level_name)
+            phases = {stack: seconds for stack, seconds in self.times.items() if stack[:2] == root}
+            total = sum(phases.values())
+            summary = f'Profile for agent = {agent_name}, {level_name}: {total:.3f} s'
+            if self.trace_memory:
+                summary += f', peak memory {self.peak_memory.get(root, 0) / 1024:.1f} KB'
+            print(summary)
+            header = f'    {"phase":<36}{"calls":>8}{"time ms":>12}{"%":>7}'
+            if self.trace_memory:
+                header += f'{"peak KB":>10}'
+            print(header)
+            for stack, seconds in sorted(phases.items(), key=lambda item: -item[1]):
+                name = ' > '.join(stack[2:]) if len(stack) > 2 else OTHER
+                line = f'    {name:<36}{self.calls.get(stack, 1) if len(stack) > 2 else "":>8}' \
+                       f'{1000 * seconds:>12.2f}{100 * seconds / total if total else 0:>7.1f}'
+                if self.trace_memory and len(stack) > 2:
+                    line += f'{self.peak_memory.get(stack, 0) / 1024:>10.1f}'
+                print(line)
+
+
+class ProfiledPhase:
+    __slots__ = ('profiler', 'phase_name')
+
+    def __init__(self, profiler, phase_name):
+        self.profiler = profiler
+        self.phase_name = phase_name
+
+    def __enter__(self):
+        self.profiler.enter(self.phase_name)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.exit()
+
+
+class ProfiledLevel:
+    # Enters the agent and the level as the two root frames of the stack
+
+    def __init__(self, profiler, agent_name, level_name):
+        self.profiler = profiler
+        self.agent_name = agent_name
+        self.level_name = level_name
+
+    def __enter__(self):
+        self.profiler.enter(self.agent_name)
+        self.profiler.enter(self.level_name)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.exit()
+        self.profiler.exit()
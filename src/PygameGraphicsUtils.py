@@ -11,7 +11,25 @@ BLUE = pygame.Color(0, 0, 255)
 YELLOW = pygame.Color(255, 255, 0)
 ORANGE = pygame.Color(255, 116, 0)
 
-# Fonts
-SCORE_FONT = pygame.font.SysFont('times new roman', 30)
-END_FONT = pygame.font.SysFont('times new roman', 100)
+# Fonts, created on first use because looking up system fonts is slow
+SCORE_FONT_SIZE = 30
+END_FONT_SIZE = 100
+fonts = {} # key = font size, val = pygame.font.Font
 
+
+def init_pygame():
+    """Initialise pygame the first time something is drawn. Simulations that never draw never call this"""
+    if not pygame.get_init():
+        pygame.init()
+
+def get_font(size):
+    if size not in fonts:
+        init_pygame()
+        fonts[size] = pygame.font.SysFont('times new roman', size)
+    return fonts[size]
+
+def get_score_font(scale=1):
+    return get_font(max(1, round(SCORE_FONT_SIZE * scale)))
+
+def get_end_font(scale=1):
+    return get_font(max(1, round(END_FONT_SIZE * scale)))
@@ -0,0 +1,9 @@
+import random
+from src.FleetAgentInterface import FleetAgentInterface
+from src.Constants import DriveMove
+
+
+class RandomFleetAgent(FleetAgentInterface):
+
+    def get_next_moves(self, sensor_data):
+        return {drive_id: DriveMove(random.randint(1,4)) for drive_id in self.drive_ids}
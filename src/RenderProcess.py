@@ -0,0 +1,100 @@
+import multiprocessing
+import queue
+from src.FrameState import FrameState, merge_deltas, VICTORY_SCREEN, LOSS_SCREEN
+from src.GameConfig import FPS_LIMIT, END_SCREEN_WAIT_TIME_SEC, RENDER_QUEUE_MAX_DELTAS
+
+# How long close() waits for the render process after its end screen before stopping it
+RENDER_PROCESS_EXIT_TIMEOUT_SEC = 5
+
+
+class RenderProcess:
+    # Draws a game in a separate process, so the simulation's turn rate is not tied to pygame.display.update or the
+    # frame rate limit. Each turn publish() sends only what changed on the field (a FrameState delta) through a
+    # bounded queue without waiting. If the renderer falls behind and the queue is full, the delta is kept and merged
+    # with the next one, so the simulation never blocks and the renderer skips the turns in between.
+    # The renderer applies every delta it receives but only draws the newest state, at most fps_limit times a second.
+    # The process is started with 'spawn', so it loads pygame in a fresh interpreter and the simulation process never
+    # does. As with any spawned process, scripts that use this must guard their entry point with
+    # `if __name__ == '__main__':`.
+
+    def __init__(self, level_name, goals, fps_limit=FPS_LIMIT):
+        context = multiprocessing.get_context('spawn')
+        self.queue = context.Queue(RENDER_QUEUE_MAX_DELTAS)
+        self.process = context.Process(
+            target=run_render_process, args=(self.queue, level_name, [tuple(goal) for goal in goals], fps_limit), daemon=True
+        )
+        self.process.start()
+        self.frame_state = FrameState() # last state published
+        self.pending_delta = None # changes the renderer has not been sent yet because the queue was full
+
+    def publish(self, field, score):
+        """Send the changes since the last call to the renderer. Never blocks"""
+        frame_state = FrameState.from_field(field, score)
+        delta = frame_state.get_delta(self.frame_state)
+        self.frame_state = frame_state
+        if self.pending_delta is not None:
+            delta = merge_deltas(self.pending_delta, delta)
+        try:
+            self.queue.put_nowait(('delta', delta))
+            self.pending_delta = None
+        except queue.Full:
+            self.pending_delta = delta
+
+    def close(self, end_screen=None, score=0):
+        """Send whatever is left, show end_screen (VICTORY_SCREEN, LOSS_SCREEN or None) and wait for the renderer to exit"""
+        try:
+            if self.pending_delta is not None:
+                self.queue.put(('delta', self.pending_delta), timeout=RENDER_PROCESS_EXIT_TIMEOUT_SEC)
+                self.pending_delta = None
+            self.queue.put(('end', end_screen, score), timeout=RENDER_PROCESS_EXIT_TIMEOUT_SEC)
+        except queue.Full:
+            print('Render process is not responding, stopping it')
+        self.process.join(END_SCREEN_WAIT_TIME_SEC + RENDER_PROCESS_EXIT_TIMEOUT_SEC)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def run_render_process(render_queue, level_name, goals, fps_limit):
+    # Entry point of the render process. pygame and the renderer are imported here so that importing this module in
+    # the simulation process does not load them
+    import pygame
+    import time
+    from src.FieldRenderer import FieldRenderer
+    from src.GameConfig import WINDOW_DIMENSIONS, SCORE_BANNER_HEIGHT
+    from src.PygameGraphicsUtils import init_pygame
+
+    init_pygame()
+    pygame.display.set_caption('AR Simulator Game')
+    game_window = pygame.display.set_mode((WINDOW_DIMENSIONS[0], WINDOW_DIMENSIONS[1] + SCORE_BANNER_HEIGHT))
+    clock = pygame.time.Clock()
+    renderer = FieldRenderer(None, game_window, None, level_name, goals)
+    frame_state = FrameState()
+
+    while True:
+        # Wait for the next turn, then catch up on every turn that arrived meanwhile and draw only the newest
+        messages = [render_queue.get()]
+        while messages[-1][0] != 'end':
+            try:
+                messages.append(render_queue.get_nowait())
+            except queue.Empty:
+                break
+        for message in messages:
+            if message[0] == 'delta':
+                frame_state.apply_delta(message[1])
+
+        for event in pygame.event.get():
+            pass
+        pygame.display.update(renderer.draw_frame_state(frame_state.copy()))
+
+        if messages[-1][0] == 'end':
+            end_screen, score = messages[-1][1:]
+            if end_screen == VICTORY_SCREEN:
+                renderer.show_victory_screen(score)
+            elif end_screen == LOSS_SCREEN:
+                renderer.show_loss_screen(score)
+            if end_screen is not None:
+                time.sleep(END_SCREEN_WAIT_TIME_SEC)
+            pygame.quit()
+            return
+
+        clock.tick(fps_limit)
@@ -0,0 +1,203 @@
+import math
+import multiprocessing
+import os
+import numpy as np
+from src.GameRecording import GameRecording
+
+# Frames rendered by one worker task. Each task replays the recording up to its first frame and draws that frame in
+# full, the rest are drawn incrementally, so bigger chunks waste less work but balance worse across workers
+EXPORT_CHUNK_FRAMES = 64
+
+# How long the last frame (the end screen if there is one) stays up at the end of a GIF, in frames
+END_SCREEN_HOLD_FRAMES = 10
+
+GIF_FORMAT = 'gif'
+PNG_FORMAT = 'png'
+
+# GifPalette of a worker process, built once by init_export_worker for GIF exports
+worker_gif_palette = None
+
+
+def get_export_frame_count(recording):
+    """Frames exported for recording: one per turn, plus the end screen if the game ended with one"""
+    return recording.num_frames + (1 if recording.end_screen is not None else 0)
+
+def get_chunks(recording_path, recording, workers):
+    # Contiguous frame ranges (start, end), small enough that every worker gets a few
+    num_frames = get_export_frame_count(recording)
+    chunk_frames = max(1, min(EXPORT_CHUNK_FRAMES, math.ceil(num_frames / workers)))
+    return [(recording_path, start, min(start + chunk_frames, num_frames)) for start in range(0, num_frames, chunk_frames)]
+
+def init_export_worker(output_format):
+    # Workers draw onto plain surfaces and never open a window. SDL must leave SIGTERM alone, otherwise it turns it
+    # into a quit event nobody reads and the pool cannot stop its workers
+    os.environ['SDL_VIDEODRIVER'] = 'dummy'
+    os.environ['SDL_NO_SIGNAL_HANDLERS'] = '1'
+    os.environ['SDL_AUDIODRIVER'] = 'dummy'
+    os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    if output_format == GIF_FORMAT:
+        # The palette and its 32 MB lookup table are shared by every task the worker runs
+        from src.PygameGraphicsUtils import init_pygame
+        global worker_gif_palette
+        init_pygame()
+        worker_gif_palette = build_gif_palette()
+
+def render_frames(recording_path, start, end, output_format, frames_dir, scale):
+    """
+    Worker task: draws frames [start, end) of the recording offscreen with FieldRenderer.
+    PNG frames are written to frames_dir and the number written is returned. GIF frames are mapped to the shared
+    palette here, so that part of GIF encoding runs in parallel too, and returned as a list of Pillow images.
+    """
+    import pygame
+    from src.FieldRenderer import FieldRenderer
+    from src.GameConfig import WINDOW_DIMENSIONS, SCORE_BANNER_HEIGHT
+    from src.PygameGraphicsUtils import init_pygame
+
+    init_pygame()
+    recording = GameRecording.load(recording_path)
+    surface = pygame.Surface((WINDOW_DIMENSIONS[0], WINDOW_DIMENSIONS[1] + SCORE_BANNER_HEIGHT))
+    renderer = FieldRenderer(None, surface, None, recording.level_name, recording.goals)
+    scaled_size = (round(surface.get_width() * scale), round(surface.get_height() * scale))
+
+    frame_state = recording.get_frame_state(start - 1)
+    frames = []
+    for frame in range(start, end):
+        if frame < recording.num_frames:
+            frame_state.apply_delta(recording.deltas[frame])
+            renderer.draw_frame_state(frame_state.copy())
+        else:
+            # The frame after the last turn is the end screen, drawn over the last turn
+            renderer.draw_frame_state(frame_state.copy())
+            renderer.draw_end_screen(recording.end_screen, recording.final_score)
+
+        image = surface if scale == 1 else pygame.transform.smoothscale(surface, scaled_size)
+        if output_format == PNG_FORMAT:
+            pygame.image.save(image, os.path.join(frames_dir, f'frame_{frame:05d}.png'))
+        else:
+            frames.append(worker_gif_palette.to_image(pygame.image.tobytes(image, 'RGB'), image.get_size()))
+    return frames if output_format == GIF_FORMAT else end - start
+
+def build_gif_palette():
+    """
+    One GifPalette for every GIF frame, built from all the sprites and text FieldRenderer draws. When all frames share
+    a palette, Pillow writes them as they are instead of remapping each frame's own palette, which was most of the
+    encoding time. Every worker builds the same palette
+    """
+    import pygame
+    from src.PygameGraphicsUtils import BLACK, WHITE, get_score_font, get_end_font
+    from src.SpriteAtlas import get_sprite_atlas
+
+    sprite_atlas = get_sprite_atlas()
+    images = list(sprite_atlas.drive_sprites.values()) + [
+        sprite_atlas.pod_sprite, sprite_atlas.outlined_pod_sprite, sprite_atlas.goal_marker, sprite_atlas.crash_marker,
+        get_score_font().render('Level: 0123456789 | Pods: / | Cost =', False, WHITE),
+        get_end_font().render('VICTORY! Total Cost = 0123456789 GAME OVER', True, WHITE)
+    ]
+    sheet = pygame.Surface((sum(image.get_width() for image in images), max(image.get_height() for image in images)))
+    sheet.fill(BLACK)
+    x = 0
+    for image in images:
+        sheet.blit(image, (x, 0))
+        x += image.get_width()
+
+    # The sheet has only a few more than 256 colors, the rarest ones (antialiased text edges) are left out and drawn
+    # with the closest color that is kept. Averaging colors instead would change the common ones like the grid white
+    packed_colors, counts = np.unique(pack_rgb(pygame.image.tobytes(sheet, 'RGB')), return_counts=True)
+    return GifPalette(packed_colors[np.argsort(-counts, kind='stable')][:256])
+
+def pack_rgb(rgb_bytes):
+    """One 0xRRGGBB int per pixel of RGB bytes"""
+    pixels = np.frombuffer(rgb_bytes, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+    return (pixels[:, 0] << 16) | (pixels[:, 1] << 8) | pixels[:, 2]
+
+
+class GifPalette:
+    # Maps RGB frames to palette images exactly: colors in the palette keep their index and any other color gets the
+    # closest palette color. Pillow's own palette mapping rounds colors first, which turns the white grid off-white.
+    # Results are kept in a lookup table over all 2^24 colors, so after the first few frames mapping is one array index.
+
+    def __init__(self, packed_colors):
+        self.colors = np.stack([(packed_colors >> 16) & 255, (packed_colors >> 8) & 255, packed_colors & 255], axis=1)
+        self.palette_bytes = self.colors.astype(np.uint8).tobytes()
+        self.lookup = np.full(1 << 24, -1, dtype=np.int16) # key = 0xRRGGBB, val = palette index, -1 if not looked up yet
+        self.lookup[packed_colors] = np.arange(len(packed_colors))
+
+    def to_image(self, rgb_bytes, size):
+        from PIL import Image
+        packed = pack_rgb(rgb_bytes)
+        indices = self.lookup[packed]
+        if (indices < 0).any():
+            new_colors = np.unique(packed[indices < 0])
+            new_rgb = np.stack([(new_colors >> 16) & 255, (new_colors >> 8) & 255, new_colors & 255], axis=1)
+            distances = ((new_rgb[:, None, :] - self.colors[None, :, :]) ** 2).sum(axis=2)
+            self.lookup[new_colors] = distances.argmin(axis=1)
+            indices = self.lookup[packed]
+        image = Image.frombytes('P', size, indices.astype(np.uint8).tobytes())
+        image.putpalette(self.palette_bytes)
+        return image
+
+
+def render_frames_task(task):
+    return render_frames(*task)
+
+def get_output_name(recording_path):
+    return os.path.splitext(os.path.basename(recording_path))[0]
+
+def save_gif(output_path, frames, fps):
+    durations = [round(1000 / fps)] * len(frames)
+    durations[-1] *= END_SCREEN_HOLD_FRAMES
+    # Pillow still crops each frame to what changed since the previous one. Its optimize pass on top of that
+    # would also make unchanged pixels transparent, which costs far more time than it saves space
+    frames[0].save(output_path, save_all=True, append_images=frames[1:], duration=durations, loop=0, optimize=False)
+
+def export_replays(recording_paths, output_dir, output_format=GIF_FORMAT, fps=10, scale=1.0, workers=None):
+    """
+    Renders every recording (see GameRecording) to output_dir, as <name>.gif or as <name>/frame_*.png.
+    Frames are drawn offscreen by a pool of worker processes, each taking contiguous frame ranges from every
+    recording at once, so a batch of short games keeps all the workers busy just like one long game does.
+    Each GIF is written as soon as all of its frames are in, so only about one recording's frames are held at a time.
+    Returns the list of files or directories written.
+    """
+    if output_format == GIF_FORMAT:
+        try:
+            import PIL
+        except ImportError:
+            raise Exception('GIF export needs Pillow, install it with: pip install Pillow')
+    elif output_format != PNG_FORMAT:
+        raise Exception(f'Unknown replay export format: {output_format}')
+
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    tasks = []
+    outputs = []
+    for recording_path in recording_paths:
+        recording = GameRecording.load(recording_path)
+        frames_dir = os.path.join(output_dir, get_output_name(recording_path))
+        if output_format == PNG_FORMAT:
+            os.makedirs(frames_dir, exist_ok=True)
+            outputs.append(frames_dir)
+        else:
+            outputs.append(frames_dir + '.gif')
+        tasks += [chunk + (output_format, frames_dir, scale) for chunk in get_chunks(recording_path, recording, workers)]
+
+    # 'spawn' so workers start from a clean interpreter with the dummy video driver set before pygame is loaded
+    context = multiprocessing.get_context('spawn')
+    pool = context.Pool(workers, initializer=init_export_worker, initargs=(output_format,))
+    try:
+        # Tasks are in frame order and imap returns their results in that order, so each recording's frames are the
+        # results of its tasks in a row
+        frames = []
+        for index, result in enumerate(pool.imap(render_frames_task, tasks)):
+            if output_format == GIF_FORMAT:
+                frames.extend(result)
+                frames_dir = tasks[index][4]
+                if index + 1 == len(tasks) or tasks[index + 1][4] != frames_dir:
+                    save_gif(frames_dir + '.gif', frames, fps)
+                    frames = []
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+    return outputs
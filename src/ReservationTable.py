@@ -0,0 +1,78 @@
+class ReservationTable:
+    # Space-time reservation table shared by all controlled drives on a Field.
+    # Drives write the cells they intend to occupy on future turns, and the moves between them, so other planners can
+    # avoid them without re-deriving their plans. All lookups are dict lookups. Reservations for past turns are dropped
+    # by Field.advance_turn. Cells are (x, y) tuples or [x, y] lists.
+
+    def __init__(self):
+        self.current_turn = 0
+        self.cell_reservations = {} # key = (x, y, turn), val = drive id occupying the cell during that turn
+        self.move_reservations = {} # key = (from_x, from_y, to_x, to_y, turn), val = drive id moving between turn and turn + 1
+        self.keys_by_turn = {} # key = turn, val = list of (reservation dict, key) pairs made for that turn
+        self.keys_by_drive = {} # key = drive id, val = set of (reservation dict name, key) pairs held by the drive
+
+    def get_cell_holder(self, cell, turn):
+        """Drive id holding the cell on the given turn, None if it is free"""
+        return self.cell_reservations.get((cell[0], cell[1], turn))
+
+    def is_cell_reserved(self, cell, turn, drive_id=None):
+        """True if a drive other than drive_id holds the cell on the given turn"""
+        holder = self.cell_reservations.get((cell[0], cell[1], turn))
+        return holder is not None and holder != drive_id
+
+    def is_move_conflicting(self, from_cell, to_cell, turn, drive_id=None):
+        """True if moving from from_cell on turn to to_cell on turn + 1 collides with another drive's reservation.
+        Covers both landing on a reserved cell and swapping cells with a drive coming the other way"""
+        if self.is_cell_reserved(to_cell, turn + 1, drive_id):
+            return True
+        swap_holder = self.move_reservations.get((to_cell[0], to_cell[1], from_cell[0], from_cell[1], turn))
+        return swap_holder is not None and swap_holder != drive_id
+
+    def reserve_cell(self, cell, turn, drive_id):
+        """Reserve a single cell for a turn. Returns False without reserving if it is taken or in the past"""
+        if turn < self.current_turn or self.is_cell_reserved(cell, turn, drive_id):
+            return False
+        self.add_reservation('cell', (cell[0], cell[1], turn), turn, drive_id)
+        return True
+
+    def reserve_path(self, path, start_turn, drive_id):
+        """Reserve path[i] on turn start_turn + i and every move between consecutive cells.
+        The path is reserved completely or not at all. Returns False if any step conflicts"""
+        if start_turn < self.current_turn or not path:
+            return False
+        if self.is_cell_reserved(path[0], start_turn, drive_id):
+            return False
+        for i in range(1, len(path)):
+            if self.is_move_conflicting(path[i - 1], path[i], start_turn + i - 1, drive_id):
+                return False
+
+        self.add_reservation('cell', (path[0][0], path[0][1], start_turn), start_turn, drive_id)
+        for i in range(1, len(path)):
+            turn = start_turn + i
+            self.add_reservation('cell', (path[i][0], path[i][1], turn), turn, drive_id)
+            if path[i - 1][0] != path[i][0] or path[i - 1][1] != path[i][1]:
+                self.add_reservation('move', (path[i - 1][0], path[i - 1][1], path[i][0], path[i][1], turn - 1), turn - 1, drive_id)
+        return True
+
+    def release_drive(self, drive_id):
+        """Drop every reservation held by a drive, e.g. before it reserves a new plan"""
+        for dict_name, key in self.keys_by_drive.pop(drive_id, set()):
+            reservations = self.cell_reservations if dict_name == 'cell' else self.move_reservations
+            if reservations.get(key) == drive_id:
+                del reservations[key]
+
+    def expire(self, current_turn):
+        """Drop all reservations made for turns before current_turn"""
+        for turn in [turn for turn in self.keys_by_turn if turn < current_turn]:
+            for dict_name, key in self.keys_by_turn.pop(turn):
+                reservations = self.cell_reservations if dict_name == 'cell' else self.move_reservations
+                drive_id = reservations.pop(key, None)
+                if drive_id is not None and drive_id in self.keys_by_drive:
+                    self.keys_by_drive[drive_id].discard((dict_name, key))
+        self.current_turn = current_turn
+
+    def add_reservation(self, dict_name, key, turn, drive_id):
+        reservations = self.cell_reservations if dict_name == 'cell' else self.move_reservations
+        reservations[key] = drive_id
+        self.keys_by_turn.setdefault(turn, []).append((dict_name, key))
+        self.keys_by_drive.setdefault(drive_id, set()).add((dict_name, key))
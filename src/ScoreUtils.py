@@ -1,8 +1,5 @@
 import json
-import pygame
-import time
-from src.GameConfig import GAME_LEVELS, WINDOW_DIMENSIONS, SCORE_BANNER_HEIGHT
-from src.PygameGraphicsUtils import BLACK, WHITE, SCORE_FONT
+from src.GameConfig import GAME_LEVELS
 
 
 def sum_score_for_all_completed_levels(score_dict):
@@ -45,37 +42,6 @@ def get_best_agents_and_score_aggregations(results_dict):
     else:
         return {}
 
-def render_text_wrapping_lines(text, screen):
-    words = text.split(' ')
-    lines = []
-    center_x = WINDOW_DIMENSIONS[0]//2
-    center_y = WINDOW_DIMENSIONS[1]//2
-    while len(words) > 0:
-        line_words = []
-        while len(words) > 0:
-            next_word = words.pop(0)
-            if '\n' in next_word:
-                next_word = next_word.replace('\n','')
-                line_words.append(next_word)
-                break
-            else:
-                line_words.append(next_word)
-                w, h = SCORE_FONT.size(' '.join(line_words + words[:1]))
-                if w > WINDOW_DIMENSIONS[0]:
-                    break
-        line = ' '.join(line_words)
-        lines.append(line)
-
-    y_offset = -len(lines)//2
-    for line in lines:
-        w, h = SCORE_FONT.size(line)
-        x = center_x - w / 2
-        y = center_y + y_offset
-        y_offset += h
-
-        font_surface = SCORE_FONT.render(line, True, WHITE)
-        screen.blit(font_surface, (x, y))
-
 def prettify_score_dict_to_string(score_dict):
     out_str = ''
     for k in score_dict.keys():
@@ -83,21 +49,3 @@ def prettify_score_dict_to_string(score_dict):
         del formatted_dict['last_level_name']
         out_str = out_str + k.split('.', 1)[1] + ': ' + json.dumps(formatted_dict) + ' \n '
     return out_str
-
-def show_end_screen(best_agents_scores):
-    pygame.display.set_caption('AR Simulator Game Results')
-
-    game_window = pygame.display.set_mode((WINDOW_DIMENSIONS[0], WINDOW_DIMENSIONS[1] + SCORE_BANNER_HEIGHT))
-
-    game_window.fill(BLACK)
-    if len(best_agents_scores.keys()) > 0:
-        for k in best_agents_scores.keys():
-            last_level_name = best_agents_scores[k]['last_level_name']
-            break
-    else:
-        last_level_name = 'Null'
-    end_game_text = f'Game Complete! Highest Level Completed: {last_level_name} \n Best Agent(s): {prettify_score_dict_to_string(best_agents_scores)}'
-    render_text_wrapping_lines(end_game_text, game_window)
-
-    pygame.display.update()
-    time.sleep(1)
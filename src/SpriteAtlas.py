@@ -0,0 +1,76 @@
+import pygame
+from src.Constants import Heading
+from src.GameConfig import GRID_BLOCK_DIMENSIONS
+from src.FrameState import NO_POD, YELLOW_POD, GREEN_POD
+from src.PygameGraphicsUtils import RED, GREEN
+from src.SpriteCache import load_sprite
+
+# The drive images face south, this is how far to rotate them (counterclockwise, in degrees) for each heading
+HEADING_ROTATIONS = {Heading.NORTH: 180, Heading.EAST: 270, Heading.SOUTH: 0, Heading.WEST: 90}
+
+
+class SpriteAtlas:
+    # Every tile sprite FieldRenderer draws, built once per process.
+    # Drives are pre-rotated for each heading and pre-composited with the pod on top of them, and pods on their own
+    # come with and without the red outline of uncollected pods, so drawing a tile is a single blit.
+    # FieldRenderer draws the field upside down (origin in the bottom left), so all sprites are stored flipped.
+    # When a display is open the sprites are converted to its pixel format, which makes blitting them much cheaper.
+    # An atlas can be built for a smaller tile size (see MosaicDashboard), the source images are scaled down once.
+
+    def __init__(self, tile_size=GRID_BLOCK_DIMENSIONS):
+        self.tile_size = (tile_size[0], tile_size[1])
+        player_orange_drive_img = self.scale_sprite(load_sprite('player_orange_drive'))
+        blue_drive_img = self.scale_sprite(load_sprite('blue_drive'))
+        pod_yellow_img = self.scale_sprite(load_sprite('pod_yellow'))
+        pod_green_img = self.scale_sprite(load_sprite('pod_green'))
+
+        self.drive_sprites = {} # key = (is player, Heading, NO_POD/YELLOW_POD/GREEN_POD), val = Surface
+        for is_player, drive_img in ((True, player_orange_drive_img), (False, blue_drive_img)):
+            for heading, rotation in HEADING_ROTATIONS.items():
+                rotated_img = pygame.transform.rotate(drive_img, rotation)
+                for pod, pod_img in ((NO_POD, None), (YELLOW_POD, pod_yellow_img), (GREEN_POD, pod_green_img)):
+                    sprite = rotated_img.copy()
+                    if pod_img is not None:
+                        sprite.blit(pod_img, (0, 0))
+                    self.drive_sprites[(is_player, heading, pod)] = self.finish_sprite(sprite)
+
+        self.pod_sprite = self.finish_sprite(pod_yellow_img.copy())
+        outlined_pod = pod_yellow_img.copy()
+        outline_width = max(1, round(2 * self.tile_size[1] / GRID_BLOCK_DIMENSIONS[1]))
+        pygame.draw.rect(outlined_pod, RED, pygame.Rect(0, 0, self.tile_size[0], self.tile_size[1]), outline_width)
+        self.outlined_pod_sprite = self.finish_sprite(outlined_pod)
+
+        self.goal_marker = self.finish_sprite(self.build_marker(GREEN, self.tile_size[1]//4))
+        self.crash_marker = self.finish_sprite(self.build_marker(RED, self.tile_size[1]//3))
+
+    def scale_sprite(self, sprite):
+        if sprite.get_size() == self.tile_size:
+            return sprite
+        return pygame.transform.smoothscale(sprite, self.tile_size)
+
+    def build_marker(self, color, radius):
+        # Circle centered on a tile
+        marker = pygame.Surface(self.tile_size, pygame.SRCALPHA, 32)
+        pygame.draw.circle(marker, color, (self.tile_size[0]//2, self.tile_size[1]//2), radius)
+        return marker
+
+    def finish_sprite(self, sprite):
+        sprite = pygame.transform.flip(sprite, False, True)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+        return sprite
+
+    def get_drive_sprite(self, is_player, heading, pod):
+        # Headings that are not one of the four directions were drawn facing west before the atlas, keep that
+        return self.drive_sprites.get((is_player, heading, pod), self.drive_sprites[(is_player, Heading.WEST, pod)])
+
+
+sprite_atlases = {} # key = (tile width, tile height), val = SpriteAtlas
+
+def get_sprite_atlas(tile_size=GRID_BLOCK_DIMENSIONS):
+    """The process wide SpriteAtlas for tile_size, built on the first call. Call it after the display is opened so
+    the sprites are converted to the display pixel format"""
+    key = (tile_size[0], tile_size[1])
+    if key not in sprite_atlases:
+        sprite_atlases[key] = SpriteAtlas(key)
+    return sprite_atlases[key]
@@ -0,0 +1,83 @@
+import hashlib
+import importlib
+import os
+import pygame
+from src.GameConfig import GRID_BLOCK_DIMENSIONS
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Compiled sprites are kept here between runs. The directory is not checked in and can be deleted at any time
+SPRITE_CACHE_DIR = os.path.join(ROOT_DIR, '.sprite_cache')
+
+# key = sprite name, val = (images module that builds it from a pixel array, variable the sprite is stored in)
+SPRITE_SOURCES = {
+    'blue_drive': ('images.PygameDriveBlue', 'blue_drive_img'),
+    'orange_drive': ('images.PygameDriveOrange', 'orange_drive_img'),
+    'player_orange_drive': ('images.PygamePlayerDriveOrange', 'player_orange_drive_img'),
+    'pod_yellow': ('images.PygamePodYellow', 'pod_yellow_img'),
+    'pod_green': ('images.PygamePodGreen', 'pod_green_img'),
+}
+
+# Every sprite module takes its colors from here, so changing it invalidates all of them
+SHARED_SOURCE_FILES = [os.path.join(ROOT_DIR, 'images', 'Colors.py')]
+
+loaded_sprites = {} # key = sprite name, val = Surface, sprites already loaded by this process
+
+
+def get_source_path(module_name):
+    return os.path.join(ROOT_DIR, *module_name.split('.')) + '.py'
+
+def get_sprite_version(name):
+    """Hash of everything the sprite is built from: its pixel array module, the shared colors and the tile size"""
+    module_name, variable = SPRITE_SOURCES[name]
+    version = hashlib.sha1(f'{variable} {GRID_BLOCK_DIMENSIONS[0]}x{GRID_BLOCK_DIMENSIONS[1]}'.encode())
+    for path in [get_source_path(module_name)] + SHARED_SOURCE_FILES:
+        with open(path, 'rb') as source_file:
+            version.update(source_file.read())
+    return version.hexdigest()[:16]
+
+def get_sprite_cache_path(name):
+    return os.path.join(SPRITE_CACHE_DIR, f'{name}-{get_sprite_version(name)}.rgba')
+
+def load_sprite(name):
+    """
+    Sprite `name` of SPRITE_SOURCES as a tile-sized RGBA Surface, loaded on first use.
+    The images modules build their sprites pixel by pixel from Python arrays when imported, which is slow, so the
+    result is compiled once into SPRITE_CACHE_DIR as raw RGBA bytes and later runs and worker processes load those
+    bytes in one call. A cached sprite is rebuilt when its module, the colors or the tile size change.
+    """
+    if name in loaded_sprites:
+        return loaded_sprites[name]
+
+    cache_path = get_sprite_cache_path(name)
+    size = (GRID_BLOCK_DIMENSIONS[0], GRID_BLOCK_DIMENSIONS[1])
+    sprite = None
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as cache_file:
+            pixels = cache_file.read()
+        if len(pixels) == size[0] * size[1] * 4:
+            sprite = pygame.image.frombuffer(pixels, size, 'RGBA')
+
+    if sprite is None:
+        module_name, variable = SPRITE_SOURCES[name]
+        sprite = getattr(importlib.import_module(module_name), variable)
+        write_sprite_cache(name, cache_path, sprite)
+
+    loaded_sprites[name] = sprite
+    return sprite
+
+def write_sprite_cache(name, cache_path, sprite):
+    # Written to a temporary file first and renamed, so processes starting at the same time never read half a file.
+    # Older versions of the sprite are removed. A read-only checkout simply keeps building the sprites
+    try:
+        os.makedirs(SPRITE_CACHE_DIR, exist_ok=True)
+        temporary_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'wb') as cache_file:
+            cache_file.write(pygame.image.tobytes(sprite, 'RGBA'))
+        os.replace(temporary_path, cache_path)
+        for file_name in os.listdir(SPRITE_CACHE_DIR):
+            file_path = os.path.join(SPRITE_CACHE_DIR, file_name)
+            if file_name.startswith(f'{name}-') and file_name.endswith('.rgba') and file_path != cache_path:
+                os.remove(file_path)
+    except OSError as e:
+        print(f'Could not write sprite cache {cache_path}. Exception: {e}')
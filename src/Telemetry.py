@@ -0,0 +1,158 @@
+import json
+import os
+import numpy as np
+from src.Constants import DriveMove
+from src.GameConfig import TELEMETRY_BUFFER_EVENTS
+
+# Verbosity levels, each one records everything the levels before it do
+TELEMETRY_OFF = 0
+TELEMETRY_EVENTS = 1 # crashes, pod pickups and deliveries, failed pod operations, pod goal assignments
+TELEMETRY_TURNS = 2 # decision latency and duration of every turn
+TELEMETRY_MOVES = 3 # every move of every drive
+TELEMETRY_VERBOSITY_NAMES = {'off': TELEMETRY_OFF, 'events': TELEMETRY_EVENTS, 'turns': TELEMETRY_TURNS, 'moves': TELEMETRY_MOVES}
+
+# Event codes, the `event` column. Columns that do not apply to an event are -1
+MOVE = 0 # value = DriveMove value, x and y = drive position before the move
+CRASH = 1 # x and y = crashed player drive position
+PICKUP = 2
+DELIVERY = 3
+FAILED_PICKUP = 4 # no pod under the drive
+FAILED_DROP = 5 # pod = carried pod if not at its target goal, -1 if the drive carried none
+POD_ASSIGNED = 6 # x and y = target goal of the pod
+DECISION_LATENCY = 7 # value = seconds from the start of the turn until the player's moves were known
+TURN_DURATION = 8 # value = seconds the turn took, without the wait for the frame rate limit
+EVENT_NAMES = ['move', 'crash', 'pickup', 'delivery', 'failed pickup', 'failed drop', 'pod assigned', 'decision latency',
+               'turn duration']
+
+TELEMETRY_DTYPE = np.dtype([('game', np.uint16), ('event', np.uint8), ('turn', np.int32), ('drive', np.int32),
+                            ('pod', np.int32), ('x', np.int16), ('y', np.int16), ('value', np.float64)])
+
+
+class Telemetry:
+    # Structured record of what happens in games, replacing the prints the field used to make on every pod operation.
+    # Events are written as plain numbers into a preallocated numpy ring buffer, nothing is formatted while playing.
+    # With a writer the buffer is flushed to it in batches whenever it fills up and at the end of every game, without
+    # one it keeps the most recent `capacity` events, see get_events.
+    # Hot paths check the *_enabled flag of the level they record at before calling record, so disabled levels cost
+    # one attribute lookup and never build the event.
+
+    def __init__(self, verbosity=TELEMETRY_EVENTS, writer=None, capacity=TELEMETRY_BUFFER_EVENTS):
+        self.verbosity = verbosity
+        self.events_enabled = verbosity >= TELEMETRY_EVENTS
+        self.turns_enabled = verbosity >= TELEMETRY_TURNS
+        self.moves_enabled = verbosity >= TELEMETRY_MOVES
+        self.writer = writer
+        self.buffer = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        self.next_index = 0
+        self.num_events = 0 # events in the buffer, at most capacity
+        self.games = [] # level name of each game, the `game` column is an index in this list
+        self.game = 0
+
+    def start_game(self, level_name):
+        """Events recorded from now on belong to a new game of level_name"""
+        if self.verbosity == TELEMETRY_OFF:
+            return
+        self.games.append(level_name.strip())
+        self.game = len(self.games) - 1
+
+    def record(self, event, turn, drive=-1, pod=-1, x=-1, y=-1, value=0.0):
+        self.buffer[self.next_index] = (self.game, event, turn, drive, pod, x, y, value)
+        self.next_index = (self.next_index + 1) % len(self.buffer)
+        if self.num_events < len(self.buffer):
+            self.num_events += 1
+        if self.writer is not None and self.num_events == len(self.buffer):
+            self.flush()
+
+    def get_events(self):
+        """Copy of the events in the buffer, oldest first"""
+        if self.num_events < len(self.buffer):
+            return self.buffer[self.next_index - self.num_events:self.next_index].copy()
+        return np.concatenate((self.buffer[self.next_index:], self.buffer[:self.next_index]))
+
+    def flush(self):
+        if self.writer is None or self.num_events == 0:
+            return
+        self.writer.write(self.get_events(), self.games)
+        self.next_index = 0
+        self.num_events = 0
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+# Shared by every Field and orchestrator created without telemetry, it never records anything
+NO_TELEMETRY = Telemetry(TELEMETRY_OFF, capacity=1)
+
+
+class JsonlTelemetryWriter:
+    # One JSON object per event and line, with only the columns that apply to the event
+
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def write(self, events, games):
+        lines = []
+        for game, event, turn, drive, pod, x, y, value in events.tolist():
+            record = {'game': games[game], 'event': EVENT_NAMES[event], 'turn': turn}
+            if drive != -1:
+                record['drive'] = drive
+            if pod != -1:
+                record['pod'] = pod
+            if x != -1:
+                record['x'] = x
+                record['y'] = y
+            if event == MOVE:
+                record['move'] = DriveMove(int(value)).name
+            elif event in (DECISION_LATENCY, TURN_DURATION):
+                record['seconds'] = value
+            lines.append(json.dumps(record))
+        self.file.write('\n'.join(lines) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class ColumnarTelemetryWriter:
+    # Column files like a Parquet table without needing pyarrow: a directory with one <column>.bin of raw little
+    # endian values per column of TELEMETRY_DTYPE, appended batch by batch, and a schema.json written on close.
+    # Read it back with load_columnar_telemetry, each column is a single numpy array.
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.files = {name: open(os.path.join(directory, f'{name}.bin'), 'wb') for name in TELEMETRY_DTYPE.names}
+        self.games = []
+        self.num_events = 0
+
+    def write(self, events, games):
+        for name, column_file in self.files.items():
+            column_file.write(events[name].astype(TELEMETRY_DTYPE[name].newbyteorder('<')).tobytes())
+        self.games = list(games)
+        self.num_events += len(events)
+
+    def close(self):
+        for column_file in self.files.values():
+            column_file.close()
+        schema = {
+            'columns': {name: TELEMETRY_DTYPE[name].newbyteorder('<').str for name in TELEMETRY_DTYPE.names},
+            'events': EVENT_NAMES,
+            'games': self.games,
+            'num_events': self.num_events
+        }
+        with open(os.path.join(self.directory, 'schema.json'), 'w') as schema_file:
+            json.dump(schema, schema_file, indent=2)
+
+def load_columnar_telemetry(directory):
+    """Columns written by ColumnarTelemetryWriter. Returns ({column name: numpy array}, [level name of each game])"""
+    with open(os.path.join(directory, 'schema.json')) as schema_file:
+        schema = json.load(schema_file)
+    columns = {name: np.fromfile(os.path.join(directory, f'{name}.bin'), dtype=np.dtype(dtype_str))
+               for name, dtype_str in schema['columns'].items()}
+    return columns, schema['games']
+
+def get_telemetry_writer(path):
+    """JsonlTelemetryWriter for a .jsonl path, ColumnarTelemetryWriter in a directory at path otherwise"""
+    if path.endswith('.jsonl'):
+        return JsonlTelemetryWriter(path)
+    return ColumnarTelemetryWriter(path)
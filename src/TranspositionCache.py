@@ -0,0 +1,41 @@
+from collections import OrderedDict
+
+
+class TranspositionCache:
+    # Bounded least recently used cache for results that depend only on the game state, keyed on Field.zobrist_hash
+    # (usually combined with whatever else the result depends on, e.g. (agent class, sensor range, state hash)).
+    # Once max_entries is reached, the entry that was used least recently is evicted.
+
+    def __init__(self, max_entries):
+        if max_entries <= 0:
+            raise Exception('TranspositionCache needs room for at least one entry')
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        """Cached value for key, or default. A hit marks the entry as most recently used"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -1,19 +1,55 @@
 import math
+import numpy as np
 
 # Also known as the L1 norm, the manhattan distance is the distance between two points measured along axes at right angles
 def manhattan_dist_2D(coord_pair_1, coord_pair_2):
-    if not all(isinstance(val, int) for val in coord_pair_1 + coord_pair_2):
-        raise Exception('Coordinates passed to Utils.manhattan_dist_2D were not all of type: int')
     if len(coord_pair_1) < 2 or len(coord_pair_2) < 2:
         raise Exception('Coordinates passed to Utils.manhattan_dist_2D did not have at least 2 values in each argument')
+    if not (all(isinstance(val, int) for val in coord_pair_1) and all(isinstance(val, int) for val in coord_pair_2)):
+        raise Exception('Coordinates passed to Utils.manhattan_dist_2D were not all of type: int')
 
     return abs(coord_pair_1[0] - coord_pair_2[0]) + abs(coord_pair_1[1] - coord_pair_2[1])
 
-# Also known as the L1 norm, the manhattan distance is the distance between two points measured along axes at right angles
+# Also known as the L2 norm, the euclidean distance is the length of the straight line between two points
 def euclidean_dist_2D(coord_pair_1, coord_pair_2):
-    if not all(isinstance(val, int) for val in coord_pair_1 + coord_pair_2):
-        raise Exception('Coordinates passed to Utils.euclidean_dist_2D were not all of type: int')
     if len(coord_pair_1) < 2 or len(coord_pair_2) < 2:
         raise Exception('Coordinates passed to Utils.euclidean_dist_2D did not have at least 2 values in each argument')
+    if not (all(isinstance(val, int) for val in coord_pair_1) and all(isinstance(val, int) for val in coord_pair_2)):
+        raise Exception('Coordinates passed to Utils.euclidean_dist_2D were not all of type: int')
+
+    return math.hypot(coord_pair_1[0] - coord_pair_2[0], coord_pair_1[1] - coord_pair_2[1])
+
+# Unchecked versions of the functions above for hot loops where the coordinates are known to be valid [x, y] pairs
+def manhattan_dist_2D_unchecked(coord_pair_1, coord_pair_2):
+    return abs(coord_pair_1[0] - coord_pair_2[0]) + abs(coord_pair_1[1] - coord_pair_2[1])
+
+def euclidean_dist_2D_unchecked(coord_pair_1, coord_pair_2):
+    return math.hypot(coord_pair_1[0] - coord_pair_2[0], coord_pair_1[1] - coord_pair_2[1])
+
+# Batch versions. Coordinates can be a list of [x, y] pairs or a numpy array of shape (n, 2)
+def as_coord_array(coords):
+    return np.asarray(coords, dtype=np.int64).reshape(-1, 2)
+
+def manhattan_dist_one_to_many(coord_pair, coords):
+    """Manhattan distance from one [x, y] pair to each of n coordinates, as an int array of shape (n,)"""
+    coords = as_coord_array(coords)
+    return np.abs(coords[:, 0] - coord_pair[0]) + np.abs(coords[:, 1] - coord_pair[1])
+
+def manhattan_dist_many_to_many(coords_1, coords_2):
+    """Manhattan distance between every pair of coordinates, as an int array of shape (n1, n2)"""
+    coords_1 = as_coord_array(coords_1)
+    coords_2 = as_coord_array(coords_2)
+    return (np.abs(coords_1[:, np.newaxis, 0] - coords_2[np.newaxis, :, 0]) +
+            np.abs(coords_1[:, np.newaxis, 1] - coords_2[np.newaxis, :, 1]))
+
+def euclidean_dist_one_to_many(coord_pair, coords):
+    """Euclidean distance from one [x, y] pair to each of n coordinates, as a float array of shape (n,)"""
+    coords = as_coord_array(coords)
+    return np.hypot(coords[:, 0] - coord_pair[0], coords[:, 1] - coord_pair[1])
 
-    return math.dist(coord_pair_1, coord_pair_2[0])
\ No newline at end of file
+def euclidean_dist_many_to_many(coords_1, coords_2):
+    """Euclidean distance between every pair of coordinates, as a float array of shape (n1, n2)"""
+    coords_1 = as_coord_array(coords_1)
+    coords_2 = as_coord_array(coords_2)
+    return np.hypot(coords_1[:, np.newaxis, 0] - coords_2[np.newaxis, :, 0],
+                    coords_1[:, np.newaxis, 1] - coords_2[np.newaxis, :, 1])
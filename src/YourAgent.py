@@ -1,9 +1,9 @@
 from src.Pod import Pod
 from src.DriveInterface import DriveInterface
 from src.Constants import DriveMove, SensorData
-from src.Utils import manhattan_dist_2D
+from src.DeliverySequencer import DeliverySequencer
+from src.GridSearch import GridSearch
 from typing import List, Optional, Tuple
-import heapq
 
 
 class YourAgent(DriveInterface):
@@ -13,7 +13,15 @@ class YourAgent(DriveInterface):
         Constructor for YourAgent
         """
         self.drive_id = drive_id
+
+        # Path we are following, kept between turns. self.path[self.path_index] is where we should be right now
         self.path: List[Tuple[int, int]] = []
+        self.path_index = 0
+        self.path_goals: Optional[frozenset] = None
+        self.path_cell_indexes = {}  # key = cell on self.path, val = its index in self.path
+
+        # Search buffers and neighbour tables for the field, built once on the first turn
+        self.grid_search: Optional[GridSearch] = None
 
         # Pod we're targeting (for pickup/drop)
         # None if we don't have a target
@@ -22,6 +30,10 @@ class YourAgent(DriveInterface):
         # Delivered pod IDs
         self.collected_pods = set()
 
+        # IDs of the pods still to deliver, in the order that needs the fewest moves overall
+        self.delivery_order: List[int] = []
+        self.sequencer: Optional[DeliverySequencer] = None
+
         # ID of the pod we're carrying
         # None if we are not currently carrying a pod
         self.carrying_pod_id: Optional[int] = None
@@ -33,6 +45,45 @@ class YourAgent(DriveInterface):
             for pair in sensor_data[SensorData.DRIVE_LIFTED_POD_PAIRS]
         )
 
+    def get_grid_search(self, sensor_data: dict) -> GridSearch:
+        """Search helper for the field, the field never changes size during a level so it is built once"""
+        if self.grid_search is None:
+            self.grid_search = GridSearch(*sensor_data[SensorData.FIELD_DIMENSIONS])
+        return self.grid_search
+
+    def get_dynamic_obstacles(self, sensor_data: dict, carrying_pod: bool) -> set:
+        """Cells blocked this turn: other drives, and other pods if we are carrying one"""
+        obstacles = set(tuple(drive) for drive in sensor_data[SensorData.DRIVE_LOCATIONS])
+        if carrying_pod:
+            obstacles.update(tuple(pod) for pod in sensor_data[SensorData.REAL_TIME_POD_LOCATIONS])
+        return obstacles
+
+    def get_path(
+        self, start: Tuple[int, int], goals: List[List[int]], sensor_data: dict, carrying_pod: bool
+    ) -> List[Tuple[int, int]]:
+        """
+        Returns the path from `start` to the nearest goal. Last turn's path is reused while we are still on it,
+        the goals are unchanged and none of the cells ahead of us has become blocked. Otherwise a new path is planned
+        with find_shortest_path.
+        """
+        goal_set = frozenset(tuple(goal) for goal in goals)
+        if self.path and goal_set == self.path_goals:
+            if self.path_index + 1 < len(self.path) and self.path[self.path_index + 1] == start:
+                self.path_index += 1
+            if self.path[self.path_index] == start:
+                blocked_ahead = any(
+                    self.path_cell_indexes.get(cell, -1) > self.path_index
+                    for cell in self.get_dynamic_obstacles(sensor_data, carrying_pod)
+                )
+                if not blocked_ahead:
+                    return self.path[self.path_index:]
+
+        self.path = self.find_shortest_path(start, goals, sensor_data)
+        self.path_index = 0
+        self.path_goals = goal_set
+        self.path_cell_indexes = {cell: i for i, cell in enumerate(self.path)}
+        return self.path
+
     def find_shortest_path(
         self, start: Tuple[int, int], goals: List[List[int]], sensor_data: dict
     ) -> List[Tuple[int, int]]:
@@ -40,54 +91,50 @@ class YourAgent(DriveInterface):
         Finds the shortest path from a starting position to the nearest goal using the A* search algorithm
         with collision avoidance.
 
-        This method considers obstacles (walls, other drives, and pods) and applies penalties for moving
-        close to other drives. It dynamically selects the nearest goal from a list of possible destinations
-        and terminates once a goal is reached.
+        This method treats field boundaries, other drives and (when carrying a pod) other pods as obstacles. It
+        dynamically selects the nearest goal from a list of possible destinations and terminates once a goal is reached.
 
         Args:
             start (Tuple[int, int]): The starting position as (x, y) coordinates.
             goals (List[List[int]]): A list of possible goal positions, each represented as [x, y]. Can be a list
             only contain one goal
             sensor_data (dict): A dictionary containing environmental data, including:
-                - FIELD_BOUNDARIES: Set of coordinates representing walls.
+                - FIELD_DIMENSIONS: [width, height] of the field, used to build the search tables.
                 - DRIVE_LOCATIONS: List of other drives' positions.
-                - REAL_TIME_POD_LOCATIONS: Set of pod locations (if carrying a pod, these act as obstacles).
+                - REAL_TIME_POD_LOCATIONS: List of pod locations (if carrying a pod, these act as obstacles).
 
         Returns:
             List[Tuple[int, int]]: The shortest path from `start` to the nearest goal, represented
             as a list of (x, y) coordinates. Returns an empty list if no valid path is found.
 
         Behavior:
-            - Converts goals into tuples for efficient lookup.
-            - Uses a priority queue (min-heap) to explore paths in order of lowest cost.
-            - Accounts for obstacles (walls, other drives, and pods if carrying one).
-            - Applies a penalty for moving near other drives to encourage safer paths.
+            - Runs GridSearch.astar, which keeps its neighbour tables and search buffers for the whole level.
+            - The Manhattan heuristic is precomputed once per set of goals.
             - Stops searching once the closest goal is reached.
         """
         if not goals:
             return []
-        goal_tuples = [tuple(goal) for goal in goals]
-        walls = set(tuple(wall) for wall in sensor_data[SensorData.FIELD_BOUNDARIES])
-        pods = set(tuple(pod) for pod in sensor_data[SensorData.REAL_TIME_POD_LOCATIONS])
-        queue = [(0, 0, start, [start])]
-        visited = set()
-
-        while queue:
-            f, g, current, path = heapq.heappop(queue)
-            if current in visited:
-                continue
-            if current in goal_tuples:
-                return path
-            visited.add(current)
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                next_pos = (current[0] + dx, current[1] + dy)
-                if (next_pos not in walls and
-                    (not self.is_carrying_pod(sensor_data) or next_pos not in pods) and
-                    next_pos not in visited):
-                    new_g = g + 1
-                    new_h = min(manhattan_dist_2D(list(next_pos), list(goal)) for goal in goal_tuples)
-                    heapq.heappush(queue, (new_g + new_h, new_g, next_pos, path + [next_pos]))
-        return []
+        blocked = self.get_dynamic_obstacles(sensor_data, self.is_carrying_pod(sensor_data))
+        return self.get_grid_search(sensor_data).astar(start, goals, blocked)
+
+    def get_next_pod_id(self, start: Tuple[int, int], available_pods: dict, sensor_data: dict) -> int:
+        """
+        Returns the ID of the next pod to collect. The delivery order is planned once and only planned again when
+        the set of pods left to deliver changes in a way the plan did not expect (e.g. another drive took a pod).
+        """
+        self.delivery_order = [pod_id for pod_id in self.delivery_order if pod_id in available_pods]
+        if set(self.delivery_order) != set(available_pods):
+            if self.sequencer is None:
+                self.sequencer = DeliverySequencer(*sensor_data[SensorData.FIELD_DIMENSIONS])
+            target_goals = {pod.pod_id: pod.target_goal for pod in sensor_data[SensorData.POD_TARGET_GOALS]}
+            pods = [
+                (pod_id, location, target_goals[pod_id]) for pod_id, location in available_pods.items()
+                if target_goals.get(pod_id) is not None
+            ]
+            self.delivery_order, _ = self.sequencer.plan(start, pods)
+            # Pods without a target goal cannot be delivered, but are still collected last like before
+            self.delivery_order += [pod_id for pod_id in available_pods if pod_id not in self.delivery_order]
+        return self.delivery_order[0]
 
     # This is the main function the simulator will call each turn
     def get_next_move(self, sensor_data: dict) -> DriveMove:
@@ -120,249 +167,75 @@ class YourAgent(DriveInterface):
             DriveMove.DROP_POD – If a pod is in the same tile, drop it. The pod will now stay in this position until it is picked up
         """
 
-        # player_x, player_y = sensor_data[SensorData.PLAYER_LOCATION]
-        # player_pos = (player_x, player_y)
-
-        # self.carrying_pod_id = next(
-        #     (pair[1] for pair in sensor_data[SensorData.DRIVE_LIFTED_POD_PAIRS] if pair[0] == self.drive_id), 
-        #     None
-        # )
-
-        # # self.carrying_pod_id = None
-        # # for pair in sensor_data[SensorData.DRIVE_LIFTED_POD_PAIRS]:
-        # #     if pair[0] == self.drive_id:
-        # #         self.carrying_pod_id = pair[1]
-        # #         break
-
-        # carrying_pod = self.carrying_pod_id is not None
-
-        # if carrying_pod:
-        #     goals = sensor_data[SensorData.GOAL_LOCATIONS]
-        #     path = self.find_shortest_path(player_pos, goals, sensor_data)
-
-        #     if not path:
-        #         return DriveMove.NONE
-
-        #     if len(path) == 1 and path[0] == player_pos:
-        #         # self.carrying_pod_id = NONE
-
-        #         return DriveMove.DROP_POD
-        # else:
-        #     pods = sensor_data[SensorData.REAL_TIME_POD_LOCATIONS]
-
-        #     if not pods:
-        #         return DriveMove.NONE  # No more pods to collect
-
-        #     path = self.find_shortest_path(player_pos, pods, sensor_data)
-
-        #     if not path:
-        #         return DriveMove.NONE
-
-        #     if len(path) == 1 and path[0] == player_pos:
-        #         return DriveMove.LIFT_POD
-
-        # if len(path) > 1:
-        #     next_x, next_y = path[1] 
-        #     if next_x > player_x:
-        #         return DriveMove.RIGHT
-        #     elif next_x < player_x:
-        #         return DriveMove.LEFT
-        #     elif next_y > player_y:
-        #         return DriveMove.UP
-        #     elif next_y < player_y:
-        #         return DriveMove.DOWN
-
-        # return DriveMove.NONE
-
-
-        # player_x, player_y = sensor_data[SensorData.PLAYER_LOCATION]
-        # player_pos = (player_x, player_y)
-
-        # self.carrying_pod_id = next(
-        #     (pair[1] for pair in sensor_data[SensorData.DRIVE_LIFTED_POD_PAIRS] if pair[0] == self.drive_id), 
-        #     None
-        # )
-
-        # carrying_pod = self.carrying_pod_id is not None
-
-        # if carrying_pod:
-        #     goals = sensor_data[SensorData.GOAL_LOCATIONS]
-        #     path = self.find_shortest_path(player_pos, goals, sensor_data)
-
-        #     if not path:
-        #         return DriveMove.NONE
-
-        #     if len(path) == 1 and path[0] == player_pos:
-        #         self.collected_pods.add(self.carrying_pod_id)
-        #         self.carrying_pod_id = NONE
-        #         return DriveMove.DROP_POD
-        # else:
-        #     # pods = sensor_data[SensorData.REAL_TIME_POD_LOCATIONS]
-        #     pods = [pod for pod in sensor_data[SensorData.REAL_TIME_POD_LOCATIONS] if pod[0] not in self.collected_pods]
-
-        #     if not pods:
-        #         return DriveMove.NONE  # No more pods to collect
-
-        #     path = self.find_shortest_path(player_pos, pods, sensor_data)
-
-        #     if not path:
-        #         return DriveMove.NONE
-
-        #     if len(path) == 1 and path[0] == player_pos:
-        #         self.carrying_pod_id = sensor_data[SensorData.REAL_TIME_POD_LOCATIONS][pods.index(path[0])][0]
-        #         return DriveMove.LIFT_POD
-
-        # if len(path) > 1:
-        #     next_x, next_y = path[1] 
-        #     if next_x > player_x:
-        #         return DriveMove.RIGHT
-        #     elif next_x < player_x:
-        #         return DriveMove.LEFT
-        #     elif next_y > player_y:
-        #         return DriveMove.UP
-        #     elif next_y < player_y:
-        #         return DriveMove.DOWN
-
-        # return DriveMove.NONE
-
-
-        # player_x, player_y = sensor_data[SensorData.PLAYER_LOCATION]
-        # player_pos = (player_x, player_y)
-
-        # # Get the pod ID we are currently carrying (if any)
-        # self.carrying_pod_id = next(
-        #     (pair[1] for pair in sensor_data[SensorData.DRIVE_LIFTED_POD_PAIRS] if pair[0] == self.drive_id), 
-        #     None
-        # )
-
-        # carrying_pod = self.carrying_pod_id is not None
-
-        # if carrying_pod:
-        #     # If carrying a pod, check if we've reached a goal and drop it off
-        #     goals = sensor_data[SensorData.GOAL_LOCATIONS]
-        #     path = self.find_shortest_path(player_pos, goals, sensor_data)
-
-        #     if not path:
-        #         return DriveMove.NONE
-
-        #     if len(path) == 1 and path[0] == player_pos:
-        #         # Drop the pod and add it to the collected pods set
-        #         self.collected_pods.add(self.carrying_pod_id)
-        #         self.carrying_pod_id = None  # Reset carrying pod ID
-        #         return DriveMove.DROP_POD
-        # else:
-        #     # If not carrying a pod, find the next available pod that hasn't been collected
-        #     pods = [pod for pod in sensor_data[SensorData.REAL_TIME_POD_LOCATIONS] 
-        #             if pod[0] not in self.collected_pods]  # Filter out collected pods
-            
-        #     if not pods:
-        #         return DriveMove.NONE  # No more pods to collect
-
-        #     # Find the shortest path to one of the uncollected pods
-        #     path = self.find_shortest_path(player_pos, pods, sensor_data)
-
-        #     if not path:
-        #         return DriveMove.NONE
-
-        #     if len(path) == 1 and path[0] == player_pos:
-        #         # Pick up the pod
-        #         self.carrying_pod_id = sensor_data[SensorData.REAL_TIME_POD_LOCATIONS][pods.index(path[0])][0]
-        #         return DriveMove.LIFT_POD
-
-        # # If there are still steps left in the path, move towards the next tile
-        # if len(path) > 1:
-        #     next_x, next_y = path[1] 
-        #     if next_x > player_x:
-        #         return DriveMove.RIGHT
-        #     elif next_x < player_x:
-        #         return DriveMove.LEFT
-        #     elif next_y > player_y:
-        #         return DriveMove.UP
-        #     elif next_y < player_y:
-        #         return DriveMove.DOWN
-
-        # return DriveMove.NONE
-
         player_x, player_y = sensor_data[SensorData.PLAYER_LOCATION]
         player_pos = (player_x, player_y)
 
         # Get the pod ID we are currently carrying (if any)
         self.carrying_pod_id = next(
-            (pair[1] for pair in sensor_data[SensorData.DRIVE_LIFTED_POD_PAIRS] if pair[0] == self.drive_id), 
+            (pair[1] for pair in sensor_data[SensorData.DRIVE_LIFTED_POD_PAIRS] if pair[0] == self.drive_id),
             None
         )
 
         carrying_pod = self.carrying_pod_id is not None
 
         if carrying_pod:
-            # If carrying a pod, check if we've reached a goal and drop it off
-            goals = sensor_data[SensorData.GOAL_LOCATIONS]
-            path = self.find_shortest_path(player_pos, goals, sensor_data)
-
-            if not path:
+            # If carrying a pod, head for that pod's own target goal and drop it off there
+            target_pod = next((pod for pod in sensor_data[SensorData.POD_TARGET_GOALS] if pod.pod_id == self.carrying_pod_id), None)
+            if target_pod is None or target_pod.target_goal is None:
                 return DriveMove.NONE
-
-            if len(path) == 1 and path[0] == player_pos:
-                # Drop the pod and add it to the collected pods set
-                self.collected_pods.add(self.carrying_pod_id)
-                # self.carrying_pod_id = None  # Reset carrying pod ID
-                print(f"Dropped off pod ID: {self.collected_pods}")
-
-                return DriveMove.DROP_POD
+            goals = [list(target_pod.target_goal)]
         else:
-            # If not carrying a pod, find the next available pod that hasn't been collected
-            pods = []
-
-            for pod in sensor_data[SensorData.REAL_TIME_POD_LOCATIONS]:
-                if pod not in self.collected_pods:
-                    pods.append(pod)
-            
-
-            # pods = [pod for pod in sensor_data[SensorData.REAL_TIME_POD_LOCATIONS] 
-            #         if pod[0] not in self.collected_pods]  # Filter out collected pods
-            
-            if not pods:
+            # If not carrying a pod, go to the next pod in the delivery order that is not delivered or lifted by another drive
+            lifted_pod_ids = set(pair[1] for pair in sensor_data[SensorData.DRIVE_LIFTED_POD_PAIRS])
+            available_pods = {
+                pod_id: location for pod_id, location in sensor_data[SensorData.POD_LOCATIONS_BY_ID].items()
+                if pod_id not in self.collected_pods and pod_id not in lifted_pod_ids
+            }
+            if not available_pods:
                 return DriveMove.NONE  # No more pods to collect
+            goals = [available_pods[self.get_next_pod_id(player_pos, available_pods, sensor_data)]]
 
-            # Find the shortest path to one of the uncollected pods
-            path = self.find_shortest_path(player_pos, pods, sensor_data)
+        path = self.get_path(player_pos, goals, sensor_data, carrying_pod)
 
-            if not path:
-                return DriveMove.NONE
+        if not path:
+            return DriveMove.NONE
 
-            if len(path) == 1 and path[0] == player_pos:
-                # Pick up the pod
-                # self.carrying_pod_id = sensor_data[SensorData.REAL_TIME_POD_LOCATIONS][pods.index(path[0])][0]
-                # print(f"Picked up pod ID: {self.carrying_pod_id}")
-                # return DriveMove.LIFT_POD
-
-                pod_to_pick_up = None
-                for pod in pods:
-                    if pod[1] == path[0]:  # pod[1] contains the coordinates, path[0] is the target position
-                        pod_to_pick_up = pod
-                        break
-                if pod_to_pick_up:
-                    self.carrying_pod_id = pod_to_pick_up[0]  # pod[0] contains the pod ID
-                    print(f"Picked up pod ID: {self.carrying_pod_id}")
-                    return DriveMove.LIFT_POD
+        if len(path) == 1 and path[0] == player_pos:
+            self.path = []
+            if carrying_pod:
+                # Drop the pod and add it to the collected pods set
+                self.collected_pods.add(self.carrying_pod_id)
+                print(f"Dropped off pod ID: {self.carrying_pod_id}")
+                return DriveMove.DROP_POD
+            else:
+                # Pick up the pod under us
+                self.current_target_pod = next(
+                    (pod for pod in sensor_data[SensorData.POD_TARGET_GOALS]
+                     if tuple(sensor_data[SensorData.POD_LOCATIONS_BY_ID][pod.pod_id]) == player_pos),
+                    None
+                )
+                print(f"Picked up pod ID: {self.current_target_pod.pod_id if self.current_target_pod else None}")
+                return DriveMove.LIFT_POD
 
         # If there are still steps left in the path, move towards the next tile
-        if len(path) > 1:
-            next_x, next_y = path[1] 
-            if next_x > player_x:
-                return DriveMove.RIGHT
-            elif next_x < player_x:
-                return DriveMove.LEFT
-            elif next_y > player_y:
-                return DriveMove.UP
-            elif next_y < player_y:
-                return DriveMove.DOWN
+        return self.get_move_along_path(player_pos, path, sensor_data, carrying_pod)
+
+    def get_move_along_path(
+        self, player_pos: Tuple[int, int], path: List[Tuple[int, int]], sensor_data: dict, carrying_pod: bool
+    ) -> DriveMove:
+        """Move from player_pos to path[1], the next tile of the path. Subclasses can override this to pick the step differently"""
+        return self.get_move_to_cell(player_pos, path[1])
+
+    def get_move_to_cell(self, player_pos: Tuple[int, int], cell: Tuple[int, int]) -> DriveMove:
+        player_x, player_y = player_pos
+        next_x, next_y = cell
+        if next_x > player_x:
+            return DriveMove.RIGHT
+        elif next_x < player_x:
+            return DriveMove.LEFT
+        elif next_y > player_y:
+            return DriveMove.UP
+        elif next_y < player_y:
+            return DriveMove.DOWN
 
         return DriveMove.NONE
-
-
-
-            
-
-
-            
\ No newline at end of file
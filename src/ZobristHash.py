@@ -0,0 +1,30 @@
+from functools import lru_cache
+
+# Kinds of state that contribute to Field.zobrist_hash
+DRIVE_KEY = 1 # (drive game id, x, y)
+POD_KEY = 2 # (pod id, x, y)
+CARRIED_POD_KEY = 3 # (drive game id, pod id)
+DELIVERED_POD_KEY = 4 # (pod id,)
+GOAL_KEY = 5 # (x, y)
+POD_TARGET_GOAL_KEY = 6 # (pod id, goal x, goal y)
+
+MASK_64 = (1 << 64) - 1
+
+
+def splitmix64(value):
+    # Finaliser of the SplitMix64 generator (Steele, Lea & Flood 2014), a cheap 64 bit mixing function
+    value = (value + 0x9E3779B97F4A7C15) & MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return value ^ (value >> 31)
+
+
+@lru_cache(maxsize=65536)
+def get_zobrist_key(kind, *values):
+    """64 bit Zobrist key for one piece of state, e.g. get_zobrist_key(DRIVE_KEY, game_id, x, y).
+    Keys are derived by hashing instead of drawn from a random table, so building them never consumes draws from the
+    seeded game RNG, and the same state hashes to the same value in every run and every process"""
+    key = splitmix64(kind)
+    for value in values:
+        key = splitmix64(key ^ (value & MASK_64))
+    return key